@@ -0,0 +1,78 @@
+"""
+Tick-time benchmark for the flow-level traffic model.
+Builds the same office as bench_packet_sim, where every host talks to a few
+random peers, and reports per-tick latency percentiles as JSON.
+
+Usage: python benchmarks/bench_flow_model.py [--hosts N] [--peers N] [--ticks N] [--output FILE]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+
+from bench_scenes import percentile  # Imported first: keeps pygame's banner off stdout
+from bench_packet_sim import build_office
+from flow_model import FlowModel
+
+def random_demand(rng, num_hosts, peers, max_bps):
+    """Each host sends to `peers` random other hosts; peers >= num_hosts - 1 gives all pairs."""
+    demand = np.zeros((num_hosts, num_hosts))
+    for src in range(num_hosts):
+        others = np.delete(np.arange(num_hosts), src)
+        dsts = rng.choice(others, min(peers, len(others)), replace=False)
+        demand[src, dsts] = rng.uniform(0.0, max_bps, len(dsts))
+    return demand
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=150)
+    parser.add_argument('--peers', type=int, default=6, help='destinations per host')
+    parser.add_argument('--ticks', type=int, default=100)
+    parser.add_argument('--max-bps', type=float, default=3e8, help='largest demand of a single flow')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    rng = np.random.default_rng(args.seed)
+    sim, hosts = build_office(args.hosts)
+    model = FlowModel(sim.network, hosts)
+    start = time.perf_counter()
+    model.tick(np.zeros((args.hosts, args.hosts)))
+    routing_ms = (time.perf_counter() - start) * 1000.0
+
+    demands = [random_demand(rng, args.hosts, args.peers, args.max_bps) for _ in range(args.ticks)]
+    tick_ms = []
+    for demand in demands:
+        model.tick(demand)
+        tick_ms.append(model.last_tick_ms)
+    tick_ms.sort()
+    report = {
+        'config': {'hosts': args.hosts, 'peers': args.peers, 'ticks': args.ticks, 'max_bps': args.max_bps, 'seed': args.seed},
+        'cables': len(model.cables),
+        'routing_ms': routing_ms,
+        'tick_ms': {
+            'mean': sum(tick_ms) / len(tick_ms) if tick_ms else 0.0,
+            'p50': percentile(tick_ms, 50),
+            'p95': percentile(tick_ms, 95),
+            'max': tick_ms[-1] if tick_ms else 0.0,
+        },
+        'saturated_cables': int((model.cable_utilization >= 1.0 - 1e-9).sum()),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Throughput benchmark for the discrete-event packet simulator.
+Builds a switch tree with hosts behind patch panels, replays random unicast
+traffic and reports simulated events per wall-clock second as JSON.
+
+Usage: python benchmarks/bench_packet_sim.py [--hosts N] [--frames N] [--output FILE]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # Keep stdout valid JSON
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import rack  # Imported first: rack and switch import each other
+from switch import Switch, Switch16
+from patch_panel import PatchPanel8
+from network import Network
+from packet_sim import PacketSimulator, Host
+
+def build_office(num_hosts):
+    """
+    Leaf Switch per 7 hosts, each host behind a PatchPanel8 port cabled to the
+    leaf. Leaves hang off Switch16 aggregation switches, which hang off a
+    Switch16 core. Returns (network, hosts).
+    """
+    network = Network()
+    hosts = []
+    leaves = []
+    while len(hosts) < num_hosts:
+        leaf = Switch(0, 0, 240, 0, 40)
+        panel = PatchPanel8(0, 0, 240, 1, 40)
+        for port_index in range(1, leaf.NUM_PORTS):
+            if len(hosts) == num_hosts:
+                break
+            network.connect(leaf, port_index, panel, port_index - 1)
+            host = Host(f'02:00:00:00:{len(hosts) // 256:02x}:{len(hosts) % 256:02x}')
+            hosts.append(host)
+        leaves.append((leaf, panel))
+    core = Switch16(0, 0, 240, 0, 40)
+    core_port = 0
+    for start in range(0, len(leaves), 15):
+        aggregation = Switch16(0, 0, 240, 0, 40)
+        network.connect(aggregation, 0, core, core_port)
+        core_port += 1
+        for port_index, (leaf, _) in enumerate(leaves[start:start + 15], start=1):
+            network.connect(leaf, 0, aggregation, port_index)
+    sim = PacketSimulator(network)
+    for idx, host in enumerate(hosts):
+        _, panel = leaves[idx // 7]
+        sim.attach_host(host, panel, idx % 7)
+    return sim, hosts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=150)
+    parser.add_argument('--frames', type=int, default=20000, help='unicast frames to inject')
+    parser.add_argument('--rate', type=float, default=10000.0, help='injected frames per simulated second')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(args.seed)
+    sim, hosts = build_office(args.hosts)
+    for n in range(args.frames):
+        src, dst = rng.sample(hosts, 2)
+        sim.send(src, dst.mac, size=rng.choice((64, 512, 1500)), delay=n / args.rate)
+
+    start = time.perf_counter()
+    events = sim.run()
+    wall = time.perf_counter() - start
+    report = {
+        'config': {'hosts': args.hosts, 'frames': args.frames, 'rate': args.rate, 'seed': args.seed},
+        'events': events,
+        'wall_s': wall,
+        'events_per_wall_s': events / wall if wall else 0.0,
+        'simulated_s': sim.now,
+        'events_per_simulated_s': events / sim.now if sim.now else 0.0,
+        'average_latency_us': sim.average_latency() * 1e6,
+        'stats': {key: value for key, value in sim.stats.items() if key != 'latency_total'},
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
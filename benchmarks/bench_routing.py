@@ -0,0 +1,76 @@
+"""
+Lookup benchmark for the routing oracle.
+Builds the bench_packet_sim office, answers random latency queries between
+hosts while cables are unplugged and replugged, and reports the oracle's
+metrics as JSON.
+
+Usage: python benchmarks/bench_routing.py [--hosts N] [--queries N] [--churn N] [--output FILE]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from bench_scenes import percentile  # Imported first: keeps pygame's banner off stdout
+from bench_packet_sim import build_office
+from routing import RoutingOracle
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=150)
+    parser.add_argument('--queries', type=int, default=50000)
+    parser.add_argument('--churn', type=int, default=1000, help='queries between two cable changes (0: none)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(args.seed)
+    sim, hosts = build_office(args.hosts)
+    network = sim.network
+    oracle = RoutingOracle(network)
+    endpoints = [host.attachment for host in hosts]
+    cables = list(network.cables())
+    unplugged = None
+    query_us = []
+    for n in range(args.queries):
+        if args.churn and n % args.churn == 0:
+            # Alternate between unplugging a random cable and plugging it back in
+            if unplugged is None:
+                unplugged = rng.choice(cables)
+                network.disconnect(unplugged[0], unplugged[1])
+            else:
+                network.connect(*unplugged)
+                unplugged = None
+        source, target = rng.sample(endpoints, 2)
+        start = time.perf_counter()
+        oracle.latency(source, target)
+        query_us.append((time.perf_counter() - start) * 1e6)
+    query_us.sort()
+    report = {
+        'config': {'hosts': args.hosts, 'queries': args.queries, 'churn': args.churn, 'seed': args.seed},
+        'cables': network.cable_count(),
+        'query_us': {
+            'p50': percentile(query_us, 50),
+            'p95': percentile(query_us, 95),
+            'p99': percentile(query_us, 99),
+            'max': query_us[-1] if query_us else 0.0,
+        },
+        'oracle': oracle.metrics(),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
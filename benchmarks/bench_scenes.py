@@ -0,0 +1,179 @@
+"""
+Headless benchmark for scene drawing and event handling.
+Builds synthetic worlds, replays scripted input streams under SDL's dummy
+video driver and reports per-call timing percentiles as JSON.
+
+Usage: python benchmarks/bench_scenes.py [--racks N | --employees N] [--events N] [--output FILE]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # Keep stdout valid JSON
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pygame
+from rack import Rack, RackMountable
+from network import Network
+from scene_title import TitleScreenScene
+from scene_desk import PlayerDeskScene
+from scene_server_room import ServerRoomScene
+from office_generator import generate_office
+
+WIDTH, HEIGHT = 1920, 1080
+FRAME_MS = 16
+
+class CallTimer:
+    """Collects wall-clock durations per method name."""
+
+    def __init__(self):
+        self.samples = {}
+
+    def call(self, name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.samples.setdefault(name, []).append((time.perf_counter() - start) * 1000.0)
+        return result
+
+    def report(self):
+        return {name: summarize(values) for name, values in self.samples.items()}
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(values):
+    ordered = sorted(values)
+    return {
+        'count': len(ordered),
+        'mean_ms': sum(ordered) / len(ordered),
+        'p50_ms': percentile(ordered, 50),
+        'p90_ms': percentile(ordered, 90),
+        'p99_ms': percentile(ordered, 99),
+        'max_ms': ordered[-1],
+    }
+
+def build_racks(num_racks, units=12, rack_width=240, rack_height=480, spacing=40):
+    """
+    Build num_racks racks laid out in a grid, with every slot filled via
+    Rack.add_device and every free port cabled to the next free port.
+    Racks that do not fit on screen continue off-screen.
+    Returns (racks, network).
+    """
+    cols = max(1, (WIDTH - spacing) // (rack_width + spacing))
+    kinds = [cls for cls in RackMountable.registry if cls.NUM_PORTS]
+    racks = []
+    for idx in range(num_racks):
+        row, col = divmod(idx, cols)
+        rack = Rack(spacing + col * (rack_width + spacing), 80 + row * (rack_height + spacing), rack_width, rack_height, units)
+        unit = 0
+        while unit < rack.units:
+            if rack.slots[unit] is not None:
+                unit += 1
+                continue
+            for offset in range(len(kinds)):
+                cls = kinds[(idx + unit + offset) % len(kinds)]
+                if rack.add_device(cls, unit):
+                    break
+            unit += 1
+        racks.append(rack)
+    # Cable every port to the next one, across racks
+    ports = []
+    for rack in racks:
+        for device in rack.slots:
+            if isinstance(device, RackMountable) and hasattr(device, 'ports'):
+                ports.extend((device, i) for i in range(device.NUM_PORTS))
+    network = Network()
+    for (d1, p1), (d2, p2) in zip(ports[0::2], ports[1::2]):
+        network.connect(d1, p1, d2, p2)
+    return racks, network
+
+def mouse_stream(rng, count, bounds):
+    # Mostly motion sweeps, with a click every so often
+    events = []
+    for n in range(count):
+        pos = (rng.randrange(bounds.left, bounds.right), rng.randrange(bounds.top, bounds.bottom))
+        if n % 10 == 9:
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1))
+        else:
+            events.append(pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0)))
+    return events
+
+def keystroke_stream(rng, count):
+    # Types shell commands character by character, then presses Enter
+    commands = ['ls', 'echo hello world', 'touch file{n}', 'cd /', 'ls', 'cd /home/user', 'help']
+    events = []
+    n = 0
+    while len(events) < count:
+        command = rng.choice(commands).format(n=n)
+        n += 1
+        for char in command:
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=ord(char), unicode=char, mod=0))
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RETURN, unicode='\r', mod=0))
+    return events[:count]
+
+def run_scene(scene, events):
+    timer = CallTimer()
+    timer.call('draw', scene.draw)
+    for event in events:
+        timer.call('handle_event', scene.handle_event, event)
+        if hasattr(scene, 'update'):
+            timer.call('update', scene.update, FRAME_MS)
+        timer.call('draw', scene.draw)
+    return timer.report()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--racks', type=int, default=8, help='number of fully populated racks in the server room')
+    parser.add_argument('--employees', type=int, help='use a generated office of this size instead of --racks')
+    parser.add_argument('--events', type=int, default=2000, help='scripted input events per scene')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    rng = random.Random(args.seed)
+    screen_rect = screen.get_rect()
+
+    results = {}
+    results['title'] = run_scene(TitleScreenScene(screen), mouse_stream(rng, args.events, screen_rect))
+    results['desk'] = run_scene(PlayerDeskScene(screen), keystroke_stream(rng, args.events))
+
+    start = time.perf_counter()
+    room = ServerRoomScene(screen)
+    if args.employees:
+        office = generate_office(args.employees, seed=args.seed)
+        room.set_racks(office.racks, office.network)
+    else:
+        room.set_racks(*build_racks(args.racks))
+    build_ms = (time.perf_counter() - start) * 1000.0
+    rack_area = room.racks[0].rect.unionall([rack.rect for rack in room.racks]).clip(screen_rect)
+    results['server_room'] = run_scene(room, mouse_stream(rng, args.events, rack_area))
+
+    report = {
+        'config': {'racks': len(room.racks), 'employees': args.employees, 'events': args.events, 'seed': args.seed, 'resolution': [WIDTH, HEIGHT]},
+        'setup': {'server_room_build_ms': build_ms},
+        'scenes': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Module for shared UI assets.
+Resolves fonts once, caches static pre-rendered labels and can preload both
+while the title screen is shown.
+"""
+
+import threading
+import pygame
+
+class AssetRegistry:
+    """
+    Cache of fonts keyed by (name, size, bold, italic) and of static labels
+    keyed by (text, color, font key).
+    Labels are meant for fixed UI text (titles, buttons, menu items); dynamic
+    text should go through a TextSurfaceCache instead.
+    """
+
+    def __init__(self):
+        self._fonts = {}
+        self._labels = {}
+        self._scan_thread = None
+        self._pending_fonts = []
+        self._pending_labels = []
+
+    def _wait_for_scan(self):
+        # Never scan the system fonts twice: let a running preload finish first
+        if self._scan_thread is not None:
+            self._scan_thread.join()
+            self._scan_thread = None
+
+    def get_font(self, name, size, bold=False, italic=False):
+        key = (name, size, bold, italic)
+        font = self._fonts.get(key)
+        if font is None:
+            self._wait_for_scan()
+            font = pygame.font.SysFont(name, size, bold=bold, italic=italic)
+            self._fonts[key] = font
+        return font
+
+    def get_label(self, text, color, name, size, bold=False, italic=False):
+        key = (text, color, name, size, bold, italic)
+        label = self._labels.get(key)
+        if label is None:
+            label = self.get_font(name, size, bold, italic).render(text, True, color)
+            self._labels[key] = label
+        return label
+
+    def preload(self, fonts=(), labels=()):
+        """
+        Start scanning the system fonts on a background thread.
+        Font objects and labels are then built on the main thread by warm_up().
+        :param fonts: Iterable of (name, size[, bold[, italic]]) tuples.
+        :param labels: Iterable of (text, color, name, size[, bold[, italic]]) tuples.
+        """
+        self._pending_fonts.extend(fonts)
+        self._pending_labels.extend(labels)
+        if self._scan_thread is None:
+            # get_fonts() fills pygame's system font table, the slow part of SysFont
+            self._scan_thread = threading.Thread(target=pygame.font.get_fonts, name='font-scan', daemon=True)
+            self._scan_thread.start()
+
+    def warm_up(self):
+        """
+        Build preloaded fonts and labels once the background scan is done.
+        Returns True when nothing is left to preload.
+        """
+        if self._scan_thread is not None and self._scan_thread.is_alive():
+            return False
+        while self._pending_fonts:
+            self.get_font(*self._pending_fonts.pop())
+        while self._pending_labels:
+            self.get_label(*self._pending_labels.pop())
+        return True
+
+    def clear(self):
+        self._fonts.clear()
+        self._labels.clear()
+
+# Shared registry used by all scenes
+assets = AssetRegistry()
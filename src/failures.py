@@ -0,0 +1,262 @@
+"""
+Module for the failure and maintenance engine.
+Draws MTBF-driven failure times for switches, patch panel ports and cables,
+keeps every upcoming failure, repair and maintenance window in one heap and
+takes the affected links down in the topology while a component is out.
+"""
+
+import heapq
+import itertools
+import logging
+import random
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Component kinds. Keys are (DEVICE, device), (PORT, device, port_index) and (CABLE, cable key).
+DEVICE = 'device'  # A bridged device (switch); takes all of its ports down
+PORT = 'port'      # One port of a pass-through device (patch panel)
+CABLE = 'cable'    # Takes the ports at both ends down
+
+# Mean time between failures and mean time to repair, in simulated seconds
+DEFAULT_MTBF = {DEVICE: 4 * 3600.0, PORT: 12 * 3600.0, CABLE: 8 * 3600.0}
+DEFAULT_MTTR = {DEVICE: 300.0, PORT: 120.0, CABLE: 60.0}
+
+# Event actions
+FAIL = 0
+MAINTAIN = 1
+REPAIR = 2
+
+# What is out of service, for display; all fields are frozensets
+FailureState = namedtuple('FailureState', ['devices', 'ports', 'cables'])
+NO_FAILURES = FailureState(frozenset(), frozenset(), frozenset())
+
+class FailureEngine:
+    """
+    Failure, repair and maintenance scheduler for the components of a Network.
+    Time to failure and time to repair are drawn from exponential
+    distributions with the component's MTBF and MTTR. Each component has at
+    most one live event in the heap; rescheduling leaves the old entry behind
+    and it is skipped when popped. A step therefore costs O(log n) per expired
+    event and nothing for the components whose time has not come.
+
+    A failed component takes its ports down with Network.set_link_up(); a
+    port stays down while any failed component holds it. Runs as a
+    SimulationThread system: set_network() adopts a new copy of the topology,
+    keeps the state of components that still exist and reapplies their
+    downed ports.
+    """
+
+    def __init__(self, network, mtbf=None, mttr=None, seed=None):
+        """
+        :param network: Network whose links failures take down.
+        :param mtbf: Dict of component kind -> mean seconds between failures; None or 0 never fails.
+        :param mttr: Dict of component kind -> mean seconds to repair; None waits for repair().
+        :param seed: Seed for reproducible failure times.
+        """
+        self.mtbf = dict(DEFAULT_MTBF, **(mtbf or {}))
+        self.mttr = dict(DEFAULT_MTTR, **(mttr or {}))
+        self.now = 0.0
+        self.network = None
+        self.failed = {}       # component key -> 'failure' or 'maintenance'
+        self._rng = random.Random(seed)
+        self._components = {}  # component key -> (mtbf, mttr, ports) for components added with add_component()
+        self._topology = set()  # Component keys derived from the network
+        self._queue = []
+        self._seq = itertools.count()  # Tie-breaker for same-time events; also identifies the live event
+        self._pending = {}     # component key -> seq of its live event
+        self._maintenance = {}  # component key -> duration of its scheduled maintenance window
+        self._down = {}        # (device, port_index) -> number of failed components holding it down
+        self._state = NO_FAILURES
+        self._state_stale = False
+        self.stats = {'failures': 0, 'repairs': 0, 'maintenance': 0, 'events': 0}
+        self.set_network(network)
+
+    # --- Components ---
+
+    def add_component(self, key, mtbf, mttr=None, ports=()):
+        """
+        Track a component that is not part of the cable topology, e.g. a computer part.
+        :param key: Hashable key; it shows up in self.failed.
+        :param ports: (device, port_index) pairs taken down while it is out.
+        """
+        self._components[key] = (mtbf, mttr, tuple(ports))
+        self._schedule_failure(key)
+
+    def remove_component(self, key):
+        self._forget(key)
+        self._components.pop(key, None)
+
+    def _topology_keys(self, network):
+        keys = set()
+        for device in network.devices():
+            if getattr(device, 'BRIDGES_PORTS', True):
+                keys.add((DEVICE, device))
+            else:
+                keys.update((PORT, device, port_index) for port_index in range(getattr(device, 'NUM_PORTS', 0)))
+        keys.update((CABLE, cable) for cable in network.cables())
+        return keys
+
+    def _params(self, key):
+        if key in self._components:
+            return self._components[key]
+        kind = key[0]
+        if kind == DEVICE:
+            ports = [(key[1], port_index) for port_index in range(getattr(key[1], 'NUM_PORTS', 0))]
+        elif kind == PORT:
+            ports = [key[1:]]
+        else:
+            cable = key[1]
+            ports = [cable[:2], cable[2:]]
+        return self.mtbf.get(kind), self.mttr.get(kind), ports
+
+    def set_network(self, network):
+        keys = self._topology_keys(network)
+        for key in self._topology - keys:
+            self._forget(key)
+        self.network = network
+        # The copy carries the link state its sender last saw, which may lag behind this engine
+        for device, port_index in network.down_ports():
+            if (device, port_index) not in self._down:
+                network.set_link_up(device, port_index, True)
+        for (device, port_index), count in self._down.items():
+            if count:
+                network.set_link_up(device, port_index, False)
+        for key in keys - self._topology:
+            self._schedule_failure(key)
+        self._topology = keys
+
+    def _forget(self, key):
+        # The component is gone: drop its event and release the ports it held down
+        self._pending.pop(key, None)
+        self._maintenance.pop(key, None)
+        if key in self.failed:
+            self._set_failed(key, None)
+
+    # --- Scheduling ---
+
+    def _push(self, time, action, key):
+        seq = next(self._seq)
+        self._pending[key] = seq
+        heapq.heappush(self._queue, (time, seq, action, key))
+        # Superseded entries stay in the heap until popped; rebuild once they dominate it
+        if len(self._queue) > 2 * len(self._pending) + 64:
+            self._queue = [entry for entry in self._queue if self._pending.get(entry[3]) == entry[1]]
+            heapq.heapify(self._queue)
+
+    def _schedule_failure(self, key):
+        mtbf = self._params(key)[0]
+        if mtbf:
+            self._push(self.now + self._rng.expovariate(1.0 / mtbf), FAIL, key)
+        else:
+            self._pending.pop(key, None)
+
+    def _schedule_repair(self, key, duration):
+        if duration is None:
+            self._pending.pop(key, None)  # Stays out until repair() is called
+        else:
+            self._push(self.now + duration, REPAIR, key)
+
+    def schedule_maintenance(self, key, start, duration):
+        """
+        Take a component out of service from simulated time start for duration
+        seconds. Its pending failure or repair is replaced; afterwards it is as
+        good as new.
+        """
+        if start < self.now:
+            raise ValueError(f"Maintenance start {start} is in the past (now {self.now}).")
+        self._maintenance[key] = duration
+        self._push(start, MAINTAIN, key)
+
+    def fail(self, key):
+        """Fail a component now, e.g. from a debug command or a scripted event."""
+        self._on_failure(key)
+
+    def repair(self, key):
+        """Bring a failed component back now and draw its next failure time."""
+        if key in self.failed:
+            self._set_failed(key, None)
+            self.stats['repairs'] += 1
+            logger.info("%s repaired at %.0f s.", self._describe(key), self.now)
+        self._schedule_failure(key)
+
+    # --- Simulation ---
+
+    def step(self, dt):
+        self.now += dt
+        # Handlers may compact the heap, so always go through self._queue
+        while self._queue and self._queue[0][0] <= self.now:
+            _, seq, action, key = heapq.heappop(self._queue)
+            if self._pending.get(key) != seq:
+                continue  # Superseded or forgotten
+            del self._pending[key]
+            self.stats['events'] += 1
+            if action == FAIL:
+                self._on_failure(key)
+            elif action == MAINTAIN:
+                self._on_maintenance(key)
+            else:
+                self.repair(key)
+
+    def _on_failure(self, key):
+        if key in self.failed:
+            return
+        mttr = self._params(key)[1]
+        self._set_failed(key, 'failure')
+        self.stats['failures'] += 1
+        logger.info("%s failed at %.0f s.", self._describe(key), self.now)
+        self._schedule_repair(key, self._rng.expovariate(1.0 / mttr) if mttr else None)
+
+    def _on_maintenance(self, key):
+        # A component that already failed is fixed as part of the maintenance
+        if key in self.failed:
+            self.failed[key] = 'maintenance'
+        else:
+            self._set_failed(key, 'maintenance')
+        self.stats['maintenance'] += 1
+        logger.info("%s taken down for maintenance at %.0f s.", self._describe(key), self.now)
+        self._schedule_repair(key, self._maintenance.pop(key))
+
+    def _set_failed(self, key, reason):
+        # reason None brings the component back
+        ports = self._params(key)[2]
+        if reason is None:
+            del self.failed[key]
+            delta = -1
+        else:
+            self.failed[key] = reason
+            delta = 1
+        for port in ports:
+            count = self._down.get(port, 0) + delta
+            if count:
+                self._down[port] = count
+            else:
+                self._down.pop(port, None)
+            if count == (1 if delta > 0 else 0):
+                self.network.set_link_up(port[0], port[1], delta < 0)
+        self._state_stale = True
+
+    def _describe(self, key):
+        kind = key[0]
+        if kind == DEVICE:
+            return type(key[1]).get_display_name()
+        if kind == PORT:
+            return f"Port {key[2] + 1} of {type(key[1]).get_display_name()}"
+        if kind == CABLE:
+            return "Cable"
+        return str(key)
+
+    def snapshot(self):
+        """FailureState of what is out of service; the same object until something changes."""
+        if self._state_stale:
+            devices, ports, cables = set(), set(), set()
+            for key in self.failed:
+                if key[0] == DEVICE:
+                    devices.add(key[1])
+                elif key[0] == PORT:
+                    ports.add(key[1:])
+                elif key[0] == CABLE:
+                    cables.add(key[1])
+            self._state = FailureState(frozenset(devices), frozenset(ports), frozenset(cables))
+            self._state_stale = False
+        return self._state
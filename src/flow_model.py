@@ -0,0 +1,263 @@
+"""
+Module for the flow-level traffic model.
+Routes a demand matrix between endpoints over the cabled topology and
+computes max-min fair throughput and per-cable load with NumPy, cheaply
+enough to run every simulation tick for a whole office.
+"""
+
+import logging
+import random
+import time
+from collections import deque
+
+from types import MappingProxyType
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def topology_demand(network, rate=10e6, max_endpoints=200, seed=0):
+    """
+    Endpoints and demand for a network without a traffic plan of its own.
+    Every cabled port of a pass-through device (a patch panel port, i.e. a
+    desk drop) is an endpoint that offers rate bits/s, split evenly across
+    all other endpoints. The matrix grows with the square of the endpoints,
+    so larger networks use a seeded sample of max_endpoints drops.
+    :return: (endpoints, (n, n) demand array)
+    """
+    drops = sorted({end for cable in network.cables() for end in (cable[:2], cable[2:])
+                    if not getattr(end[0], 'BRIDGES_PORTS', True)},
+                   key=lambda end: (network.device_id(end[0]), end[1]))
+    if len(drops) > max_endpoints:
+        drops = sorted(random.Random(seed).sample(drops, max_endpoints), key=lambda end: (network.device_id(end[0]), end[1]))
+    count = len(drops)
+    demand = np.full((count, count), rate / max(count - 1, 1))
+    np.fill_diagonal(demand, 0.0)
+    return drops, demand
+
+class FlowModel:
+    """
+    Flow-level load model over a Network.
+    Every ordered pair of endpoints is one flow, routed along a shortest path of
+    cables. Cables are full duplex: each direction is a separate link with its
+    own capacity, and a cable's utilization is that of its busier direction.
+
+    Routes are kept as a sparse (flow, link) incidence list and rebuilt only
+    when the network's version changes; a tick is then a handful of array
+    passes whatever the number of flows.
+    """
+
+    def __init__(self, network, endpoints, link_capacity=1e9, topology_rate=None):
+        """
+        :param network: Network to route over.
+        :param endpoints: Devices, (device, port_index) pairs or attached packet_sim Hosts.
+        :param link_capacity: Capacity of each cable direction in bits per second.
+        :param topology_rate: If set, endpoints and demand are rebuilt with topology_demand() at this
+                              rate per desk drop whenever set_network() brings a new topology.
+        """
+        self.network = network
+        self.link_capacity = float(link_capacity)
+        self.endpoints = list(endpoints)
+        self.cables = []  # Link index // 2 -> cable key
+        self.throughput = np.zeros((len(self.endpoints), len(self.endpoints)))
+        self.cable_load = np.zeros(0)         # bits/s on the busier direction of each cable
+        self.cable_utilization = np.zeros(0)  # cable_load / link_capacity
+        self.last_tick_ms = 0.0
+        self.demand = None  # Demand replayed by step() when run as a simulation system
+        self.topology_rate = topology_rate
+        self._routes_version = None
+        self._stepped_demand = None  # Demand the last step() solved, to skip unchanged ticks
+        if topology_rate is not None:
+            self.set_network(network)
+
+    def set_endpoints(self, endpoints):
+        self.endpoints = list(endpoints)
+        self._routes_version = None
+
+    def set_network(self, network):
+        self.network = network
+        self._routes_version = None
+        if self.topology_rate is not None:
+            self.endpoints, self.demand = topology_demand(network, self.topology_rate)
+
+    def set_demand(self, demand):
+        self.demand = np.array(demand, dtype=float)
+
+    def _endpoint_node(self, endpoint):
+        attachment = getattr(endpoint, 'attachment', None)
+        if attachment is not None:
+            endpoint = attachment
+        return self.network.endpoint_node(endpoint)
+
+    # --- Routing ---
+
+    def _build_routes(self):
+        node_for = self.network.node_for
+        is_link_up = self.network.is_link_up
+        self.cables = []
+        link_of = {}  # (node, neighbor node) -> directed link index
+        for cable in self.network.cables():
+            if not (is_link_up(cable[0], cable[1]) and is_link_up(cable[2], cable[3])):
+                continue  # Down links carry nothing
+            node_a = node_for(cable[0], cable[1])
+            node_b = node_for(cable[2], cable[3])
+            if node_a == node_b or (node_a, node_b) in link_of:
+                continue  # Loopback or parallel cable: traffic uses the first cable between two nodes
+            link = 2 * len(self.cables)
+            self.cables.append(cable)
+            link_of[(node_a, node_b)] = link
+            link_of[(node_b, node_a)] = link + 1
+
+        nodes = [self._endpoint_node(endpoint) for endpoint in self.endpoints]
+        flow_src, flow_dst, flow_of, flow_link = [], [], [], []
+        local_src, local_dst = [], []
+        for src, src_node in enumerate(nodes):
+            # Breadth-first search gives the shortest-path tree from this endpoint
+            parent = {src_node: None}
+            queue = deque([src_node])
+            while queue:
+                node = queue.popleft()
+                for neighbor in self.network.neighbors(node):
+                    if neighbor not in parent:
+                        parent[neighbor] = node
+                        queue.append(neighbor)
+            for dst, dst_node in enumerate(nodes):
+                if dst == src or dst_node not in parent:
+                    continue
+                if dst_node == src_node:
+                    # Both endpoints on the same switch: no cable is crossed
+                    local_src.append(src)
+                    local_dst.append(dst)
+                    continue
+                flow = len(flow_src)
+                flow_src.append(src)
+                flow_dst.append(dst)
+                node = dst_node
+                while parent[node] is not None:
+                    flow_of.append(flow)
+                    flow_link.append(link_of[(parent[node], node)])
+                    node = parent[node]
+
+        self._flow_src = np.array(flow_src, dtype=np.intp)
+        self._flow_dst = np.array(flow_dst, dtype=np.intp)
+        self._flow_of = np.array(flow_of, dtype=np.intp)
+        self._flow_link = np.array(flow_link, dtype=np.intp)
+        self._local_src = np.array(local_src, dtype=np.intp)
+        self._local_dst = np.array(local_dst, dtype=np.intp)
+        self._routes_version = self.network.version
+        logger.debug("Routed %d flows over %d cables.", len(flow_src), len(self.cables))
+
+    # --- Simulation ---
+
+    def tick(self, demand):
+        """
+        Allocate throughput for one tick.
+        :param demand: (n, n) array of offered load in bits/s from endpoint i to endpoint j.
+        :return: (n, n) array of allocated throughput.
+        """
+        start = time.perf_counter()
+        count = len(self.endpoints)
+        demand = np.asarray(demand, dtype=float)
+        if demand.shape != (count, count):
+            raise ValueError(f"Demand matrix must be {count}x{count}, got {demand.shape}.")
+        if self._routes_version != self.network.version:
+            self._build_routes()
+
+        rates = self._max_min_fair(demand[self._flow_src, self._flow_dst])
+        throughput = np.zeros((count, count))
+        throughput[self._flow_src, self._flow_dst] = rates
+        throughput[self._local_src, self._local_dst] = demand[self._local_src, self._local_dst]
+
+        link_load = np.bincount(self._flow_link, weights=rates[self._flow_of], minlength=2 * len(self.cables))
+        self.cable_load = link_load.reshape(-1, 2).max(axis=1)
+        self.cable_utilization = self.cable_load / self.link_capacity
+        self.throughput = throughput
+        self.last_tick_ms = (time.perf_counter() - start) * 1000.0
+        return throughput
+
+    def _max_min_fair(self, demand):
+        """
+        Max-min fair rates with demand caps, by bottleneck rounds.
+        Each round finds every link's water level: the rate at which its
+        unfrozen flows, each taking min(demand, level), exactly fill what is
+        left of it. Levels only rise as flows are frozen, so a flow whose demand
+        is below the levels of all its links gets its demand, and a link whose
+        flows are not held lower anywhere else is a final bottleneck. Both are
+        frozen and subtracted from the links they cross; a tree topology settles
+        in a few rounds.
+        """
+        rates = np.zeros(len(demand))
+        remaining = np.full(2 * len(self.cables), self.link_capacity)
+        # Incidence entries of flows with demand, in flow order and in (link, demand) order.
+        # Frozen flows' entries are dropped every round, which keeps both orders intact.
+        keep = demand[self._flow_of] > 0
+        entry_flow = self._flow_of[keep]
+        entry_link = self._flow_link[keep]
+        order = np.lexsort((demand[entry_flow], entry_link))
+        sorted_flow = entry_flow[order]
+        sorted_link = entry_link[order]
+        sorted_demand = demand[sorted_flow]
+        flow_level = np.full(len(demand), np.inf)
+        frozen = np.zeros(len(demand), dtype=bool)
+
+        while len(entry_flow):
+            size = len(sorted_link)
+            positions = np.arange(size)
+            group_starts = np.flatnonzero(np.r_[True, sorted_link[1:] != sorted_link[:-1]])
+            group_sizes = np.diff(np.r_[group_starts, size])
+            group_links = sorted_link[group_starts]
+            # Demand before each entry and flows from it onwards, within its link
+            demand_before = np.cumsum(sorted_demand) - sorted_demand
+            demand_before -= np.repeat(demand_before[group_starts], group_sizes)
+            count_after = np.repeat(group_starts + group_sizes, group_sizes) - positions
+            # The level lies below the first flow whose demand, granted to it and everyone after it, fills the link
+            capacity = remaining[sorted_link]
+            filled = demand_before + count_after * sorted_demand >= capacity
+            first = np.minimum.reduceat(np.where(filled, positions, size), group_starts)
+            levels = np.full(len(remaining), np.inf)
+            has_level = first < size
+            first = first[has_level]
+            levels[group_links[has_level]] = (capacity[first] - demand_before[first]) / count_after[first]
+
+            flow_starts = np.flatnonzero(np.r_[True, entry_flow[1:] != entry_flow[:-1]])
+            flow_sizes = np.diff(np.r_[flow_starts, len(entry_flow)])
+            flows = entry_flow[flow_starts]
+            level = np.minimum.reduceat(levels[entry_link], flow_starts)
+            flow_level[flows] = level
+            satisfied = demand[flows] <= level
+            competing = np.zeros(len(demand), dtype=bool)
+            competing[flows[~satisfied]] = True
+            lowest = np.minimum.reduceat(np.where(competing[sorted_flow], flow_level[sorted_flow], np.inf), group_starts)
+            bottleneck = np.zeros(len(remaining), dtype=bool)
+            bottleneck[group_links] = (lowest < np.inf) & (lowest >= levels[group_links] * (1 - 1e-9))
+            done = satisfied | np.logical_or.reduceat(bottleneck[entry_link], flow_starts)
+
+            new_rates = np.where(done, np.minimum(demand[flows], level), 0.0)
+            rates[flows] = new_rates
+            remaining -= np.bincount(entry_link, weights=np.repeat(new_rates, flow_sizes), minlength=len(remaining))
+            np.maximum(remaining, 0.0, out=remaining)
+            frozen[flows[done]] = True
+            keep = np.repeat(~done, flow_sizes)
+            entry_flow = entry_flow[keep]
+            entry_link = entry_link[keep]
+            keep = ~frozen[sorted_flow]
+            sorted_flow = sorted_flow[keep]
+            sorted_link = sorted_link[keep]
+            sorted_demand = sorted_demand[keep]
+        return rates
+
+    def cable_loads(self):
+        """Return {cable key: utilization} from the last tick."""
+        return dict(zip(self.cables, self.cable_utilization.tolist()))
+
+    # --- SimulationThread system ---
+
+    def step(self, dt):
+        # A steady demand on an unchanged topology gives the same loads; only re-solve after a change
+        if self.demand is None or (self._routes_version == self.network.version and self._stepped_demand is self.demand):
+            return
+        self.tick(self.demand)
+        self._stepped_demand = self.demand
+
+    def snapshot(self):
+        return MappingProxyType(self.cable_loads())
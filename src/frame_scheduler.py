@@ -0,0 +1,53 @@
+"""
+Module for main loop frame pacing.
+Sleeps on the event queue while nothing needs redrawing and caps the frame
+rate while something does.
+"""
+
+import pygame
+
+class FrameScheduler:
+    """
+    Decides how the main loop waits for its next iteration.
+    - Dirty scene: run at up to max_fps, polling events.
+    - Idle scene: block in pygame.event.wait() until an event arrives or
+      idle_timeout_ms passes, so an idle game uses almost no CPU.
+    - Uncapped (benchmark) mode: never wait and redraw every iteration.
+    """
+
+    def __init__(self, max_fps=60, idle_timeout_ms=1000, uncapped=False):
+        self.max_fps = max_fps
+        self.idle_timeout_ms = idle_timeout_ms
+        self.uncapped = uncapped
+        self.clock = pygame.time.Clock()
+        self.last_ticks = pygame.time.get_ticks()
+        self.idle_waits = 0  # Iterations that slept on the event queue
+
+    def wait(self, dirty):
+        """
+        Wait for the next iteration and return (events, dt) where dt is the
+        time in ms since the previous call.
+        """
+        if self.uncapped:
+            self.clock.tick()
+            events = pygame.event.get()
+        elif dirty:
+            self.clock.tick(self.max_fps)
+            events = pygame.event.get()
+        else:
+            self.idle_waits += 1
+            event = pygame.event.wait(self.idle_timeout_ms)
+            events = [] if event.type == pygame.NOEVENT else [event]
+            events.extend(pygame.event.get())
+            # Keep the clock's frame timing from counting the idle sleep as one long frame
+            self.clock.tick()
+        now = pygame.time.get_ticks()
+        dt = now - self.last_ticks
+        self.last_ticks = now
+        return events, dt
+
+    def should_draw(self, dirty):
+        return self.uncapped or dirty
+
+    def get_fps(self):
+        return self.clock.get_fps()
@@ -0,0 +1,121 @@
+"""
+Module for the central logging setup.
+Log records are queued by the game thread and written as JSON lines by a
+background listener thread, so the game loop never blocks on log I/O.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+# LogRecord attributes that are not structured context
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line, including any `extra` context fields."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per (logger, message template) for INFO and below.
+    Dropped records are counted and reported as `suppressed` on the next
+    record of the same kind that gets through. Warnings and errors always pass.
+    """
+
+    MAX_KEYS = 1024
+
+    def __init__(self, rate=5.0, burst=10, max_level=logging.INFO):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.max_level = max_level
+        self._buckets = {}  # (logger, msg) -> [tokens, last_time, suppressed]
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        key = (record.name, record.msg)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_KEYS:
+                self._buckets.clear()
+            bucket = self._buckets[key] = [self.burst, record.created, 0]
+        tokens = min(self.burst, bucket[0] + (record.created - bucket[1]) * self.rate)
+        bucket[1] = record.created
+        if tokens < 1:
+            bucket[0] = tokens
+            bucket[2] += 1
+            return False
+        bucket[0] = tokens - 1
+        if bucket[2]:
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+        return True
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def setup_logging(level=logging.INFO, levels=None, stream=None, rate=5.0, burst=10, max_queue=10000):
+    """
+    Route all logging through a bounded queue to a background JSON writer.
+    :param level: Root log level.
+    :param levels: Optional dict of per-subsystem levels, e.g. {'rack': logging.WARNING}.
+    :param stream: Output stream for the JSON lines (defaults to stderr).
+    :param rate: Sustained records per second allowed per message template.
+    :param burst: Records allowed in a burst per message template.
+    :param max_queue: Queue capacity; records beyond it are dropped, never waited on.
+    """
+    global _listener
+    shutdown_logging()
+    log_queue = queue.Queue(maxsize=max_queue)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(rate=rate, burst=burst))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    for name, subsystem_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(subsystem_level)
+    stream_handler = logging.StreamHandler(stream or sys.stderr)
+    stream_handler.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(shutdown_logging)
@@ -1,60 +1,173 @@
-import pygame
+from startup_profiler import StartupProfiler
+
+# Created first so every import below is timed
+profiler = StartupProfiler()
+with profiler.section('import pygame'):
+    import pygame
 import sys
-from scene_title import TitleScreenScene
-from scene_desk import PlayerDeskScene
-from scene_server_room import ServerRoomScene
-from scene_manager import SceneManager
+import argparse
 import logging
+with profiler.section('import core modules'):
+    from scene_manager import SceneManager
+    from frame_scheduler import FrameScheduler
+    from simulation import SimulationThread
+    from network import Network
+    from assets import assets
+    from logging_setup import setup_logging, shutdown_logging
+
+setup_logging(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+parser = argparse.ArgumentParser(description='Network Simulator')
+parser.add_argument('--fps', type=int, default=60, help='frame rate cap while a scene is changing')
+parser.add_argument('--uncapped', action='store_true', help='benchmark mode: never sleep and redraw every frame')
+parser.add_argument('--no-prewarm', action='store_true', help='build scenes only when they are first shown')
+parser.add_argument('--sim-rate', type=int, default=20, help='simulation ticks per second')
+parser.add_argument('--save', metavar='FILE', help='load the world from FILE and autosave to it')
+parser.add_argument('--office', type=int, metavar='EMPLOYEES', help='start with a generated office instead of two empty racks')
+parser.add_argument('--office-seed', type=int, default=0, help='seed for --office')
+args = parser.parse_args()
 
 # Initialize Pygame
-pygame.init()
+with profiler.section('pygame.init'):
+    pygame.init()
+
+# Scan system fonts in the background while the window is created;
+# the fonts are then built during idle title-screen frames
+assets.preload(fonts=[('Arial', 24), ('Consolas', 18)])
 
 # Set up display
 WIDTH, HEIGHT = 1920, 1080
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('Network Simulator')
+with profiler.section('create window'):
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption('Network Simulator')
+
+def lazy_scene(module_name, class_name, *scene_args):
+    # Import the scene's module and build the scene only when first needed, timing both
+    def factory():
+        module = profiler.import_module(module_name)
+        with profiler.section(f'init {class_name}'):
+            scene = getattr(module, class_name)(*scene_args)
+        if startup_reported:
+            timings = dict(profiler.sections[-2:])
+            logger.info("Built %s after startup.", class_name, extra={'startup': timings})
+        return scene
+    return factory
+
+# Simulation systems tick on their own thread; a published snapshot wakes the render loop
+SIMULATION_EVENT = pygame.event.custom_type()
+simulation = SimulationThread(tick_rate=args.sim_rate, on_publish=lambda snapshot: pygame.event.post(pygame.event.Event(SIMULATION_EVENT)))
+simulation.start()
+
+# Saved world or generated office, applied to the desk and server room as they are built
+world = None
+room_layout = None  # (racks, network) for the server room
+autosave = None
+if args.save:
+    save_game = profiler.import_module('save_game')
+    with profiler.section('load world'):
+        world = save_game.load_world(args.save)
+    if world is not None:
+        room_layout = (world.racks, world.network)
+if args.office and room_layout is None:
+    office_generator = profiler.import_module('office_generator')
+    with profiler.section('generate office'):
+        office = office_generator.generate_office(args.office, seed=args.office_seed)
+    room_layout = (office.racks, office.network)
+
+def with_setup(factory, apply):
+    def build():
+        scene = factory()
+        apply(scene)
+        return scene
+    return build
+
+def start_autosave():
+    # Watches the live racks, cables and desk OS; needs both scenes, so builds any that are missing
+    desk = scene_manager.get_scene('desk')
+    room = scene_manager.get_scene('server_room')
+    return save_game.Autosave(args.save, save_game.World(room.racks, room.network, [desk.os]))
+
+def setup_desk(desk):
+    if world is not None:
+        desk.os = world.systems[0]
+
+def add_simulation_systems():
+    # Registered with the server room, after the first frame: flow_model pulls in numpy
+    failures = profiler.import_module('failures')
+    flow_model = profiler.import_module('flow_model')
+    simulation.add_system('failures', failures.FailureEngine(Network()))
+    simulation.add_system('traffic', flow_model.FlowModel(Network(), [], topology_rate=10e6))
+
+def setup_server_room(room):
+    add_simulation_systems()
+    # The systems get the room's topology through update_network()
+    if room_layout is not None:
+        room.set_racks(*room_layout)
+    else:
+        simulation.update_network(room.network)
 
-# Scene management
+# Scene management: scenes are built on first use; the others are pre-warmed while idle
+startup_reported = False
 scene_manager = SceneManager(screen)
-scene_manager.register_scene('title', TitleScreenScene(screen))
-scene_manager.register_scene('desk', PlayerDeskScene(screen))
-scene_manager.register_scene('server_room', ServerRoomScene(screen, scene_manager))
+scene_manager.register_factory('title', lazy_scene('scene_title', 'TitleScreenScene', screen))
+scene_manager.register_factory('desk', with_setup(lazy_scene('scene_desk', 'PlayerDeskScene', screen), setup_desk), prewarm=not args.no_prewarm)
+scene_manager.register_factory('server_room', with_setup(lazy_scene('scene_server_room', 'ServerRoomScene', screen, scene_manager, simulation),
+                                                         setup_server_room), prewarm=not args.no_prewarm)
 scene_manager.set_scene('title')
 
 # Set up cursor blink timer
 CURSOR_EVENT = pygame.USEREVENT
 pygame.time.set_timer(CURSOR_EVENT, 500)
 
-clock = pygame.time.Clock()
+# Sleeps on the event queue while the current scene has nothing new to draw
+scheduler = FrameScheduler(max_fps=args.fps, uncapped=args.uncapped)
 running = True
 while running:
-    dt = clock.tick(60)
-    for event in pygame.event.get():
+    events, dt = scheduler.wait(scene_manager.needs_redraw())
+    assets.warm_up()
+    for event in events:
         if event.type == pygame.QUIT:
             running = False
+        elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            scene_manager.invalidate()
+        elif event.type == SIMULATION_EVENT:
+            pass  # Only wakes the loop; scenes read the latest snapshot in update()
         else:
             result = scene_manager.handle_event(event)
             if scene_manager.current_scene_key == 'title':
                 if result == 'Start Game':
                     scene_manager.set_scene('desk')
-                    logging.info("Switched to desk scene after title.")
+                    logger.info("Switched to desk scene after title.")
                 elif result == 'Quit':
                     running = False
             elif scene_manager.current_scene_key == 'desk':
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_s:
                     scene_manager.set_scene('server_room')
-                    logging.info("Switched to server room scene from desk.")
+                    logger.info("Switched to server room scene from desk.")
             elif scene_manager.current_scene_key == 'server_room':
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_d:
                     scene_manager.set_scene('desk')
-                    logging.info("Switched to desk scene from server room.")
+                    logger.info("Switched to desk scene from server room.")
     # Call update if the current scene has it
     current_scene = scene_manager.scenes.get(scene_manager.current_scene_key)
     if hasattr(current_scene, 'update'):
         current_scene.update(dt)
-    scene_manager.draw()
+    if scheduler.should_draw(scene_manager.needs_redraw()):
+        scene_manager.draw()
+        if not startup_reported:
+            profiler.mark('first frame')
+            startup_reported = True
+            logger.info(profiler.format_report(), extra={'startup': profiler.as_dict()})
+            if args.save:
+                autosave = start_autosave()
+    elif not scheduler.uncapped:
+        # Nothing to draw: use the idle time to build the next scene ahead of time
+        scene_manager.prewarm()
 
+simulation.stop()
+if autosave is not None:
+    autosave.close()
+shutdown_logging()
 pygame.quit()
 sys.exit() 
\ No newline at end of file
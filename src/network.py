@@ -3,4 +3,312 @@ Module for the Network game element.
 Handles network topology, device connections, and cable management.
 """
 
-# Future: Define Network class and related logic here. 
\ No newline at end of file
+from port_table import PortTable, FREE
+
+class Network:
+    """
+    Cable topology graph and the source of truth for every cable.
+    Cables live in a PortTable; devices are told about changes to their ports
+    through set_connection() and clear_connection(), called only from
+    connect() and disconnect().
+
+    Graph nodes are the units that forward traffic: a device whose ports are
+    bridged (BRIDGES_PORTS, e.g. a switch) is one node; every port of a
+    pass-through device (e.g. a patch panel) is its own node. A port can be
+    taken down with set_link_up() (e.g. by a failure); a cable is an edge of
+    the graph only while both of its ports are up.
+
+    Connected components are kept in a union-find structure. Connecting is
+    O(α(n)). Disconnecting (or a link going down) is O(1) and only marks the
+    components stale when the last cable between two nodes goes away; they
+    are rebuilt lazily on the next query.
+    """
+
+    def __init__(self):
+        self._ports = PortTable()
+        self._adjacency = {}  # node -> {neighbor node: number of cables between them}
+        self._parent = {}     # union-find parent pointers
+        self._rank = {}
+        self._components_stale = False
+        self.version = 0  # Bumped on every cable change so derived data can tell it is stale
+        self._listeners = []  # Called as listener(connected, cable key) after every cable change
+        self._link_listeners = []  # Called as listener(up, cable key) when a cable's link goes up or down
+
+    # --- Topology ---
+
+    def cable_key(self, device, port_index, other_device, other_port_index):
+        """Canonical orientation of a cable: the end with the lower port ID comes first."""
+        port_id = self._ports.port_id(device, port_index)
+        other_port_id = self._ports.port_id(other_device, other_port_index)
+        if other_port_id is None or (port_id is not None and port_id <= other_port_id):
+            return (device, port_index, other_device, other_port_index)
+        return (other_device, other_port_index, device, port_index)
+
+    @staticmethod
+    def _check_port(device, port_index):
+        """Raise ValueError unless port_index is one of the device's ports."""
+        if device is None:
+            raise ValueError("No device to plug into.")
+        if not 0 <= port_index < getattr(device, 'NUM_PORTS', 0):
+            raise ValueError(f"{type(device).__name__} has no port {port_index}.")
+
+    @staticmethod
+    def node_for(device, port_index):
+        if getattr(device, 'BRIDGES_PORTS', True):
+            return device
+        return (device, port_index)
+
+    def get_peer(self, device, port_index):
+        """Return (other_device, other_port) for the cable in this port, or None."""
+        port_id = self._ports.port_id(device, port_index)
+        if port_id is None or self._ports.peer_port[port_id] == FREE:
+            return None
+        return self._ports.endpoint(self._ports.peer_port[port_id])
+
+    def is_port_free(self, device, port_index):
+        port_id = self._ports.port_id(device, port_index)
+        return port_id is None or self._ports.cable_id[port_id] == FREE
+
+    def get_connections(self, device):
+        """Per port of device: (other_device, other_port) or None."""
+        return [self.get_peer(device, port_index) for port_index in range(getattr(device, 'NUM_PORTS', 0))]
+
+    def connect(self, device, port_index, other_device, other_port_index):
+        """
+        Cable two free ports together. Returns the canonical cable key.
+        Raises ValueError if a port does not exist, the ports are the same or either is already in use.
+        """
+        self._check_port(device, port_index)
+        self._check_port(other_device, other_port_index)
+        ports = self._ports
+        port_a = ports.port_base[ports.register(device)] + port_index
+        port_b = ports.port_base[ports.register(other_device)] + other_port_index
+        if port_a == port_b:
+            raise ValueError("Cannot connect a port to itself.")
+        if ports.cable_id[port_a] != FREE or ports.cable_id[port_b] != FREE:
+            raise ValueError("Cannot connect: one or both ports already connected.")
+        ports.link(port_a, port_b)
+        self.version += 1
+        device.set_connection(port_index, other_device, other_port_index)
+        other_device.set_connection(other_port_index, device, port_index)
+        if ports.cable_up(port_a):
+            self._add_edge(self.node_for(device, port_index), self.node_for(other_device, other_port_index))
+        cable = self.cable_key(device, port_index, other_device, other_port_index)
+        self._notify(True, cable)
+        return cable
+
+    def disconnect(self, device, port_index):
+        """
+        Remove the cable plugged into a port. Returns its canonical key, or None if the port was free.
+        """
+        self._check_port(device, port_index)
+        port_id = self._ports.port_id(device, port_index)
+        if port_id is None:
+            return None
+        was_up = self._ports.cable_up(port_id)
+        peer = self._ports.unlink(port_id)
+        if peer == FREE:
+            return None
+        other_device, other_port_index = self._ports.endpoint(peer)
+        self.version += 1
+        device.clear_connection(port_index)
+        other_device.clear_connection(other_port_index)
+        if was_up:
+            self._remove_edge(self.node_for(device, port_index), self.node_for(other_device, other_port_index))
+        cable = self.cable_key(device, port_index, other_device, other_port_index)
+        self._notify(False, cable)
+        return cable
+
+    def is_link_up(self, device, port_index):
+        """Whether the port is up. A cable carries traffic only if both of its ports are."""
+        self._check_port(device, port_index)
+        port_id = self._ports.port_id(device, port_index)
+        return port_id is None or self._ports.link_up[port_id] == 1
+
+    def down_ports(self):
+        """(device, port_index) of every port that is down."""
+        endpoint = self._ports.endpoint
+        return [endpoint(port_id) for port_id in self._ports.down_ports()]
+
+    def set_link_up(self, device, port_index, up):
+        """
+        Bring a port up or take it down; the port keeps its state when it is re-cabled.
+        If this changes whether its cable carries traffic, the graph is updated and
+        link listeners are called; a cable going down also makes the switches at
+        both ends forget the addresses they learned over it. Returns True if the
+        cable's state changed.
+        """
+        self._check_port(device, port_index)
+        ports = self._ports
+        port_id = ports.port_base[ports.register(device)] + port_index
+        if ports.link_up[port_id] == up:
+            return False
+        was_up = ports.cable_up(port_id)
+        ports.link_up[port_id] = 1 if up else 0
+        peer = ports.peer_port[port_id]
+        if peer == FREE or ports.cable_up(port_id) == was_up:
+            return False
+        self.version += 1
+        other_device, other_port_index = ports.endpoint(peer)
+        node_a = self.node_for(device, port_index)
+        node_b = self.node_for(other_device, other_port_index)
+        if was_up:
+            self._remove_edge(node_a, node_b)
+            # Link down: addresses learned over the cable would draw frames into it instead of flooding them
+            for end in ((device, port_index), (other_device, other_port_index)):
+                forget_port = getattr(end[0], 'forget_port', None)
+                if forget_port is not None:
+                    forget_port(end[1])
+        else:
+            self._add_edge(node_a, node_b)
+        cable = self.cable_key(device, port_index, other_device, other_port_index)
+        for listener in self._link_listeners:
+            listener(not was_up, cable)
+        return True
+
+    def _add_edge(self, node_a, node_b):
+        if node_a == node_b:
+            return
+        neighbors = self._adjacency.setdefault(node_a, {})
+        neighbors[node_b] = neighbors.get(node_b, 0) + 1
+        neighbors = self._adjacency.setdefault(node_b, {})
+        neighbors[node_a] = neighbors.get(node_a, 0) + 1
+        if not self._components_stale:
+            self._union(node_a, node_b)
+
+    def _remove_edge(self, node_a, node_b):
+        if node_a == node_b:
+            return
+        for node, neighbor in ((node_a, node_b), (node_b, node_a)):
+            neighbors = self._adjacency[node]
+            neighbors[neighbor] -= 1
+            if not neighbors[neighbor]:
+                del neighbors[neighbor]
+                # The last cable between the two nodes is gone, so a component may have split
+                self._components_stale = True
+            if not neighbors:
+                del self._adjacency[node]
+
+    def add_listener(self, listener):
+        """
+        Call listener(connected, cable) after every connect (connected=True) or
+        disconnect (connected=False), with the cable's canonical key.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def add_link_listener(self, listener):
+        """Call listener(up, cable) whenever set_link_up() changes whether a cable carries traffic."""
+        self._link_listeners.append(listener)
+
+    def remove_link_listener(self, listener):
+        if listener in self._link_listeners:
+            self._link_listeners.remove(listener)
+
+    def _notify(self, connected, cable):
+        for listener in self._listeners:
+            listener(connected, cable)
+
+    def remove_device(self, device):
+        """Unplug every cable attached to a device."""
+        for port_index in range(getattr(device, 'NUM_PORTS', 0)):
+            self.disconnect(device, port_index)
+
+    def cables(self):
+        """Yield every cable once, in canonical orientation."""
+        endpoint = self._ports.endpoint
+        for port_a, port_b in self._ports.cable_ends():
+            yield endpoint(port_a) + endpoint(port_b)
+
+    def device_id(self, device):
+        """Small integer ID of a device, stable for the life of the network (and its copies)."""
+        return self._ports.register(device)
+
+    def devices(self):
+        """Every device that has ever had a cable or a link state."""
+        return list(self._ports.devices)
+
+    def cable_count(self):
+        return self._ports.num_cables
+
+    def neighbors(self, node):
+        return self._adjacency.get(node, {}).keys()
+
+    def link_count(self, node, other_node):
+        """Number of cables directly between two nodes."""
+        return self._adjacency.get(node, {}).get(other_node, 0)
+
+    # --- Connectivity ---
+
+    def _find(self, node):
+        parent = self._parent
+        root = parent.setdefault(node, node)
+        while parent[root] != root:
+            root = parent[root]
+        # Path compression
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    def _union(self, node_a, node_b):
+        root_a, root_b = self._find(node_a), self._find(node_b)
+        if root_a == root_b:
+            return
+        rank_a, rank_b = self._rank.get(root_a, 0), self._rank.get(root_b, 0)
+        if rank_a < rank_b:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        if rank_a == rank_b:
+            self._rank[root_a] = rank_a + 1
+
+    def _rebuild_components(self):
+        self._parent = {}
+        self._rank = {}
+        for node, neighbors in self._adjacency.items():
+            for neighbor in neighbors:
+                self._union(node, neighbor)
+        self._components_stale = False
+
+    def endpoint_node(self, endpoint):
+        # An endpoint is either a (device, port) pair or a device whose ports are bridged
+        if isinstance(endpoint, tuple):
+            return self.node_for(*endpoint)
+        return endpoint
+
+    def component_of(self, endpoint):
+        """Return an opaque identifier of the connected component containing endpoint."""
+        if self._components_stale:
+            self._rebuild_components()
+        return self._find(self.endpoint_node(endpoint))
+
+    def can_reach(self, endpoint, other_endpoint):
+        """
+        Whether two endpoints are linked by cables. Endpoints are a bridged
+        device (e.g. a switch) or a (device, port_index) pair.
+        """
+        return self.component_of(endpoint) == self.component_of(other_endpoint)
+
+    def components(self):
+        """Return the connected components that contain at least one cable, as sets of nodes."""
+        if self._components_stale:
+            self._rebuild_components()
+        groups = {}
+        for node in self._adjacency:
+            groups.setdefault(self._find(node), set()).add(node)
+        return list(groups.values())
+
+    def copy(self):
+        """
+        Independent copy of the topology for another thread, without listeners.
+        Devices are shared but only used as node identities; the copy never
+        calls their set_connection() or clear_connection().
+        """
+        network = Network()
+        network._ports = self._ports.copy()
+        network._adjacency = {node: dict(neighbors) for node, neighbors in self._adjacency.items()}
+        network._components_stale = True
+        network.version = self.version
+        return network
@@ -0,0 +1,162 @@
+"""
+Module for procedurally generated offices.
+Builds racks, access switches, patch panels with one desk drop per employee
+and the distribution layer above them, fully cabled, from a seed. Used to
+load-test the server room and the simulation engines at any scale.
+
+Usage: python src/office_generator.py [--employees N] [--scale N] [--seed N] [--save FILE]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import time
+from collections import Counter, namedtuple
+
+if __name__ == '__main__':
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # Keep stdout valid JSON
+
+from rack import Rack, RackMountable
+import patch_panel  # Registers the patch panel classes with RackMountable
+from network import Network
+
+logger = logging.getLogger(__name__)
+
+# racks: list of Rack, network: Network of their cables,
+# drops: one (patch panel, port_index) desk drop per employee, for packet_sim hosts
+Office = namedtuple('Office', ['racks', 'network', 'drops'])
+
+def _device_kinds():
+    # Registry classes split into switches and patch panels, in a fixed order so a seed always builds the same office
+    kinds = sorted((cls for cls in RackMountable.registry if cls.NUM_PORTS > 1), key=lambda cls: (cls.NUM_PORTS, cls.__name__))
+    switches = [cls for cls in kinds if cls.BRIDGES_PORTS]
+    panels = [cls for cls in kinds if not cls.BRIDGES_PORTS]
+    return switches, panels
+
+def generate_office(employees=150, seed=0, rack_units=12, rack_width=240, rack_height=480,
+                    room_width=1920, spacing=40, top=80):
+    """
+    Build a cabled office network.
+    Every access block is a switch and enough patch panels for its drops, in
+    one rack: port 0 of the switch is its uplink and every other port is
+    cabled to a panel port, which is one employee's desk drop. Access
+    switches hang off distribution switches of the largest switch type, 15
+    to a switch for a Switch16, each placed right after its access blocks so
+    most cables stay short. The distribution switches are aggregated layer
+    by layer up to a single core switch, in racks of their own after the rest.
+
+    Racks are laid out in rows across room_width and continue off-screen.
+    The switch and panel types of each block are drawn from
+    RackMountable.registry with the seed.
+    """
+    if employees < 1:
+        raise ValueError("An office needs at least one employee.")
+    switches, panels = _device_kinds()
+    if not switches or not panels:
+        raise ValueError("Generating an office needs at least one switch and one patch panel type.")
+    rng = random.Random(seed)
+    columns = max(1, (room_width - spacing) // (rack_width + spacing))
+    racks = []
+    network = Network()
+    drops = []
+    free_unit = rack_units  # Next free unit in the last rack; starts full so the first place() opens a rack
+
+    def new_rack():
+        nonlocal free_unit
+        row, column = divmod(len(racks), columns)
+        racks.append(Rack(spacing + column * (rack_width + spacing), top + row * (rack_height + spacing),
+                          rack_width, rack_height, rack_units, populate=False))
+        free_unit = 0
+
+    def place(cls):
+        nonlocal free_unit
+        if free_unit + cls.HEIGHT > rack_units:
+            new_rack()
+        rack = racks[-1]
+        rack.add_device(cls, free_unit)
+        device = rack.slots[free_unit]
+        free_unit += cls.HEIGHT
+        return device
+
+    aggregation_cls = switches[-1]
+    fan_in = aggregation_cls.NUM_PORTS - 1
+
+    def aggregate(children):
+        parent = place(aggregation_cls)
+        for port_index, child in enumerate(children, start=1):
+            network.connect(child, 0, parent, port_index)
+        return parent
+
+    # Access layer, with a distribution switch after every fan_in blocks
+    access = []
+    level = []
+    remaining = employees
+    while remaining:
+        switch_cls = rng.choice(switches)
+        block_drops = min(switch_cls.NUM_PORTS - 1, remaining)
+        block_panels = []
+        covered = 0
+        while covered < block_drops:
+            panel_cls = rng.choice(panels)
+            block_panels.append(panel_cls)
+            covered += panel_cls.NUM_PORTS
+        height = switch_cls.HEIGHT + sum(cls.HEIGHT for cls in block_panels)
+        if height > rack_units:
+            raise ValueError(f"{rack_units}U racks are too small for a {height}U access block.")
+        if free_unit + height > rack_units:
+            new_rack()  # Keep each block in one rack
+        switch = place(switch_cls)
+        panel_ports = [(panel, port_index) for panel in map(place, block_panels) for port_index in range(panel.NUM_PORTS)]
+        for port_index, (panel, panel_port) in enumerate(panel_ports[:block_drops], start=1):
+            network.connect(switch, port_index, panel, panel_port)
+            drops.append((panel, panel_port))
+        access.append(switch)
+        remaining -= block_drops
+        if len(access) == fan_in or (not remaining and level):
+            level.append(aggregate(access))
+            access = []
+    if not level:
+        level = access  # A single access switch is the whole network
+
+    # Core layers up to a single switch
+    if len(level) > 1:
+        new_rack()
+    while len(level) > 1:
+        level = [aggregate(level[start:start + fan_in]) for start in range(0, len(level), fan_in)]
+    logger.info("Generated office for %d employees: %d racks, %d cables.", employees, len(racks), network.cable_count())
+    return Office(racks, network, drops)
+
+def describe(office):
+    """Counts of racks, devices by type, cables and drops, e.g. for a benchmark report."""
+    devices = Counter(type(device).__name__ for rack in office.racks for device in rack.slots
+                      if isinstance(device, RackMountable))
+    return {
+        'racks': len(office.racks),
+        'devices': dict(sorted(devices.items())),
+        'cables': office.network.cable_count(),
+        'drops': len(office.drops),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--employees', type=int, default=150)
+    parser.add_argument('--scale', type=int, default=1, help='multiply the number of employees, e.g. 10 or 100')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', metavar='FILE', help='write the office as a save file for main.py --save')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    start = time.perf_counter()
+    office = generate_office(args.employees * args.scale, seed=args.seed)
+    report = {'config': {'employees': args.employees * args.scale, 'seed': args.seed}, 'build_ms': (time.perf_counter() - start) * 1000.0}
+    report.update(describe(office))
+    if args.save:
+        from save_game import World, save_world
+        from soggy_os import SoggyOS
+        save_world(args.save, World(office.racks, office.network, [SoggyOS()]))
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
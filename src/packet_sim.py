@@ -0,0 +1,188 @@
+"""
+Module for the discrete-event packet simulation.
+Moves Ethernet-like frames through the cabled topology: switches learn MAC
+addresses and flood unknown destinations, patch panels pass frames through
+to the host wired behind each port.
+"""
+
+import heapq
+import itertools
+
+BROADCAST = 'ff:ff:ff:ff:ff:ff'
+
+# Event kinds
+ARRIVE_PORT = 0  # Frame enters a device port from its front (cable or directly plugged host)
+ARRIVE_DROP = 1  # Frame enters a pass-through port from the host wired behind it
+ARRIVE_HOST = 2  # Frame reaches a host
+
+class Host:
+    """
+    A traffic endpoint with a MAC address, attached to one device port.
+    """
+
+    def __init__(self, mac, name=None):
+        self.mac = mac
+        self.name = name or mac
+        self.attachment = None  # (device, port_index)
+        self.received = 0
+
+class PacketSimulator:
+    """
+    Heap-based discrete-event simulator over a Network.
+    Frames are (src_mac, dst_mac, size, hops, sent_at) tuples. Times are in
+    simulated seconds. run() takes an event budget so a caller in the render
+    loop can bound the work done per frame.
+    """
+
+    def __init__(self, network, cable_latency=5e-6, switch_latency=2e-6, max_hops=32):
+        self.network = network
+        self.cable_latency = cable_latency
+        self.switch_latency = switch_latency
+        self.max_hops = max_hops  # Drops frames caught in a switching loop
+        self.now = 0.0
+        self._queue = []
+        self._seq = itertools.count()  # Tie-breaker keeps same-time events in FIFO order
+        self._hosts_at = {}  # (device, port_index) -> Host
+        self.link_frames = {}  # cable key -> frames carried, for load feedback
+        self.stats = {
+            'events': 0,
+            'sent': 0,
+            'delivered': 0,
+            'flooded': 0,
+            'filtered': 0,
+            'dropped': 0,
+            'blocked': 0,  # Frames discarded at ports blocked by the spanning tree
+            'expired': 0,
+            'latency_total': 0.0,
+        }
+
+    # --- Setup ---
+
+    def attach_host(self, host, device, port_index):
+        """
+        Wire a host to a device port. On a pass-through device (patch panel) the
+        host sits behind the port; on a switch it is plugged into the free port itself.
+        """
+        key = (device, port_index)
+        if key in self._hosts_at:
+            raise ValueError(f"Port {port_index+1} already has a host attached.")
+        if getattr(device, 'BRIDGES_PORTS', True) and not self.network.is_port_free(device, port_index):
+            raise ValueError(f"Port {port_index+1} is cabled; cannot plug a host into it.")
+        self._hosts_at[key] = host
+        host.attachment = key
+
+    def detach_host(self, host):
+        if host.attachment is not None:
+            self._hosts_at.pop(host.attachment, None)
+            host.attachment = None
+
+    # --- Traffic ---
+
+    def _schedule(self, time, kind, target, port_index, frame):
+        heapq.heappush(self._queue, (time, next(self._seq), kind, target, port_index, frame))
+
+    def send(self, host, dst_mac, size=1500, delay=0.0):
+        """Inject a frame from host towards dst_mac after delay seconds."""
+        if host.attachment is None:
+            raise ValueError(f"Host {host.name} is not attached to the network.")
+        device, port_index = host.attachment
+        at = self.now + delay
+        frame = (host.mac, dst_mac, size, 0, at)
+        kind = ARRIVE_PORT if getattr(device, 'BRIDGES_PORTS', True) else ARRIVE_DROP
+        self._schedule(at + self.cable_latency, kind, device, port_index, frame)
+        self.stats['sent'] += 1
+
+    def pending(self):
+        return len(self._queue)
+
+    def _transmit(self, device, port_index, frame, time):
+        # Send a frame out of a port's front: over its cable, or to a host plugged straight in
+        peer = self.network.get_peer(device, port_index)
+        if peer is not None:
+            if not (self.network.is_link_up(device, port_index) and self.network.is_link_up(*peer)):
+                self.stats['dropped'] += 1
+                return
+            cable = self.network.cable_key(device, port_index, *peer)
+            self.link_frames[cable] = self.link_frames.get(cable, 0) + 1
+            self._schedule(time + self.cable_latency, ARRIVE_PORT, peer[0], peer[1], frame)
+            return
+        host = self._hosts_at.get((device, port_index))
+        if host is not None and getattr(device, 'BRIDGES_PORTS', True):
+            self._schedule(time + self.cable_latency, ARRIVE_HOST, host, None, frame)
+            return
+        self.stats['dropped'] += 1
+
+    def _switch_frame(self, device, in_port, frame, time):
+        src, dst, size, hops, sent_at = frame
+        blocked = device.blocked_ports
+        if in_port in blocked:
+            self.stats['blocked'] += 1
+            return
+        if hops >= self.max_hops:
+            self.stats['expired'] += 1
+            return
+        frame = (src, dst, size, hops + 1, sent_at)
+        table = device.mac_table
+        table[src] = in_port
+        out_port = table.get(dst) if dst != BROADCAST else None
+        time += self.switch_latency
+        if out_port is None:
+            # Unknown or broadcast destination: flood every other linked port
+            self.stats['flooded'] += 1
+            for port_index in range(device.NUM_PORTS):
+                if port_index != in_port and port_index not in blocked and (
+                        not self.network.is_port_free(device, port_index) or (device, port_index) in self._hosts_at):
+                    self._transmit(device, port_index, frame, time)
+        elif out_port in blocked:
+            self.stats['blocked'] += 1
+        elif out_port != in_port:
+            self._transmit(device, out_port, frame, time)
+        else:
+            # Destination is on the segment the frame came from
+            self.stats['filtered'] += 1
+
+    def _process(self, time, kind, target, port_index, frame):
+        if kind == ARRIVE_HOST:
+            if frame[1] == target.mac:
+                target.received += 1
+                self.stats['delivered'] += 1
+                self.stats['latency_total'] += time - frame[4]
+            elif frame[1] == BROADCAST:
+                target.received += 1
+        elif kind == ARRIVE_DROP:
+            # From the host behind a patch panel port out through its front cable
+            self._transmit(target, port_index, frame, time)
+        elif hasattr(target, 'mac_table'):
+            self._switch_frame(target, port_index, frame, time)
+        elif not getattr(target, 'BRIDGES_PORTS', True):
+            # Pass-through: a frame from the front cable goes to the host behind the port
+            host = self._hosts_at.get((target, port_index))
+            if host is not None:
+                self._schedule(time + self.cable_latency, ARRIVE_HOST, host, None, frame)
+            else:
+                self.stats['dropped'] += 1
+        else:
+            self.stats['dropped'] += 1
+
+    def run(self, until=None, max_events=None):
+        """
+        Process events in time order up to simulated time `until` and/or at most
+        max_events of them. Returns the number of events processed.
+        """
+        queue = self._queue
+        processed = 0
+        while queue and (max_events is None or processed < max_events):
+            if until is not None and queue[0][0] > until:
+                break
+            time, _, kind, target, port_index, frame = heapq.heappop(queue)
+            self.now = time
+            self._process(time, kind, target, port_index, frame)
+            processed += 1
+        if until is not None and (not queue or queue[0][0] > until):
+            self.now = max(self.now, until)
+        self.stats['events'] += processed
+        return processed
+
+    def average_latency(self):
+        delivered = self.stats['delivered']
+        return self.stats['latency_total'] / delivered if delivered else 0.0
@@ -7,7 +7,7 @@ from rack import RackMountable
 import pygame
 import logging
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
 
 class PatchPanel8(RackMountable):
     display_name = "8-Port Patch Panel"
@@ -17,6 +17,8 @@ class PatchPanel8(RackMountable):
     PORT_SPACING = 12
     HEIGHT = 1
     NUM_PORTS = 8
+    BRIDGES_PORTS = False  # Each port passes straight through to its drop
+    __slots__ = ()
 
     def __init__(self, rack_x, rack_y, rack_width, unit_index, unit_height):
         super().__init__()
@@ -32,28 +34,11 @@ class PatchPanel8(RackMountable):
             unit_height
         )
         self.ports = []
-        self.connections = [None for _ in range(self.NUM_PORTS)]
         self.selected_port = None
         self._update_ports()
-        logging.info(f"PatchPanel8 created at rack unit {unit_index+1}.")
-
-    def _update_ports(self):
-        total_width = self.NUM_PORTS * self.PORT_SIZE + (self.NUM_PORTS - 1) * self.PORT_SPACING
-        start_x = self.rack_x + (self.rack_width - total_width) // 2
-        y = self.rack_y + self.unit_index * self.unit_height + self.unit_height // 2 - self.PORT_SIZE // 2
-        self.ports = []
-        for i in range(self.NUM_PORTS):
-            port_rect = pygame.Rect(
-                start_x + i * (self.PORT_SIZE + self.PORT_SPACING),
-                y,
-                self.PORT_SIZE,
-                self.PORT_SIZE
-            )
-            self.ports.append(port_rect)
+        logger.info("PatchPanel8 created at rack unit %s.", unit_index+1)
 
     def draw(self, screen, highlight_port=None):
-        self.rect.width = self.rack_width
-        self._update_ports()
         pygame.draw.rect(screen, self.COLOR, self.rect, border_radius=6)
         for i, port_rect in enumerate(self.ports):
             color = self.PORT_COLOR
@@ -64,7 +49,7 @@ class PatchPanel8(RackMountable):
     def handle_mouse_click(self, pos):
         for i, port_rect in enumerate(self.ports):
             if port_rect.collidepoint(pos):
-                logging.info(f"Clicked port {i+1} on patch panel at rack unit {self.unit_index+1}.")
+                logger.info("Clicked port %s on patch panel at rack unit %s.", i+1, self.unit_index+1)
                 return i
         return None
 
@@ -73,15 +58,12 @@ class PatchPanel8(RackMountable):
         return (port_rect.centerx, port_rect.centery)
 
     def set_connection(self, port_index, other_device, other_port_index):
-        self.connections[port_index] = (other_device, other_port_index)
-        logging.info(f"Port {port_index+1} on patch panel at rack unit {self.unit_index+1} connected to port {other_port_index+1} on another device.")
+        self.mark_dirty(self.ports[port_index])
+        logger.info("Port %s on patch panel at rack unit %s connected to port %s on another device.", port_index+1, self.unit_index+1, other_port_index+1)
 
     def clear_connection(self, port_index):
-        self.connections[port_index] = None
-        logging.info(f"Connection cleared on port {port_index+1} of patch panel at rack unit {self.unit_index+1}.")
-
-    def get_connections(self):
-        return self.connections
+        self.mark_dirty(self.ports[port_index])
+        logger.info("Connection cleared on port %s of patch panel at rack unit %s.", port_index+1, self.unit_index+1)
 
 class PatchPanel16(RackMountable):
     display_name = "16-Port Patch Panel"
@@ -91,6 +73,8 @@ class PatchPanel16(RackMountable):
     PORT_SPACING = 12
     HEIGHT = 2
     NUM_PORTS = 16
+    BRIDGES_PORTS = False  # Each port passes straight through to its drop
+    __slots__ = ()
 
     def __init__(self, rack_x, rack_y, rack_width, unit_index, unit_height):
         super().__init__()
@@ -106,38 +90,11 @@ class PatchPanel16(RackMountable):
             unit_height * self.HEIGHT
         )
         self.ports = []
-        self.connections = [None for _ in range(self.NUM_PORTS)]
         self.selected_port = None
         self._update_ports()
-        logging.info(f"PatchPanel16 created at rack unit {unit_index+1}.")
-
-    def _update_ports(self):
-        ports_per_row = 8
-        total_width = ports_per_row * self.PORT_SIZE + (ports_per_row - 1) * self.PORT_SPACING
-        start_x = self.rack_x + (self.rack_width - total_width) // 2
-        y1 = self.rack_y + self.unit_index * self.unit_height + self.unit_height // 2 - self.PORT_SIZE // 2
-        y2 = y1 + self.unit_height
-        self.ports = []
-        for i in range(ports_per_row):
-            port_rect = pygame.Rect(
-                start_x + i * (self.PORT_SIZE + self.PORT_SPACING),
-                y1,
-                self.PORT_SIZE,
-                self.PORT_SIZE
-            )
-            self.ports.append(port_rect)
-        for i in range(ports_per_row):
-            port_rect = pygame.Rect(
-                start_x + i * (self.PORT_SIZE + self.PORT_SPACING),
-                y2,
-                self.PORT_SIZE,
-                self.PORT_SIZE
-            )
-            self.ports.append(port_rect)
+        logger.info("PatchPanel16 created at rack unit %s.", unit_index+1)
 
     def draw(self, screen, highlight_port=None):
-        self.rect.width = self.rack_width
-        self._update_ports()
         pygame.draw.rect(screen, self.COLOR, self.rect, border_radius=6)
         for i, port_rect in enumerate(self.ports):
             color = self.PORT_COLOR
@@ -148,7 +105,7 @@ class PatchPanel16(RackMountable):
     def handle_mouse_click(self, pos):
         for i, port_rect in enumerate(self.ports):
             if port_rect.collidepoint(pos):
-                logging.info(f"Clicked port {i+1} on patch panel at rack unit {self.unit_index+1}.")
+                logger.info("Clicked port %s on patch panel at rack unit %s.", i+1, self.unit_index+1)
                 return i
         return None
 
@@ -157,12 +114,9 @@ class PatchPanel16(RackMountable):
         return (port_rect.centerx, port_rect.centery)
 
     def set_connection(self, port_index, other_device, other_port_index):
-        self.connections[port_index] = (other_device, other_port_index)
-        logging.info(f"Port {port_index+1} on patch panel at rack unit {self.unit_index+1} connected to port {other_port_index+1} on another device.")
+        self.mark_dirty(self.ports[port_index])
+        logger.info("Port %s on patch panel at rack unit %s connected to port %s on another device.", port_index+1, self.unit_index+1, other_port_index+1)
 
     def clear_connection(self, port_index):
-        self.connections[port_index] = None
-        logging.info(f"Connection cleared on port {port_index+1} of patch panel at rack unit {self.unit_index+1}.")
-
-    def get_connections(self):
-        return self.connections 
\ No newline at end of file
+        self.mark_dirty(self.ports[port_index])
+        logger.info("Connection cleared on port %s of patch panel at rack unit %s.", port_index+1, self.unit_index+1) 
\ No newline at end of file
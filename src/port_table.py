@@ -0,0 +1,144 @@
+"""
+Module for the port and cable table.
+Keeps every port and cable of a network in flat typed arrays indexed by
+integer IDs instead of per-device lists of tuples.
+"""
+
+from array import array
+
+FREE = -1  # Peer and cable columns of an unplugged port
+
+class PortTable:
+    """
+    Struct-of-arrays store of ports and cables.
+    Devices get integer IDs in registration order and a contiguous block of
+    global port IDs, so (device ID, port index) maps to a port ID with one
+    addition. Per port there is one entry in each of the port columns, about
+    17 bytes in total; per cable two ints.
+
+    A cable's ends are stored lower port ID first, which gives every cable a
+    stable canonical orientation. Freed cable IDs are reused, so the cable
+    columns stay as long as the largest number of cables ever plugged in.
+    """
+
+    def __init__(self):
+        self.devices = []         # device ID -> device
+        self._device_ids = {}     # device -> device ID
+        self.port_base = array('i')  # device ID -> first global port ID
+        # Port columns, indexed by global port ID
+        self.port_device = array('i')  # Owning device ID
+        self.peer_device = array('i')  # Device ID at the other end of the cable, or FREE
+        self.peer_port = array('i')    # Global port ID at the other end of the cable, or FREE
+        self.cable_id = array('i')     # Cable plugged into the port, or FREE
+        self.link_up = array('b')      # 1 unless the port is down (failed); kept across re-cabling
+        # Cable columns, indexed by cable ID; both FREE for an unused ID
+        self.cable_a = array('i')
+        self.cable_b = array('i')
+        self._free_cables = []
+        self.num_cables = 0
+
+    # --- IDs ---
+
+    def register(self, device):
+        """Return the device's ID, allocating it and its ports on first use."""
+        device_id = self._device_ids.get(device)
+        if device_id is None:
+            device_id = len(self.devices)
+            num_ports = getattr(device, 'NUM_PORTS', 0)
+            self.devices.append(device)
+            self._device_ids[device] = device_id
+            self.port_base.append(len(self.port_device))
+            self.port_device.extend(array('i', [device_id]) * num_ports)
+            self.peer_device.extend(array('i', [FREE]) * num_ports)
+            self.peer_port.extend(array('i', [FREE]) * num_ports)
+            self.cable_id.extend(array('i', [FREE]) * num_ports)
+            self.link_up.extend(array('b', [1]) * num_ports)
+        return device_id
+
+    def device_id(self, device):
+        """The device's ID, or None if it was never registered."""
+        return self._device_ids.get(device)
+
+    def port_id(self, device, port_index):
+        """Global port ID, or None if the device was never registered."""
+        device_id = self._device_ids.get(device)
+        if device_id is None:
+            return None
+        return self.port_base[device_id] + port_index
+
+    def endpoint(self, port_id):
+        """(device, port_index) for a global port ID."""
+        device_id = self.port_device[port_id]
+        return self.devices[device_id], port_id - self.port_base[device_id]
+
+    def down_ports(self):
+        """Yield the global ID of every port that is down."""
+        flags = self.link_up.tobytes()
+        port_id = flags.find(0)
+        while port_id >= 0:
+            yield port_id
+            port_id = flags.find(0, port_id + 1)
+
+    # --- Cables ---
+
+    def link(self, port_a, port_b):
+        """Record a cable between two free ports and return its cable ID."""
+        if port_a > port_b:
+            port_a, port_b = port_b, port_a
+        if self._free_cables:
+            cable = self._free_cables.pop()
+            self.cable_a[cable] = port_a
+            self.cable_b[cable] = port_b
+        else:
+            cable = len(self.cable_a)
+            self.cable_a.append(port_a)
+            self.cable_b.append(port_b)
+        for port, peer in ((port_a, port_b), (port_b, port_a)):
+            self.peer_device[port] = self.port_device[peer]
+            self.peer_port[port] = peer
+            self.cable_id[port] = cable
+        self.num_cables += 1
+        return cable
+
+    def unlink(self, port):
+        """Remove the cable in a port. Returns the peer's port ID, or FREE if the port was empty."""
+        cable = self.cable_id[port]
+        if cable == FREE:
+            return FREE
+        peer = self.peer_port[port]
+        for end in (port, peer):
+            self.peer_device[end] = FREE
+            self.peer_port[end] = FREE
+            self.cable_id[end] = FREE
+        self.cable_a[cable] = FREE
+        self.cable_b[cable] = FREE
+        self._free_cables.append(cable)
+        self.num_cables -= 1
+        return peer
+
+    def cable_up(self, port):
+        """Whether the cable in a port carries traffic: plugged in and both of its ports up."""
+        peer = self.peer_port[port]
+        return peer != FREE and self.link_up[port] == 1 and self.link_up[peer] == 1
+
+    def cable_ends(self):
+        """Yield (port_a, port_b) for every cable, lower port ID first, by scanning the cable columns."""
+        for port_a, port_b in zip(self.cable_a, self.cable_b):
+            if port_a != FREE:
+                yield port_a, port_b
+
+    def copy(self):
+        table = PortTable()
+        table.devices = list(self.devices)
+        table._device_ids = dict(self._device_ids)
+        for name in ('port_base', 'port_device', 'peer_device', 'peer_port', 'cable_id', 'link_up', 'cable_a', 'cable_b'):
+            setattr(table, name, array(getattr(self, name).typecode, getattr(self, name)))
+        table._free_cables = list(self._free_cables)
+        table.num_cables = self.num_cables
+        return table
+
+    def nbytes(self):
+        """Bytes held by the port and cable columns."""
+        columns = (self.port_base, self.port_device, self.peer_device, self.peer_port,
+                   self.cable_id, self.link_up, self.cable_a, self.cable_b)
+        return sum(column.itemsize * len(column) for column in columns)
@@ -5,12 +5,27 @@ Handles rack attributes and operations.
 
 import pygame
 import logging
+from array import array
 from datetime import datetime
 
 # --- RackMountable base class and registry ---
 class RackMountable:
     registry = []
     display_name = "Rack Device"
+    HEIGHT = 1  # Rack units
+    NUM_PORTS = 0
+    PORT_SIZE = 16
+    PORT_SPACING = 12
+    PORTS_PER_ROW = 8
+    BRIDGES_PORTS = True  # All ports share one forwarding domain (a switch); False for pass-through devices
+    # (device class, rack width, unit height) -> flat array('h') of x, y port offsets.
+    # Computed once and shared by every instance with the same geometry.
+    _port_layouts = {}
+    # Instance attributes of every device; subclasses list only what they add
+    __slots__ = ('dirty_rects', 'rack_x', 'rack_y', 'rack_width', 'unit_index', 'unit_height',
+                 'rect', 'ports', 'port_layout', 'selected_port')
+    def __init__(self):
+        self.dirty_rects = []  # Screen areas that changed since the last frame
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
         if cls not in RackMountable.registry:
@@ -18,14 +33,69 @@ class RackMountable:
     @classmethod
     def get_display_name(cls):
         return getattr(cls, 'display_name', cls.__name__)
+    def mark_dirty(self, rect=None):
+        # Defaults to the whole device body
+        self.dirty_rects.append(pygame.Rect(rect if rect is not None else self.rect))
+    def pop_dirty_rects(self):
+        rects = self.dirty_rects
+        self.dirty_rects = []
+        return rects
+    @classmethod
+    def get_port_layout(cls, rack_width, unit_height):
+        """
+        Port offsets for the device at this geometry. Raises ValueError if the
+        ports cannot be laid out without overlapping or leaving the device.
+        """
+        key = (cls, rack_width, unit_height)
+        layout = RackMountable._port_layouts.get(key)
+        if layout is None:
+            # Rows of up to PORTS_PER_ROW ports, centered horizontally and spread over the device height.
+            # If that needs more rows than the height holds, rows get as many ports as the width holds.
+            height = cls.HEIGHT * unit_height
+            pitch = cls.PORT_SIZE + cls.PORT_SPACING
+            per_row = min(cls.NUM_PORTS, cls.PORTS_PER_ROW)
+            if -(-cls.NUM_PORTS // per_row) * cls.PORT_SIZE > height:
+                per_row = min(cls.NUM_PORTS, (rack_width + cls.PORT_SPACING) // pitch)
+            rows = -(-cls.NUM_PORTS // per_row) if per_row else 0
+            total_width = per_row * pitch - cls.PORT_SPACING
+            if not per_row or rows * cls.PORT_SIZE > height or total_width > rack_width:
+                raise ValueError(f"{cls.NUM_PORTS} ports of {cls.get_display_name()} do not fit "
+                                 f"a {rack_width}x{height} px device.")
+            row_pitch = height // rows
+            start_x = (rack_width - total_width) // 2
+            layout = array('h')
+            for i in range(cls.NUM_PORTS):
+                row, col = divmod(i, per_row)
+                layout.append(start_x + col * pitch)
+                layout.append(row * row_pitch + (row_pitch - cls.PORT_SIZE) // 2)
+            RackMountable._port_layouts[key] = layout
+        return layout
+    def _update_ports(self):
+        # Rebuild absolute port rects from the shared layout; only needed when the geometry changes
+        self.port_layout = self.get_port_layout(self.rack_width, self.unit_height)
+        layout = self.port_layout
+        top = self.rack_y + self.unit_index * self.unit_height
+        self.ports = [
+            pygame.Rect(self.rack_x + layout[2 * i], top + layout[2 * i + 1], self.PORT_SIZE, self.PORT_SIZE)
+            for i in range(self.NUM_PORTS)
+        ]
+    def set_rack_width(self, rack_width):
+        # Returns True if the device geometry changed
+        if rack_width == self.rack_width:
+            return False
+        self.mark_dirty()
+        self.rack_width = rack_width
+        self.rect.width = rack_width
+        self._update_ports()
+        self.mark_dirty()
+        return True
 
 from switch import Switch
 
-# Configure logging for rack operations
-logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
 
 class Rack:
-    def __init__(self, x, y, width=240, height=480, units=12):
+    def __init__(self, x, y, width=240, height=480, units=12, populate=True):
         self.x = x
         self.y = y
         self.width = width
@@ -35,15 +105,21 @@ class Rack:
         self.slots = [None for _ in range(self.units)]  # None means empty
         self.highlighted_unit = None
         self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
-        # Auto-populate first slot with a Switch (1U)
-        if self.slots[0] is None:
+        self.dirty_rects = []  # Screen areas that changed since the last frame
+        self._listeners = []  # Called as listener(rack, device) after a device is mounted
+        # Auto-populate first slot with a Switch (1U); restored racks bring their own devices
+        if populate and self.slots[0] is None:
             self.add_device(Switch, 0)
-        logging.info(f"Rack initialized at ({self.x}, {self.y}) with {self.units}U.")
+        logger.info("Rack initialized at (%s, %s) with %sU.", self.x, self.y, self.units)
 
     def can_place_device(self, device_cls, start_unit):
         height = getattr(device_cls, 'HEIGHT', 1)
         if start_unit + height > self.units:
             return False
+        try:
+            device_cls.get_port_layout(self.width, self.unit_height)
+        except ValueError:
+            return False  # Its ports do not fit this rack
         for i in range(start_unit, start_unit + height):
             if self.slots[i] is not None:
                 return False
@@ -52,31 +128,55 @@ class Rack:
     def add_device(self, device_cls, start_unit):
         height = getattr(device_cls, 'HEIGHT', 1)
         if not self.can_place_device(device_cls, start_unit):
-            logging.warning(f"Cannot place {device_cls.get_display_name()} at {start_unit+1}U: not enough space or overlap.")
+            logger.warning("Cannot place %s at %sU: not enough space, overlap or no room for its ports.", device_cls.get_display_name(), start_unit+1)
             return False
         device = device_cls(self.x, self.y, self.width, start_unit, self.unit_height)
         for i in range(start_unit, start_unit + height):
             self.slots[i] = device if i == start_unit else 'OCCUPIED'  # Mark only the first slot with the device, others as occupied
-        logging.info(f"Added {device_cls.get_display_name()} to rack at unit {start_unit+1}U, height {height}U.")
+        self.mark_dirty(device.rect)
+        logger.info("Added %s to rack at unit %sU, height %sU.", device_cls.get_display_name(), start_unit+1, height)
+        for listener in self._listeners:
+            listener(self, device)
         return True
 
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def unit_rect(self, unit):
+        return pygame.Rect(self.x, self.y + unit * self.unit_height, self.width, self.unit_height)
+
+    def mark_dirty(self, rect):
+        self.dirty_rects.append(pygame.Rect(rect))
+
+    def has_dirty_rects(self):
+        if self.dirty_rects:
+            return True
+        return any(isinstance(slot, RackMountable) and slot.dirty_rects for slot in self.slots)
+
+    def pop_dirty_rects(self):
+        # Collect changed areas from the rack and every mounted device
+        rects = self.dirty_rects
+        self.dirty_rects = []
+        for slot in self.slots:
+            if isinstance(slot, RackMountable):
+                rects.extend(slot.pop_dirty_rects())
+        return rects
+
     def draw(self, screen):
         # Draw rack outline
         pygame.draw.rect(screen, (60, 60, 70), self.rect, border_radius=8, width=4)
         # Draw units
         i = 0
         while i < self.units:
-            unit_rect = pygame.Rect(
-                self.x,
-                self.y + i * self.unit_height,
-                self.width,
-                self.unit_height
-            )
+            unit_rect = self.unit_rect(i)
             slot = self.slots[i]
             # Draw device if present (only in its starting slot)
             if slot and slot != 'OCCUPIED':
-                slot.rack_width = self.width
-                slot.rect.width = self.width
+                slot.set_rack_width(self.width)
                 slot.draw(screen)
                 height = getattr(slot, 'HEIGHT', 1)
                 i += height
@@ -91,13 +191,13 @@ class Rack:
 
     def handle_mouse_motion(self, pos):
         # Highlight the unit under the mouse if empty and enough space for the menu device
+        previous = self.highlighted_unit
         if self.rect.collidepoint(pos):
             rel_y = pos[1] - self.y
             unit = rel_y // self.unit_height
             if 0 <= unit < self.units:
                 if self.slots[unit] is None:
                     self.highlighted_unit = unit
-                    logging.info(f"Mouse over empty slot {unit+1}U.")
                 else:
                     self.highlighted_unit = None
                 # Pass to device if present
@@ -108,6 +208,13 @@ class Rack:
                 self.highlighted_unit = None
         else:
             self.highlighted_unit = None
+        # Only the units whose highlight changed need redrawing
+        if self.highlighted_unit != previous:
+            if self.highlighted_unit is not None:
+                logger.debug("Mouse over empty slot %sU.", self.highlighted_unit+1)
+            for unit in (previous, self.highlighted_unit):
+                if unit is not None:
+                    self.mark_dirty(self.unit_rect(unit))
 
     def handle_mouse_click(self, pos):
         # Pass click to device if present
@@ -115,7 +222,7 @@ class Rack:
             rel_y = pos[1] - self.y
             unit = rel_y // self.unit_height
             if 0 <= unit < self.units:
-                logging.info(f"Clicked on slot {unit+1}U.")
+                logger.info("Clicked on slot %sU.", unit+1)
                 if self.slots[unit] and self.slots[unit] != 'OCCUPIED':
                     if hasattr(self.slots[unit], 'handle_mouse_click'):
                         return self.slots[unit].handle_mouse_click(pos)
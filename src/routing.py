@@ -0,0 +1,205 @@
+"""
+Module for path and latency lookups between machines.
+Memoizes one shortest-path tree per source over the cable topology and drops
+only the trees a cable change can actually affect.
+"""
+
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class ShortestPathTree:
+    """
+    Latency-weighted shortest paths from one source node.
+    dist includes the forwarding latency of the node a path ends on.
+    """
+
+    __slots__ = ('source', 'dist', 'hops', 'parent', 'paths')
+
+    def __init__(self, source, dist, hops, parent):
+        self.source = source
+        self.dist = dist      # node -> seconds
+        self.hops = hops      # node -> cables crossed
+        self.parent = parent  # node -> previous node on the path, None for the source
+        self.paths = {}       # node -> path tuple, filled on first lookup
+
+class RoutingOracle:
+    """
+    Path, hop-count and latency lookups between endpoints of a Network.
+    Endpoints are a bridged device (e.g. a switch) or a (device, port_index)
+    pair, as for Network.can_reach().
+
+    Every cable costs cable_latency and every bridged device a path passes
+    through adds switch_latency, matching the PacketSimulator defaults. Trees
+    are built with Dijkstra on first use of a source; after that latency and
+    hop lookups are dictionary reads.
+
+    The oracle listens to the network. A new cable drops only the trees it
+    makes a shorter path in. A removed cable drops only the trees that route
+    over it, and only once no parallel cable is left between its two nodes.
+    A link going down or back up counts as a removed or new cable.
+    """
+
+    def __init__(self, network, cable_latency=5e-6, switch_latency=2e-6):
+        self.cable_latency = cable_latency
+        self.switch_latency = switch_latency
+        self.network = None
+        self._trees = {}  # source node -> ShortestPathTree
+        self.stats = {
+            'queries': 0,
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+            'query_ns': 0,      # Total time spent answering queries, tree builds included
+            'build_ns': 0,      # Of which spent building trees
+            'max_query_ns': 0,
+        }
+        self.set_network(network)
+
+    def set_network(self, network):
+        if self.network is not None:
+            self.close()
+        self.network = network
+        network.add_listener(self._on_cable_changed)
+        network.add_link_listener(self._on_cable_changed)
+        self._trees.clear()
+
+    def close(self):
+        """Stop listening to the network."""
+        self.network.remove_listener(self._on_cable_changed)
+        self.network.remove_link_listener(self._on_cable_changed)
+
+    # --- Queries ---
+
+    def latency(self, source, target):
+        """One-way latency in seconds, or None if target cannot be reached."""
+        start = time.perf_counter_ns()
+        tree, target = self._lookup(source, target)
+        dist = tree.dist.get(target)
+        if dist is not None:
+            dist = dist - self._forwarding_latency(target) if target != tree.source else 0.0
+        self._record(start)
+        return dist
+
+    def hop_count(self, source, target):
+        """Number of cables on the shortest path, or None if target cannot be reached."""
+        start = time.perf_counter_ns()
+        tree, target = self._lookup(source, target)
+        hops = tree.hops.get(target)
+        self._record(start)
+        return hops
+
+    def path(self, source, target):
+        """Tuple of nodes from source to target, or None if target cannot be reached."""
+        start = time.perf_counter_ns()
+        tree, target = self._lookup(source, target)
+        path = tree.paths.get(target)
+        if path is None and target in tree.parent:
+            nodes = []
+            node = target
+            while node is not None:
+                nodes.append(node)
+                node = tree.parent[node]
+            path = tree.paths[target] = tuple(reversed(nodes))
+        self._record(start)
+        return path
+
+    def invalidate(self, source=None):
+        """Drop the cached tree of one source endpoint, or all of them."""
+        if source is None:
+            self.stats['invalidations'] += len(self._trees)
+            self._trees.clear()
+        elif self._trees.pop(self.network.endpoint_node(source), None) is not None:
+            self.stats['invalidations'] += 1
+
+    def metrics(self):
+        stats = self.stats
+        queries = stats['queries']
+        return {
+            'queries': queries,
+            'cached_trees': len(self._trees),
+            'hit_rate': stats['hits'] / queries if queries else 0.0,
+            'avg_query_us': stats['query_ns'] / queries / 1000.0 if queries else 0.0,
+            'max_query_us': stats['max_query_ns'] / 1000.0,
+            'avg_build_us': stats['build_ns'] / stats['misses'] / 1000.0 if stats['misses'] else 0.0,
+            'invalidations': stats['invalidations'],
+        }
+
+    def _lookup(self, source, target):
+        source = self.network.endpoint_node(source)
+        tree = self._trees.get(source)
+        if tree is None:
+            self.stats['misses'] += 1
+            build_start = time.perf_counter_ns()
+            tree = self._trees[source] = self._build_tree(source)
+            self.stats['build_ns'] += time.perf_counter_ns() - build_start
+        else:
+            self.stats['hits'] += 1
+        return tree, self.network.endpoint_node(target)
+
+    def _record(self, start):
+        elapsed = time.perf_counter_ns() - start
+        stats = self.stats
+        stats['queries'] += 1
+        stats['query_ns'] += elapsed
+        if elapsed > stats['max_query_ns']:
+            stats['max_query_ns'] = elapsed
+
+    # --- Trees ---
+
+    def _forwarding_latency(self, node):
+        # Pass-through ports (patch panels) are separate (device, port) nodes and add nothing
+        return 0.0 if isinstance(node, tuple) else self.switch_latency
+
+    def _edge_cost(self, node):
+        # Cost of crossing a cable into node
+        return self.cable_latency + self._forwarding_latency(node)
+
+    def _build_tree(self, source):
+        dist = {source: 0.0}
+        hops = {source: 0}
+        parent = {source: None}
+        done = set()
+        order = itertools.count()  # Tie-breaker: nodes themselves are not comparable
+        heap = [(0.0, next(order), source)]
+        while heap:
+            node_dist, _, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            for neighbor in self.network.neighbors(node):
+                candidate = node_dist + self._edge_cost(neighbor)
+                if candidate < dist.get(neighbor, float('inf')):
+                    dist[neighbor] = candidate
+                    hops[neighbor] = hops[node] + 1
+                    parent[neighbor] = node
+                    heapq.heappush(heap, (candidate, next(order), neighbor))
+        return ShortestPathTree(source, dist, hops, parent)
+
+    def _on_cable_changed(self, connected, cable):
+        node_a = self.network.node_for(cable[0], cable[1])
+        node_b = self.network.node_for(cable[2], cable[3])
+        if node_a == node_b:
+            return
+        if connected:
+            stale = [source for source, tree in self._trees.items() if self._shortens(tree, node_a, node_b)]
+        elif self.network.link_count(node_a, node_b):
+            return  # A parallel cable still joins the two nodes
+        else:
+            stale = [source for source, tree in self._trees.items()
+                     if tree.parent.get(node_b) == node_a or tree.parent.get(node_a) == node_b]
+        for source in stale:
+            del self._trees[source]
+        self.stats['invalidations'] += len(stale)
+        if stale:
+            logger.debug("Cable change invalidated %d of %d routing trees.", len(stale), len(self._trees) + len(stale))
+
+    def _shortens(self, tree, node_a, node_b):
+        # Whether a new edge between node_a and node_b gives some node a shorter path
+        inf = float('inf')
+        dist_a = tree.dist.get(node_a, inf)
+        dist_b = tree.dist.get(node_b, inf)
+        return dist_a + self._edge_cost(node_b) < dist_b or dist_b + self._edge_cost(node_a) < dist_a
@@ -0,0 +1,458 @@
+"""
+Module for saving and loading the game world.
+Full snapshots use a versioned binary column layout that is read through
+mmap; an append-only journal records every change made since the last
+snapshot so autosave never has to rewrite the whole world.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from collections import namedtuple
+
+from rack import Rack, RackMountable
+import patch_panel  # Registers the patch panel classes with RackMountable
+from network import Network
+from soggy_os import SoggyOS
+from vfs import File
+
+logger = logging.getLogger(__name__)
+
+# racks: list of Rack, network: Network of their cables, systems: list of SoggyOS
+World = namedtuple('World', ['racks', 'network', 'systems'])
+
+# --- Snapshot layout ---
+# Header, then one table entry per column, then the column data, each block 8-byte aligned.
+# Integer columns are little-endian int32; string columns are count + 1 uint32
+# byte offsets followed by the UTF-8 bytes of all strings.
+MAGIC = b'NETSIMSV'
+VERSION = 1
+HEADER = struct.Struct('<8sHHI')        # magic, version, flags, column count
+ENTRY = struct.Struct('<24scxxxIQQ')    # name, kind (b'i' or b's'), item count, data offset, data size
+INT_COLUMN = b'i'
+STR_COLUMN = b's'
+
+def _align(size):
+    return (size + 7) & ~7
+
+def _str_column(values):
+    offsets = array('I', [0])
+    blob = bytearray()
+    for value in values:
+        blob += value.encode('utf-8')
+        offsets.append(len(blob))
+    return offsets.tobytes() + bytes(blob)
+
+def write_snapshot(path, columns):
+    """
+    Write named columns atomically: to a temporary file, then renamed over path.
+    :param columns: Dict of name -> list of ints or list of strs.
+    """
+    entries = []
+    blocks = []
+    offset = _align(HEADER.size + ENTRY.size * len(columns))
+    for name, values in columns.items():
+        if values and isinstance(values[0], str):
+            kind, data = STR_COLUMN, _str_column(values)
+        else:
+            kind, data = INT_COLUMN, array('i', values).tobytes()
+        entries.append(ENTRY.pack(name.encode('ascii'), kind, len(values), offset, len(data)))
+        blocks.append((offset, data))
+        offset = _align(offset + len(data))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(columns)))
+        f.write(b''.join(entries))
+        for block_offset, data in blocks:
+            f.write(b'\0' * (block_offset - f.tell()))
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def read_snapshot(path):
+    """
+    Map a snapshot file and decode all of its columns.
+    Returns dict of name -> list of ints or strs.
+    """
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        magic, version, _, count = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a save file.")
+        if version > VERSION:
+            raise ValueError(f"Save file version {version} is newer than supported version {VERSION}.")
+        columns = {}
+        with memoryview(mapped) as view:
+            for index in range(count):
+                name, kind, items, offset, size = ENTRY.unpack_from(mapped, HEADER.size + index * ENTRY.size)
+                name = name.rstrip(b'\0').decode('ascii')
+                if kind == INT_COLUMN:
+                    columns[name] = _read_array(view, offset, size, 'i')
+                else:
+                    ends = _read_array(view, offset, 4 * (items + 1), 'I')
+                    base = offset + 4 * (items + 1)
+                    columns[name] = [str(mapped[base + start:base + end], 'utf-8') for start, end in zip(ends, ends[1:])]
+    return columns
+
+def _read_array(view, offset, size, typecode):
+    # Cast the mapped bytes in place instead of copying them into an array first
+    with view[offset:offset + size] as chunk, chunk.cast(typecode) as values:
+        return values.tolist()
+
+# --- World <-> columns ---
+
+def _device_classes():
+    return {cls.__name__: cls for cls in RackMountable.registry}
+
+def world_columns(racks, network, systems, generation=0):
+    """Flatten racks, cables and SoggyOS state into snapshot columns."""
+    columns = {name: [] for name in (
+        'meta.generation',
+        'rack.x', 'rack.y', 'rack.width', 'rack.height', 'rack.units',
+        'device.rack', 'device.unit', 'device.kind',
+        'cable.a_rack', 'cable.a_unit', 'cable.a_port', 'cable.b_rack', 'cable.b_unit', 'cable.b_port',
+        'os.username', 'os.hostname', 'os.cwd',
+        'dir.os', 'dir.path',
+        'file.os', 'file.path', 'file.content',
+        'history.os', 'history.command',
+    )}
+    columns['meta.generation'].append(generation)
+    location = {}  # device -> (rack index, unit)
+    for rack_index, rack in enumerate(racks):
+        for name, value in (('x', rack.x), ('y', rack.y), ('width', rack.width), ('height', rack.height), ('units', rack.units)):
+            columns['rack.' + name].append(value)
+        for unit, device in enumerate(rack.slots):
+            if isinstance(device, RackMountable):
+                location[device] = (rack_index, unit)
+                columns['device.rack'].append(rack_index)
+                columns['device.unit'].append(unit)
+                columns['device.kind'].append(type(device).__name__)
+    for device, port_index, other_device, other_port_index in network.cables():
+        if device not in location or other_device not in location:
+            continue  # Only cables between mounted devices are part of the world
+        for end, (rack_index, unit), port in (('a', location[device], port_index), ('b', location[other_device], other_port_index)):
+            columns[f'cable.{end}_rack'].append(rack_index)
+            columns[f'cable.{end}_unit'].append(unit)
+            columns[f'cable.{end}_port'].append(port)
+    for os_index, system in enumerate(systems):
+        columns['os.username'].append(system.username)
+        columns['os.hostname'].append(system.hostname)
+        columns['os.cwd'].append(system.current_dir)
+        for path, node in system.fs.walk():
+            if isinstance(node, File):
+                columns['file.os'].append(os_index)
+                columns['file.path'].append(path)
+                columns['file.content'].append(node.content)
+            else:
+                columns['dir.os'].append(os_index)
+                columns['dir.path'].append(path)
+        for command in system.history:
+            columns['history.os'].append(os_index)
+            columns['history.command'].append(command)
+    return columns
+
+def _connect_saved(network, racks, a_rack, a_unit, a_port, b_rack, b_unit, b_port):
+    # Re-plug a saved cable; one whose devices were not restored or whose ports the network rejects is skipped
+    a = racks[a_rack].slots[a_unit]
+    b = racks[b_rack].slots[b_unit]
+    if not isinstance(a, RackMountable) or not isinstance(b, RackMountable):
+        logger.warning("Skipping cable between rack %d unit %d and rack %d unit %d in save file: device missing.",
+                       a_rack, a_unit + 1, b_rack, b_unit + 1)
+        return
+    try:
+        network.connect(a, a_port, b, b_port)
+    except ValueError as error:
+        logger.warning("Skipping cable between rack %d unit %d and rack %d unit %d in save file: %s",
+                       a_rack, a_unit + 1, b_rack, b_unit + 1, error)
+
+def world_from_columns(columns):
+    classes = _device_classes()
+
+    def column(name):
+        return columns.get(name, [])
+
+    racks = [
+        Rack(x, y, width, height, units, populate=False)
+        for x, y, width, height, units in zip(column('rack.x'), column('rack.y'), column('rack.width'),
+                                              column('rack.height'), column('rack.units'))
+    ]
+    for rack_index, unit, kind in zip(column('device.rack'), column('device.unit'), column('device.kind')):
+        cls = classes.get(kind)
+        if cls is None:
+            logger.warning("Skipping unknown device type %s in save file.", kind)
+            continue
+        racks[rack_index].add_device(cls, unit)
+    network = Network()
+    for a_rack, a_unit, a_port, b_rack, b_unit, b_port in zip(
+            column('cable.a_rack'), column('cable.a_unit'), column('cable.a_port'),
+            column('cable.b_rack'), column('cable.b_unit'), column('cable.b_port')):
+        _connect_saved(network, racks, a_rack, a_unit, a_port, b_rack, b_unit, b_port)
+    systems = []
+    for username, hostname, cwd in zip(column('os.username'), column('os.hostname'), column('os.cwd')):
+        system = SoggyOS()
+        system.username = username
+        system.hostname = hostname
+        system.current_dir = cwd
+        system._update_prompt()
+        systems.append(system)
+    # Every directory is listed, so empty ones survive; saves from before the tree VFS also carry an unused dir.children.
+    # Systems start on the shared base image: what matches it stays shared, what the save lacks is removed.
+    saved_paths = [set() for _ in systems]
+    for os_index, path in zip(column('dir.os'), column('dir.path')):
+        systems[os_index].fs.mkdir(path, parents=True)
+        saved_paths[os_index].add(path)
+    for os_index, path, content in zip(column('file.os'), column('file.path'), column('file.content')):
+        systems[os_index].fs.write(path, content)
+        saved_paths[os_index].add(path)
+    for system, paths in zip(systems, saved_paths):
+        for path in [path for path, _ in system.fs.walk() if path not in paths and path != '/']:
+            if system.fs.exists(path):
+                system.fs.remove(path, recursive=True)
+    for os_index, command in zip(column('history.os'), column('history.command')):
+        systems[os_index].history.append(command)
+    return World(racks, network, systems)
+
+def save_world(path, world, generation=0):
+    write_snapshot(path, world_columns(*world, generation=generation))
+
+def load_world(path):
+    """
+    Load a snapshot and replay its journal (path + '.journal') on top of it.
+    Returns None if there is no snapshot.
+    """
+    if not os.path.exists(path):
+        return None
+    columns = read_snapshot(path)
+    world = world_from_columns(columns)
+    replayed = replay_journal(journal_path(path), world, columns.get('meta.generation', [0])[0])
+    logger.info("Loaded %s: %d racks, %d cables, %d journal records.", path, len(world.racks), world.network.cable_count(), replayed)
+    return world
+
+# --- Journal ---
+# Records are a header (payload size, CRC-32 of kind + payload, kind) and a
+# payload of fields: 'i' int32, 's' uint32 byte length + UTF-8 bytes.
+# The first record names the snapshot generation the journal continues, so a
+# journal left over from before a checkpoint is never replayed twice.
+RECORD = struct.Struct('<IIH')
+JOURNAL_START = 0
+DEVICE_ADDED = 1
+CABLE_CONNECTED = 2
+CABLE_DISCONNECTED = 3
+FILE_WRITTEN = 4
+COMMAND_RUN = 5
+CWD_CHANGED = 6
+DIR_CREATED = 7
+PATH_REMOVED = 8
+PATH_MOVED = 9
+PATH_COPIED = 10
+RECORD_FIELDS = {
+    JOURNAL_START: 'i',             # snapshot generation
+    DEVICE_ADDED: 'iis',            # rack, unit, device class name
+    CABLE_CONNECTED: 'iiiiii',      # rack, unit, port of each end
+    CABLE_DISCONNECTED: 'iiiiii',
+    FILE_WRITTEN: 'iss',            # os, path, content
+    COMMAND_RUN: 'is',              # os, command
+    CWD_CHANGED: 'is',              # os, directory
+    DIR_CREATED: 'is',              # os, path
+    PATH_REMOVED: 'is',             # os, path (recursively)
+    PATH_MOVED: 'iss',              # os, source, destination
+    PATH_COPIED: 'iss',             # os, source, destination (recursively)
+}
+INT32 = struct.Struct('<i')
+UINT32 = struct.Struct('<I')
+
+def journal_path(path):
+    return path + '.journal'
+
+def encode_record(kind, *values):
+    payload = bytearray()
+    for field, value in zip(RECORD_FIELDS[kind], values):
+        if field == 'i':
+            payload += INT32.pack(value)
+        else:
+            data = value.encode('utf-8')
+            payload += UINT32.pack(len(data)) + data
+    kind_bytes = kind.to_bytes(2, 'little')
+    return RECORD.pack(len(payload), zlib.crc32(kind_bytes + payload), kind) + payload
+
+def read_journal(path):
+    """
+    Yield (kind, values) for every intact record. Stops at the first torn or
+    corrupt record, which is what a crash in the middle of an append leaves.
+    """
+    if not os.path.exists(path) or not os.path.getsize(path):
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        pos = 0
+        while pos + RECORD.size <= len(data):
+            size, crc, kind = RECORD.unpack_from(data, pos)
+            start = pos + RECORD.size
+            payload = data[start:start + size]
+            if len(payload) < size or kind not in RECORD_FIELDS or zlib.crc32(kind.to_bytes(2, 'little') + payload) != crc:
+                logger.warning("Journal %s ends with a damaged record at byte %d; ignoring the rest.", path, pos)
+                return
+            values = []
+            offset = 0
+            for field in RECORD_FIELDS[kind]:
+                if field == 'i':
+                    values.append(INT32.unpack_from(payload, offset)[0])
+                    offset += 4
+                else:
+                    length = UINT32.unpack_from(payload, offset)[0]
+                    values.append(str(payload[offset + 4:offset + 4 + length], 'utf-8'))
+                    offset += 4 + length
+            yield kind, values
+            pos = start + size
+
+def replay_journal(path, world, generation):
+    """Apply journal records to a world loaded from snapshot `generation`. Returns the record count."""
+    racks, network, systems = world
+    classes = _device_classes()
+    count = 0
+    started = False
+    for kind, values in read_journal(path):
+        if not started:
+            if kind != JOURNAL_START or values[0] != generation:
+                logger.warning("Journal %s does not continue this snapshot; ignoring it.", path)
+                break
+            started = True
+            continue
+        count += 1
+        if kind == DEVICE_ADDED:
+            rack_index, unit, name = values
+            if name in classes:
+                racks[rack_index].add_device(classes[name], unit)
+            else:
+                logger.warning("Skipping unknown device type %s in journal.", name)
+        elif kind == CABLE_CONNECTED:
+            _connect_saved(network, racks, *values)
+        elif kind == CABLE_DISCONNECTED:
+            device = racks[values[0]].slots[values[1]]
+            if isinstance(device, RackMountable) and 0 <= values[2] < device.NUM_PORTS:
+                network.disconnect(device, values[2])
+        elif kind == FILE_WRITTEN:
+            systems[values[0]].fs.write(values[1], values[2])
+        elif kind == COMMAND_RUN:
+            systems[values[0]].history.append(values[1])
+        elif kind == CWD_CHANGED:
+            systems[values[0]].current_dir = values[1]
+            systems[values[0]]._update_prompt()
+        elif kind == DIR_CREATED:
+            systems[values[0]].fs.mkdir(values[1], parents=True)
+        elif kind == PATH_REMOVED:
+            systems[values[0]].fs.remove(values[1], recursive=True)
+        elif kind == PATH_MOVED:
+            systems[values[0]].fs.move(values[1], values[2])
+        elif kind == PATH_COPIED:
+            systems[values[0]].fs.copy(values[1], values[2], recursive=True)
+    return count
+
+class Autosave:
+    """
+    Crash-safe autosave of a World.
+    Watches the racks, the network and every SoggyOS and appends one journal
+    record per change; each append is flushed so a crash loses at most the
+    record being written. checkpoint() writes a fresh snapshot and empties
+    the journal, automatically once it holds journal_limit records.
+    """
+
+    def __init__(self, path, world, journal_limit=5000, fsync=False):
+        """
+        :param path: Snapshot file; the journal is kept next to it.
+        :param world: World to watch. Use World(racks, network, systems) for a new game.
+        :param fsync: Also fsync after each record, surviving power loss at the cost of latency.
+        """
+        self.path = path
+        self.journal_limit = journal_limit
+        self.fsync = fsync
+        self.world = None
+        self.records = 0
+        self._journal = None
+        self._location = {}  # device -> (rack index, unit)
+        self._os_listeners = []
+        self.watch(world)
+
+    def watch(self, world):
+        """Start watching a (new) world, e.g. after the room was replaced, and checkpoint it."""
+        self._unwatch()
+        self.world = world
+        for rack_index, rack in enumerate(world.racks):
+            rack.add_listener(self._on_device_added)
+            for unit, device in enumerate(rack.slots):
+                if isinstance(device, RackMountable):
+                    self._location[device] = (rack_index, unit)
+        world.network.add_listener(self._on_cable_changed)
+        for os_index, system in enumerate(world.systems):
+            listener = lambda event, *args, os_index=os_index: self._on_os_event(os_index, event, *args)
+            system.add_listener(listener)
+            self._os_listeners.append((system, listener))
+        self.checkpoint()
+
+    def _unwatch(self):
+        if self.world is None:
+            return
+        for rack in self.world.racks:
+            rack.remove_listener(self._on_device_added)
+        self.world.network.remove_listener(self._on_cable_changed)
+        for system, listener in self._os_listeners:
+            system.remove_listener(listener)
+        self._os_listeners = []
+        self._location = {}
+
+    def checkpoint(self):
+        generation = int.from_bytes(os.urandom(4), 'little') & 0x7fffffff
+        save_world(self.path, self.world, generation)
+        # The snapshot now holds everything the journal did
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = open(journal_path(self.path), 'wb')
+        self._journal.write(encode_record(JOURNAL_START, generation))
+        self._journal.flush()
+        self.records = 0
+        logger.info("Autosave checkpoint written to %s.", self.path)
+
+    def close(self):
+        self.checkpoint()
+        self._unwatch()
+        self._journal.close()
+        self._journal = None
+
+    def _append(self, kind, *values):
+        self._journal.write(encode_record(kind, *values))
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self.records += 1
+        if self.records >= self.journal_limit:
+            self.checkpoint()
+
+    def _on_device_added(self, rack, device):
+        rack_index = self.world.racks.index(rack)
+        self._location[device] = (rack_index, device.unit_index)
+        self._append(DEVICE_ADDED, rack_index, device.unit_index, type(device).__name__)
+
+    def _on_cable_changed(self, connected, cable):
+        device, port_index, other_device, other_port_index = cable
+        if device not in self._location or other_device not in self._location:
+            return
+        kind = CABLE_CONNECTED if connected else CABLE_DISCONNECTED
+        self._append(kind, *self._location[device], port_index, *self._location[other_device], other_port_index)
+
+    def _on_os_event(self, os_index, event, *args):
+        if event == 'file_written':
+            self._append(FILE_WRITTEN, os_index, *args)
+        elif event == 'command':
+            self._append(COMMAND_RUN, os_index, *args)
+        elif event == 'cwd':
+            self._append(CWD_CHANGED, os_index, *args)
+        elif event == 'mkdir':
+            self._append(DIR_CREATED, os_index, *args)
+        elif event == 'removed':
+            self._append(PATH_REMOVED, os_index, *args)
+        elif event == 'moved':
+            self._append(PATH_MOVED, os_index, *args)
+        elif event == 'copied':
+            self._append(PATH_COPIED, os_index, *args)
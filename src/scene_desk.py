@@ -5,30 +5,54 @@ Handles UI and logic for the player's main computer and remote access.
 
 import pygame
 from soggy_os import SoggyOS
+from text_buffer import TextBuffer
+from text_cache import TextSurfaceCache
+from assets import assets
 
 class PlayerDeskScene:
+    # Insert mode editing and cursor keys
+    EDITOR_KEYS = {
+        pygame.K_RETURN: lambda self: self.editor_buffer.insert('\n'),
+        pygame.K_BACKSPACE: lambda self: self.editor_buffer.delete_back(),
+        pygame.K_DELETE: lambda self: self.editor_buffer.delete_forward(),
+        pygame.K_LEFT: lambda self: self.editor_buffer.move_left(),
+        pygame.K_RIGHT: lambda self: self.editor_buffer.move_right(),
+        pygame.K_UP: lambda self: self.editor_buffer.move_up(),
+        pygame.K_DOWN: lambda self: self.editor_buffer.move_down(),
+        pygame.K_HOME: lambda self: self.editor_buffer.move_home(),
+        pygame.K_END: lambda self: self.editor_buffer.move_end(),
+        pygame.K_PAGEUP: lambda self: self.editor_buffer.move_up(self._editor_rows() - 1 or 1),
+        pygame.K_PAGEDOWN: lambda self: self.editor_buffer.move_down(self._editor_rows() - 1 or 1),
+    }
+
     def __init__(self, screen):
         self.screen = screen
         self.bg_color = (24, 26, 32)
         self.title_color = (220, 220, 220)
         self.monitor_color = (0, 0, 0)  # Black for terminal
-        self.title_font = pygame.font.SysFont('Arial', 36, bold=True)
-        self.term_font = pygame.font.SysFont('Consolas', 22)
+        self.title_font = assets.get_font('Arial', 36, bold=True)
+        self.term_font = assets.get_font('Consolas', 22)
         self.term_color = (0, 255, 0)  # Green text
         self.dir_color = (0, 128, 255) # Blue for directories
         self.file_color = (255, 255, 255) # White for files
+        # Rendered output lines and ls grids; only the prompt line is rasterized every frame
+        self.text_cache = TextSurfaceCache(self.term_font)
         self.title = 'Desk'
         self._update_monitor_rect()
         # SoggyOS instance
         self.os = SoggyOS()
+        self.os.columns = max(1, (self.monitor_rect.width - 36) // self.term_font.size('M')[0])
         self.input_buffer = ''
+        self.scroll = 0  # Rows scrolled back from the newest output with PageUp/PageDown
         self.cursor_visible = True
         self.cursor_timer = 0
         self.cursor_interval = 500  # ms
+        self.dirty = True
         # Editor state
         self.editor_mode = False
         self.editor_path = None
-        self.editor_content = ''
+        self.editor_buffer = TextBuffer()
+        self.editor_top = 0  # First line shown in the editor
         self.editor_original_content = ''
         self.editor_log = []  # For audit logging
         self.editor_status = ''
@@ -46,11 +70,18 @@ class PlayerDeskScene:
             monitor_height
         )
 
+    def on_enter(self):
+        self.dirty = True
+
+    def needs_redraw(self):
+        return self.dirty
+
     def draw(self):
+        self.dirty = False
         self._update_monitor_rect()
         self.screen.fill(self.bg_color)
         # Draw title in upper left
-        title_surf = self.title_font.render(self.title, True, self.title_color)
+        title_surf = assets.get_label(self.title, self.title_color, 'Arial', 36, bold=True)
         self.screen.blit(title_surf, (24, 16))
         # Draw monitor rectangle
         pygame.draw.rect(self.screen, self.monitor_color, self.monitor_rect, border_radius=16)
@@ -58,39 +89,28 @@ class PlayerDeskScene:
             # Draw editor overlay
             self._draw_editor()
         else:
-            # Draw terminal output and prompt
+            # Draw terminal output and prompt; only the visible scrollback rows are touched
             term_x = self.monitor_rect.x + 18
             term_y = self.monitor_rect.y + 18
             line_height = self.term_font.get_height() + 4
-            max_lines = (self.monitor_rect.height - 36) // line_height - 1
-            output_lines = self.os.get_output()[-max_lines:]
-            for entry in output_lines:
-                if isinstance(entry, dict) and 'ls' in entry:
-                    # Render ls output as columns
-                    names = entry['ls']
-                    if not names:
-                        term_y += line_height
-                        continue
-                    col_width = max(len(name) for name, _ in names) * 14 + 20  # Estimate width per col
-                    cols = max(1, (self.monitor_rect.width - 36) // col_width)
-                    for i in range(0, len(names), cols):
-                        row = names[i:i+cols]
-                        col_x = term_x
-                        for name, typ in row:
-                            if typ == 'dir':
-                                color = self.dir_color
-                            elif typ == 'file':
-                                color = self.file_color
-                            else:
-                                color = self.term_color
-                            name_surf = self.term_font.render(name, True, color)
-                            self.screen.blit(name_surf, (col_x, term_y))
-                            col_x += col_width
-                        term_y += line_height
+            char_width = self.term_font.size('M')[0]
+            self.os.columns = max(1, (self.monitor_rect.width - 36) // char_width)
+            max_lines = self._visible_rows()
+            output = self.os.get_output()
+            self.scroll = min(self.scroll, max(0, len(output) - max_lines))
+            last = len(output) - self.scroll
+            ls_colors = {'dir': self.dir_color, 'file': self.file_color}
+            for row in output.rows(last - max_lines, last):
+                if isinstance(row, dict) and 'ls' in row:
+                    # One row of an ls listing as columns
+                    names = row['ls']
+                    grid_surf = self.text_cache.render_ls_grid(names, ls_colors, self.term_color, row['width'] * char_width,
+                                                               len(names), line_height)
+                    self.screen.blit(grid_surf, (term_x, term_y))
                 else:
-                    line_surf = self.term_font.render(str(entry), True, self.term_color)
+                    line_surf = self.text_cache.render(str(row), self.term_color)
                     self.screen.blit(line_surf, (term_x, term_y))
-                    term_y += line_height
+                term_y += line_height
             # Draw prompt and input buffer
             prompt = self.os.get_prompt() + self.input_buffer
             if self.cursor_visible:
@@ -99,6 +119,14 @@ class PlayerDeskScene:
             self.screen.blit(prompt_surf, (term_x, term_y))
         pygame.display.flip()
 
+    def _visible_rows(self):
+        line_height = self.term_font.get_height() + 4
+        return max(1, (self.monitor_rect.height - 36) // line_height - 1)
+
+    def _editor_rows(self):
+        rect = self.monitor_rect.inflate(-24, -24)
+        return max(1, (rect.height - 64) // (self.term_font.get_height() + 2))
+
     def _draw_editor(self):
         # Draw a simple text editor overlay
         pad = 24
@@ -112,13 +140,18 @@ class PlayerDeskScene:
         status = f'-- {mode_str} -- {self.editor_status}'
         status_surf = self.term_font.render(status, True, (255, 180, 180))
         self.screen.blit(status_surf, (rect.x + 8, rect.y + rect.height - 32))
-        # Draw content (multi-line)
-        lines = self.editor_content.split('\n')
+        # Draw the visible lines around the cursor; unchanged lines come from the text cache
+        buffer = self.editor_buffer
         line_height = self.term_font.get_height() + 2
-        max_lines = (rect.height - 64) // line_height
-        for i, line in enumerate(lines[-max_lines:]):
-            line_surf = self.term_font.render(line, True, (220, 255, 220))
+        max_lines = self._editor_rows()
+        self.editor_top = min(max(self.editor_top, buffer.row - max_lines + 1), buffer.row)
+        for i, line in enumerate(buffer.lines(self.editor_top, self.editor_top + max_lines)):
+            line_surf = self.text_cache.render(line, (220, 255, 220))
             self.screen.blit(line_surf, (rect.x + 8, rect.y + 40 + i * line_height))
+        if self.cursor_visible and not self.editor_in_command_mode:
+            cursor_x = rect.x + 8 + self.term_font.size(buffer.line(buffer.row)[:buffer.col])[0]
+            cursor_y = rect.y + 40 + (buffer.row - self.editor_top) * line_height
+            pygame.draw.rect(self.screen, (220, 255, 220), (cursor_x, cursor_y, 2, line_height))
         # Draw editor prompt
         if self.editor_in_command_mode:
             prompt = ':' + self.editor_command_buffer
@@ -130,30 +163,35 @@ class PlayerDeskScene:
             self.screen.blit(prompt_surf, (rect.x + 8, rect.y + rect.height - 56))
 
     def handle_event(self, event):
+        if event.type in (pygame.KEYDOWN, pygame.USEREVENT):
+            self.dirty = True
         if self.editor_mode:
             self._handle_editor_event(event)
             return
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_RETURN:
                 # Submit command
-                prev_len = len(self.os.output)
+                output_end = self.os.output.end
+                self.scroll = 0
                 result = self.os.run_command(self.input_buffer)
                 # Check for editor mode trigger
                 if isinstance(result, dict) and 'editor' in result:
                     self.editor_mode = True
                     self.editor_path = result['editor']['path']
-                    self.editor_content = result['editor']['content']
-                    self.editor_original_content = self.editor_content
+                    self.editor_buffer = TextBuffer(result['editor']['content'])
+                    self.editor_top = 0
+                    self.editor_original_content = result['editor']['content']
                     self.editor_status = ''
                     self.editor_log.append((pygame.time.get_ticks(), f"Opened editor for {self.editor_path}"))
-                    # Remove the last output if it is the editor dict
-                    if self.os.output and isinstance(self.os.output[-2], str) and self.os.output[-2].startswith(self.os.get_prompt().strip()):
-                        self.os.output = self.os.output[:-2]
-                    elif self.os.output and isinstance(self.os.output[-1], dict) and 'editor' in self.os.output[-1]:
-                        self.os.output = self.os.output[:-1]
+                    # Remove the echoed edit command; the editor replaces the terminal
+                    self.os.output.truncate(output_end)
                 self.input_buffer = ''
             elif event.key == pygame.K_BACKSPACE:
                 self.input_buffer = self.input_buffer[:-1]
+            elif event.key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+                page = self._visible_rows() - 1 or 1
+                self.scroll += page if event.key == pygame.K_PAGEUP else -page
+                self.scroll = min(max(0, self.scroll), max(0, len(self.os.output) - self._visible_rows()))
             elif event.key == pygame.K_TAB:
                 pass  # Optionally implement tab completion
             elif event.key < 256:
@@ -169,28 +207,22 @@ class PlayerDeskScene:
                 if event.key == pygame.K_RETURN:
                     cmd = self.editor_command_buffer.strip()
                     if cmd == 'wq':
-                        self.os.files[self.editor_path] = self.editor_content
+                        self.os.write_file(self.editor_path, self.editor_buffer.text())
                         self.editor_log.append((pygame.time.get_ticks(), f"Saved {self.editor_path}"))
                         self.editor_mode = False
                         self.editor_path = None
-                        self.editor_content = ''
+                        self.editor_buffer = TextBuffer()
                         self.editor_status = ''
                         self.editor_command_buffer = ''
                         self.editor_in_command_mode = False
-                        # Remove the last output if it is the editor dict
-                        if self.os.output and isinstance(self.os.output[-1], dict) and 'editor' in self.os.output[-1]:
-                            self.os.output = self.os.output[:-1]
                     elif cmd == 'q!':
                         self.editor_log.append((pygame.time.get_ticks(), f"Discarded changes to {self.editor_path}"))
                         self.editor_mode = False
                         self.editor_path = None
-                        self.editor_content = ''
+                        self.editor_buffer = TextBuffer()
                         self.editor_status = ''
                         self.editor_command_buffer = ''
                         self.editor_in_command_mode = False
-                        # Remove the last output if it is the editor dict
-                        if self.os.output and isinstance(self.os.output[-1], dict) and 'editor' in self.os.output[-1]:
-                            self.os.output = self.os.output[:-1]
                     else:
                         self.editor_status = f'Unknown command: {cmd}'
                         self.editor_command_buffer = ''
@@ -207,14 +239,12 @@ class PlayerDeskScene:
                 if event.key == pygame.K_ESCAPE:
                     self.editor_in_command_mode = True
                     self.editor_status = ''
-                elif event.key == pygame.K_RETURN:
-                    self.editor_content += '\n'
-                elif event.key == pygame.K_BACKSPACE:
-                    self.editor_content = self.editor_content[:-1]
+                elif event.key in self.EDITOR_KEYS:
+                    self.EDITOR_KEYS[event.key](self)
                 elif event.key < 256:
                     char = event.unicode
                     if char.isprintable():
-                        self.editor_content += char
+                        self.editor_buffer.insert(char)
         elif event.type == pygame.USEREVENT:
             self.cursor_visible = not self.cursor_visible
 
@@ -222,4 +252,5 @@ class PlayerDeskScene:
         self.cursor_timer += dt
         if self.cursor_timer >= self.cursor_interval:
             self.cursor_visible = not self.cursor_visible
-            self.cursor_timer = 0 
\ No newline at end of file
+            self.cursor_timer = 0
+            self.dirty = True 
\ No newline at end of file
@@ -10,6 +10,8 @@ class SceneManager:
         """
         self.screen = screen
         self.scenes = {}
+        self.factories = {}  # Scenes not built yet: key -> callable returning the scene
+        self.prewarm_keys = []  # Factories to build ahead of time when the game is idle
         self.current_scene_key = None
 
     def register_scene(self, key, scene):
@@ -20,13 +22,50 @@ class SceneManager:
         """
         self.scenes[key] = scene
 
+    def register_factory(self, key, factory, prewarm=False):
+        """
+        Register a scene that is only constructed on first use.
+        :param key: String identifier for the scene.
+        :param factory: Callable taking no arguments and returning the scene object.
+        :param prewarm: If True, prewarm() may build the scene before it is first shown.
+        """
+        self.factories[key] = factory
+        if prewarm:
+            self.prewarm_keys.append(key)
+
+    def get_scene(self, key):
+        """
+        Return the scene for key, constructing it from its factory if needed.
+        """
+        if key not in self.scenes and key in self.factories:
+            self.scenes[key] = self.factories.pop(key)()
+            if key in self.prewarm_keys:
+                self.prewarm_keys.remove(key)
+        return self.scenes.get(key)
+
+    def prewarm(self):
+        """
+        Build the next scene marked for pre-warming. Returns True if one was built.
+        """
+        while self.prewarm_keys:
+            key = self.prewarm_keys[0]
+            if key in self.factories:
+                self.get_scene(key)
+                return True
+            self.prewarm_keys.pop(0)
+        return False
+
     def set_scene(self, key):
         """
         Set the active scene by key.
         :param key: String identifier for the scene to activate.
         """
-        if key in self.scenes:
+        if key in self.scenes or key in self.factories:
+            scene = self.get_scene(key)
             self.current_scene_key = key
+            # Let the scene know it owns the screen again (e.g. to force a full redraw)
+            if hasattr(scene, 'on_enter'):
+                scene.on_enter()
         else:
             raise ValueError(f"Scene '{key}' not registered.")
 
@@ -38,9 +77,29 @@ class SceneManager:
             return self.scenes[self.current_scene_key].handle_event(event)
         return None
 
+    def needs_redraw(self):
+        """
+        Whether the current scene has anything new to draw.
+        Scenes without a needs_redraw() method are redrawn every frame.
+        """
+        scene = self.scenes.get(self.current_scene_key)
+        if scene is None:
+            return False
+        if hasattr(scene, 'needs_redraw'):
+            return scene.needs_redraw()
+        return True
+
+    def invalidate(self):
+        """
+        Force the current scene to redraw everything (e.g. after the window was exposed).
+        """
+        scene = self.scenes.get(self.current_scene_key)
+        if scene is not None and hasattr(scene, 'on_enter'):
+            scene.on_enter()
+
     def draw(self):
         """
         Draw the current scene.
         """
         if self.current_scene_key:
-            self.scenes[self.current_scene_key].draw() 
\ No newline at end of file
+            self.scenes[self.current_scene_key].draw()
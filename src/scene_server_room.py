@@ -8,16 +8,28 @@ import logging
 from rack import Rack, RackMountable
 from switch import Switch
 from patch_panel import PatchPanel8, PatchPanel16
+from spatial_index import SpatialGrid
+from network import Network
+from failures import NO_FAILURES
+from spanning_tree import SpanningTree
+from assets import assets
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
 
 class ServerRoomScene:
-    def __init__(self, screen, scene_manager=None):
+    CABLE_MARGIN = 12  # Extra pixels around a cable's bounding box (end squares and line width)
+    LOAD_SHADES = 8  # Cable colors between idle (yellow) and saturated (red)
+    FAILURE_COLOR = (230, 40, 40)
+    DOWN_CABLE_COLOR = (90, 90, 90)
+
+    def __init__(self, screen, scene_manager=None, simulation=None):
         self.screen = screen
         self.scene_manager = scene_manager  # For scene switching
+        self.simulation = simulation  # SimulationThread; results are read from its snapshots in update()
+        self._snapshot_tick = 0
         self.bg_color = (30, 32, 38)
         self.title_color = (220, 220, 220)
-        self.title_font = pygame.font.SysFont('Arial', 36, bold=True)
+        self.title_font = assets.get_font('Arial', 36, bold=True)
         width, height = self.screen.get_size()
         # Place two racks side by side with new width and 12U
         rack_width = 240
@@ -30,72 +42,337 @@ class ServerRoomScene:
             Rack(x1, y, rack_width, rack_height, 12),
             Rack(x2, y, rack_width, rack_height, 12)
         ]
+        self.network = Network()  # Source of truth for all cables in the room
+        self.spanning_tree = SpanningTree(self.network)  # Blocks redundant switch links as cables change
         self.title = 'Server Room'
+        self.title_surf = assets.get_label(self.title, self.title_color, 'Arial', 36, bold=True)
+        # Pre-render menu labels so opening a menu never rasterizes text
+        for cls in RackMountable.registry:
+            assets.get_label(cls.get_display_name(), (220, 220, 220), 'Arial', 24)
+        assets.get_label("Remove Cable", (255, 255, 255), 'Arial', 24)
         self.selected_port = None  # (device, port_index)
         self.hovered_port = None   # (device, port_index)
         self.menu_open = False
         self.menu_pos = (0, 0)
+        self.menu_rect = None
         self.menu_rack = None
         self.menu_unit = None
         self.cable_menu_open = False
         self.cable_menu_pos = (0, 0)
+        self.cable_menu_rect = None
         self.cable_menu_cable = None  # (device1, port1, device2, port2)
         self.cable_hover = None  # (device1, port1, device2, port2)
-        logging.info("ServerRoomScene initialized with 2 racks.")
+        self.cable_loads = {}  # cable -> load shade 1..LOAD_SHADES; idle cables are absent
+        self.failures = NO_FAILURES  # FailureState of the devices, ports and cables out of service
+        # Dirty-rectangle rendering: only changed areas are redrawn and pushed to the display
+        self.dirty_rendering = True
+        self.full_redraw = True
+        self.dirty_rects = []
+        self.pixels_redrawn = 0  # Pixels redrawn in the last frame
+        self.show_redraw_stats = False  # Toggle with F3
+        self.stats_font = assets.get_font('Consolas', 18)
+        self._stats_text = None
+        self._stats_rect = None
+        # Spatial indexes for hit-testing, kept in sync as devices and cables change
+        self.port_index = SpatialGrid()   # (device, port_index) -> port rect
+        self.cable_index = SpatialGrid()  # cable -> bounding rect incl. hover threshold
+        self.rack_index = SpatialGrid()   # rack -> rack rect
+        self._motion_racks = []  # Racks that received the last mouse motion
+        self._rebuild_spatial_index()
+        # All cables pre-rendered into one transparent layer; only touched areas are re-rendered
+        self.cable_layer = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)
+        self._cable_layer_dirty = [self.cable_layer.get_rect()]
+        self._network_changed()
+        logger.info("ServerRoomScene initialized with 2 racks.")
 
-    def draw(self):
-        self.screen.fill(self.bg_color)
-        # Draw title
-        title_surf = self.title_font.render(self.title, True, self.title_color)
-        self.screen.blit(title_surf, (24, 16))
-        # Draw racks and collect all rack-mountable devices with ports
+    def set_racks(self, racks, network=None):
+        # Replace the room's racks (e.g. a generated layout) and rebuild all derived state.
+        # Without a network the racks start uncabled.
+        self.racks = list(racks)
+        self.spanning_tree.close()
+        self.network = network if network is not None else Network()
+        self.spanning_tree = SpanningTree(self.network)
+        self.selected_port = None
+        self.hovered_port = None
+        self.cable_hover = None
+        self.cable_loads = {}
+        self.failures = NO_FAILURES
+        self.menu_open = False
+        self.cable_menu_open = False
+        self._motion_racks = []
+        self._rebuild_spatial_index()
+        self._cable_layer_dirty = [self.cable_layer.get_rect()]
+        self.full_redraw = True
+        self._network_changed()
+
+    def on_enter(self):
+        # Another scene owned the screen, so nothing on it can be reused
+        self.full_redraw = True
+
+    def needs_redraw(self):
+        if self.full_redraw or self.dirty_rects or self._cable_layer_dirty:
+            return True
+        # One more frame so the redraw counter can drop back to zero
+        if self.show_redraw_stats and self.pixels_redrawn:
+            return True
+        return any(rack.has_dirty_rects() for rack in self.racks)
+
+    def mark_dirty(self, rect):
+        if rect is not None:
+            self.dirty_rects.append(pygame.Rect(rect))
+
+    def _get_devices(self):
         devices = []
-        cables = []
         for rack in self.racks:
-            rack.draw(self.screen)
             for device in rack.slots:
-                if isinstance(device, RackMountable) and hasattr(device, 'get_connections') and hasattr(device, 'get_port_center'):
+                if isinstance(device, RackMountable) and hasattr(device, 'get_port_center'):
                     devices.append(device)
-        # Draw cables (connections between ports)
-        for device in devices:
-            for port_index, conn in enumerate(device.get_connections()):
-                if conn:
-                    other_device, other_port_index = conn
-                    # Only draw if this is the 'lower' device to avoid double-drawing
-                    if id(device) < id(other_device):
-                        start = device.get_port_center(port_index)
-                        end = other_device.get_port_center(other_port_index)
-                        cable = (device, port_index, other_device, other_port_index)
-                        highlight = (self.cable_hover == cable or self.cable_hover == (other_device, other_port_index, device, port_index))
-                        self._draw_cable(start, end, highlight=highlight)
-                        cables.append(cable)
+        return devices
+
+    def _get_cables(self):
+        # Each cable once as (device1, port1, device2, port2)
+        return list(self.network.cables())
+
+    def _rebuild_spatial_index(self):
+        self.port_index.clear()
+        self.cable_index.clear()
+        self.rack_index.clear()
+        for rack in self.racks:
+            self.rack_index.insert(rack, rack.rect)
+            for device in rack.slots:
+                if isinstance(device, RackMountable) and hasattr(device, 'ports'):
+                    self._index_device(device)
+        for cable in self._get_cables():
+            self.cable_index.insert(cable, self._cable_rect(cable))
+
+    def _index_device(self, device):
+        for i, port_rect in enumerate(device.ports):
+            self.port_index.insert((device, i), port_rect)
+
+    def _network_changed(self):
+        # The simulation works on its own copy of the topology, refreshed after every edit
+        if self.simulation is not None:
+            self.simulation.update_network(self.network)
+
+    def _cable_changed(self, cable):
+        # A cable was added, removed or changed highlight: update the layer and the screen under it
+        rect = self._cable_rect(cable)
+        self._cable_layer_dirty.append(rect)
+        self.mark_dirty(rect)
+
+    def set_cable_loads(self, loads):
+        """
+        Show link utilization, e.g. FlowModel.cable_loads(), as cable color.
+        Only cables whose shade changed are re-rendered.
+        :param loads: Dict of cable key -> utilization (0.0 idle, 1.0 saturated).
+        """
+        shades = {}
+        for cable, utilization in loads.items():
+            shade = round(min(max(utilization, 0.0), 1.0) * self.LOAD_SHADES)
+            if shade and cable in self.cable_index:
+                shades[cable] = shade
+        for cable in shades.keys() | self.cable_loads.keys():
+            if shades.get(cable) != self.cable_loads.get(cable):
+                self._cable_changed(cable)
+        self.cable_loads = shades
+
+    def set_failures(self, failures):
+        """
+        Take what is out of service, e.g. FailureEngine.snapshot(), out of the
+        room's network too, so peers, reachability and the spanning tree see it.
+        Failed devices and ports get a red marker and the cables they take down
+        turn grey. Only what changed is redrawn.
+        """
+        previous = self.failures
+        self.failures = failures
+        self._apply_link_state(previous, failures)
+        for device in previous.devices ^ failures.devices:
+            self.mark_dirty(device.rect)
+            for port_index in range(device.NUM_PORTS):
+                self._port_cable_changed(device, port_index)
+        for device, port_index in previous.ports ^ failures.ports:
+            self.mark_dirty(device.ports[port_index])
+            self._port_cable_changed(device, port_index)
+        for cable in previous.cables ^ failures.cables:
+            if cable in self.cable_index:
+                self._cable_changed(cable)
+
+    @staticmethod
+    def _down_ports(failures):
+        ports = set(failures.ports)
+        for device in failures.devices:
+            ports.update((device, port_index) for port_index in range(device.NUM_PORTS))
+        for cable in failures.cables:
+            ports.add(cable[:2])
+            ports.add(cable[2:])
+        return ports
+
+    def _apply_link_state(self, previous, failures):
+        # Only ports whose state changed are touched; a stale snapshot may still name devices no longer in the room
+        was_down = self._down_ports(previous)
+        down = self._down_ports(failures)
+        if was_down == down:
+            return
+        mounted = set(self._get_devices())
+        for device, port_index in was_down - down:
+            if device in mounted:
+                self.network.set_link_up(device, port_index, True)
+        for device, port_index in down - was_down:
+            if device in mounted:
+                self.network.set_link_up(device, port_index, False)
+
+    def _port_cable_changed(self, device, port_index):
+        peer = self.network.get_peer(device, port_index)
+        if peer is not None:
+            cable = self.network.cable_key(device, port_index, *peer)
+            if cable in self.cable_index:
+                self._cable_changed(cable)
+
+    def _cable_down(self, cable):
+        failures = self.failures
+        return (cable in failures.cables or cable[0] in failures.devices or cable[2] in failures.devices
+                or cable[:2] in failures.ports or cable[2:] in failures.ports)
+
+    def _update_cable_layer(self):
+        # Re-render every cable overlapping an invalidated area. Cables are drawn unclipped, since a
+        # clipped thick line rasterizes differently; pixels outside the area get identical values.
+        for rect in self._merge_rects(self._cable_layer_dirty, self.cable_layer.get_rect()):
+            self.cable_layer.fill((0, 0, 0, 0), rect)
+            cables = self.cable_index.query_rect(rect)
+            for cable in cables:
+                if cable != self.cable_hover:
+                    self._draw_layer_cable(cable)
+            # The highlighted cable always stays on top of any cable redrawn across it
+            hover_rect = self.cable_index.get_rect(self.cable_hover) if self.cable_hover else None
+            if hover_rect and hover_rect.collidelist([self.cable_index.get_rect(cable) for cable in cables]) != -1:
+                self._draw_layer_cable(self.cable_hover)
+        self._cable_layer_dirty = []
+
+    def _draw_layer_cable(self, cable):
+        device, port_index, other_device, other_port_index = cable
+        start = device.get_port_center(port_index)
+        end = other_device.get_port_center(other_port_index)
+        self._draw_cable(start, end, highlight=(cable == self.cable_hover), surface=self.cable_layer,
+                         shade=self.cable_loads.get(cable, 0), down=self._cable_down(cable))
+
+    def _cable_rect(self, cable):
+        device, port_index, other_device, other_port_index = cable
+        x1, y1 = device.get_port_center(port_index)
+        x2, y2 = other_device.get_port_center(other_port_index)
+        rect = pygame.Rect(min(x1, x2), min(y1, y2), abs(x2 - x1) + 1, abs(y2 - y1) + 1)
+        return rect.inflate(self.CABLE_MARGIN * 2, self.CABLE_MARGIN * 2)
+
+    def _merge_rects(self, rects, bounds):
+        # Clip to the screen and merge overlapping rects so no pixel is drawn twice
+        merged = []
+        for rect in rects:
+            rect = rect.clip(bounds)
+            if rect.width == 0 or rect.height == 0:
+                continue
+            idx = rect.collidelist(merged)
+            while idx != -1:
+                rect.union_ip(merged.pop(idx))
+                idx = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
+
+    def draw(self):
+        screen_rect = self.screen.get_rect()
+        full = self.full_redraw or not self.dirty_rendering
+        for rack in self.racks:
+            self.dirty_rects.extend(rack.pop_dirty_rects())
+        if full:
+            regions = [screen_rect]
+        else:
+            regions = self._merge_rects(self.dirty_rects, screen_rect)
+        self.dirty_rects = []
+        if self._cable_layer_dirty:
+            self._update_cable_layer()
+        for region in regions:
+            self._draw_region(region)
+        self.pixels_redrawn = sum(region.width * region.height for region in regions)
+        stats_rect = self._draw_redraw_stats(full or (self._stats_rect is not None and self._stats_rect.collidelist(regions) != -1))
+        if full:
+            pygame.display.flip()
+        else:
+            if stats_rect:
+                regions.append(stats_rect)
+            if regions:
+                pygame.display.update(regions)
+        self.full_redraw = False
+
+    def _draw_region(self, region):
+        # Redraw everything that overlaps region, in the same order as a full frame
+        self.screen.set_clip(region)
+        self.screen.fill(self.bg_color, region)
+        self.screen.blit(self.title_surf, (24, 16))
+        for rack in self.racks:
+            if rack.rect.colliderect(region):
+                rack.draw(self.screen)
+        # Draw cables (connections between ports) from the pre-rendered layer
+        self.screen.blit(self.cable_layer, region, region)
         # Draw port highlight for hovered/selected
         if self.hovered_port:
             device, port_index = self.hovered_port
-            device.draw(self.screen, highlight_port=port_index)
+            if device.rect.colliderect(region):
+                device.draw(self.screen, highlight_port=port_index)
         if self.selected_port:
             device, port_index = self.selected_port
-            device.draw(self.screen, highlight_port=port_index)
+            if device.rect.colliderect(region):
+                device.draw(self.screen, highlight_port=port_index)
+        self._draw_failures(region)
         # Draw context menu if open
-        if self.menu_open:
+        if self.menu_open and self.menu_rect.colliderect(region):
             self._draw_menu()
-        if self.cable_menu_open:
+        if self.cable_menu_open and self.cable_menu_rect.colliderect(region):
             self._draw_cable_menu()
-        pygame.display.flip()
+        self.screen.set_clip(None)
 
-    def _draw_cable(self, start, end, highlight=False):
-        # Draw yellow cable with squares at each end, highlight if needed
-        color = (255, 255, 0) if not highlight else (255, 220, 40)
+    def _draw_failures(self, region):
+        # Red frame around failed devices and red fill on failed ports, on top of cable ends
+        for device in self.failures.devices:
+            if device.rect.colliderect(region):
+                pygame.draw.rect(self.screen, self.FAILURE_COLOR, device.rect, width=3, border_radius=6)
+        for device, port_index in self.failures.ports:
+            port_rect = device.ports[port_index]
+            if port_rect.colliderect(region):
+                pygame.draw.rect(self.screen, self.FAILURE_COLOR, port_rect)
+
+    def _draw_redraw_stats(self, force=False):
+        # Pixel counter overlay; repainted only when its text changes and not counted in pixels_redrawn
+        if not self.show_redraw_stats:
+            return None
+        text = f"Redrawn: {self.pixels_redrawn} px"
+        if text == self._stats_text and not force:
+            return None
+        self._stats_text = text
+        surf = self.stats_font.render(text, True, self.title_color)
+        rect = surf.get_rect(bottomleft=(24, self.screen.get_height() - 16))
+        dirty = rect.union(self._stats_rect) if self._stats_rect else rect
+        self.screen.fill(self.bg_color, dirty)
+        self.screen.blit(surf, rect)
+        self._stats_rect = rect
+        return dirty
+
+    def _draw_cable(self, start, end, highlight=False, surface=None, shade=0, down=False):
+        # Draw yellow cable with squares at each end, highlight if needed; loaded cables shift towards red
+        if surface is None:
+            surface = self.screen
+        if highlight:
+            color = (255, 220, 40)
+        elif down:
+            color = self.DOWN_CABLE_COLOR
+        else:
+            color = (255, 255 - 255 * shade // self.LOAD_SHADES, 0)
         square_size = 16
         width = 6 if highlight else 4
-        pygame.draw.line(self.screen, color, start, end, width)
+        pygame.draw.line(surface, color, start, end, width)
         for pt in [start, end]:
             rect = pygame.Rect(pt[0] - square_size//2, pt[1] - square_size//2, square_size, square_size)
-            pygame.draw.rect(self.screen, color, rect)
+            pygame.draw.rect(surface, color, rect)
 
     def _draw_menu(self):
         # Draws a context menu at self.menu_pos with all RackMountable subclasses
-        font = pygame.font.SysFont('Arial', 24)
         items = RackMountable.registry
         menu_width = 220
         menu_item_height = 36
@@ -106,14 +383,13 @@ class ServerRoomScene:
         for idx, cls in enumerate(items):
             item_rect = pygame.Rect(x, y + idx * menu_item_height, menu_width, menu_item_height)
             pygame.draw.rect(self.screen, (60, 64, 72), item_rect, border_radius=4)
-            label = font.render(cls.get_display_name(), True, (220, 220, 220))
+            label = assets.get_label(cls.get_display_name(), (220, 220, 220), 'Arial', 24)
             self.screen.blit(label, (x + 12, y + idx * menu_item_height + 6))
         self.menu_rect = menu_rect
         self.menu_item_height = menu_item_height
         self.menu_items = items
 
     def _draw_cable_menu(self):
-        font = pygame.font.SysFont('Arial', 24)
         menu_width = 180
         menu_item_height = 36
         x, y = self.cable_menu_pos
@@ -121,54 +397,89 @@ class ServerRoomScene:
         pygame.draw.rect(self.screen, (40, 44, 52), menu_rect, border_radius=8)
         item_rect = pygame.Rect(x, y, menu_width, menu_item_height)
         pygame.draw.rect(self.screen, (200, 60, 60), item_rect, border_radius=4)
-        label = font.render("Remove Cable", True, (255, 255, 255))
+        label = assets.get_label("Remove Cable", (255, 255, 255), 'Arial', 24)
         self.screen.blit(label, (x + 16, y + 6))
         self.cable_menu_rect = menu_rect
 
+    def _overlay_state(self):
+        return (
+            self.hovered_port,
+            self.selected_port,
+            self.cable_hover,
+            self.menu_rect if self.menu_open else None,
+            self.cable_menu_rect if self.cable_menu_open else None,
+        )
+
+    def _mark_overlay_changes(self, before):
+        # Mark the areas of any hover/selection/menu state that changed while handling an event
+        after = self._overlay_state()
+        for kind, old, new in zip(('port', 'port', 'cable', 'rect', 'rect'), before, after):
+            if old == new:
+                continue
+            for value in (old, new):
+                if value is None:
+                    continue
+                if kind == 'port':
+                    self.mark_dirty(value[0].rect)
+                elif kind == 'cable':
+                    self._cable_changed(value)
+                else:
+                    self.mark_dirty(value)
+
     def handle_event(self, event):
+        before = self._overlay_state()
+        result = self._handle_event(event)
+        self._mark_overlay_changes(before)
+        return result
+
+    def _handle_event(self, event):
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_d:
                 if self.scene_manager:
-                    logging.info("Switching to desk scene.")
+                    logger.info("Switching to desk scene.")
                     self.scene_manager.set_scene('desk')
             elif event.key == pygame.K_s:
                 # Already in server room, do nothing
                 pass
+            elif event.key == pygame.K_F3:
+                self.show_redraw_stats = not self.show_redraw_stats
+                self._stats_text = None
+                if not self.show_redraw_stats:
+                    self.mark_dirty(self._stats_rect)
+                    self._stats_rect = None
         elif event.type == pygame.MOUSEMOTION:
             self.hovered_port = None
             self.cable_hover = None
-            # Check for cable hover
-            devices = []
-            for rack in self.racks:
-                for device in rack.slots:
-                    if isinstance(device, RackMountable) and hasattr(device, 'get_connections') and hasattr(device, 'get_port_center'):
-                        devices.append(device)
-            for device in devices:
-                for port_index, conn in enumerate(device.get_connections()):
-                    if conn:
-                        other_device, other_port_index = conn
-                        if id(device) < id(other_device):
-                            start = device.get_port_center(port_index)
-                            end = other_device.get_port_center(other_port_index)
-                            # Check if mouse is near the cable (line segment)
-                            if self._point_near_line(event.pos, start, end, 12):
-                                self.cable_hover = (device, port_index, other_device, other_port_index)
-            for rack in self.racks:
-                for device in rack.slots:
-                    if isinstance(device, RackMountable) and hasattr(device, 'ports'):
-                        for i, port_rect in enumerate(device.ports):
-                            if port_rect.collidepoint(event.pos):
-                                self.hovered_port = (device, i)
-            for rack in self.racks:
+            # Check for cable hover, only against cables whose bounds contain the pointer
+            for cable in self.cable_index.query_point(event.pos):
+                device, port_index, other_device, other_port_index = cable
+                start = device.get_port_center(port_index)
+                end = other_device.get_port_center(other_port_index)
+                # Check if mouse is near the cable (line segment)
+                if self._point_near_line(event.pos, start, end, 12):
+                    self.cable_hover = cable
+            ports = self.port_index.query_point(event.pos)
+            if ports:
+                self.hovered_port = ports[-1]
+            # Racks under the pointer, plus the ones that may still show a hover highlight
+            racks = self.rack_index.query_point(event.pos)
+            for rack in self._motion_racks:
+                if rack not in racks:
+                    rack.handle_mouse_motion(event.pos)
+            for rack in racks:
                 rack.handle_mouse_motion(event.pos)
+            self._motion_racks = racks
         elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             if self.cable_menu_open:
                 if self.cable_menu_rect.collidepoint(event.pos):
                     # Remove cable
                     d1, p1, d2, p2 = self.cable_menu_cable
-                    d1.clear_connection(p1)
-                    d2.clear_connection(p2)
-                    logging.info(f"Cable removed between port {p1+1} and port {p2+1}.")
+                    self._cable_changed(self.cable_menu_cable)
+                    self.cable_index.remove(self.cable_menu_cable)
+                    self.cable_loads.pop(self.cable_menu_cable, None)
+                    self.network.disconnect(d1, p1)
+                    self._network_changed()
+                    logger.info("Cable removed between port %s and port %s.", p1+1, p2+1)
                     self.cable_menu_open = False
                     self.cable_menu_cable = None
                     return
@@ -180,6 +491,7 @@ class ServerRoomScene:
             if self.cable_hover:
                 self.cable_menu_open = True
                 self.cable_menu_pos = event.pos
+                self.cable_menu_rect = pygame.Rect(event.pos[0], event.pos[1], 180, 36)
                 self.cable_menu_cable = self.cable_hover
                 # Do not open device menu if cable is hovered
                 return
@@ -194,8 +506,9 @@ class ServerRoomScene:
                             rack = self.menu_rack
                             unit = self.menu_unit
                             if rack.can_place_device(cls, unit):
-                                rack.add_device(cls, unit)
-                                logging.info(f"Added {cls.get_display_name()} to rack at unit {unit+1}.")
+                                if rack.add_device(cls, unit):
+                                    self._index_device(rack.slots[unit])
+                                logger.info("Added %s to rack at unit %s.", cls.get_display_name(), unit+1)
                         self.menu_open = False
                         self.menu_rack = None
                         self.menu_unit = None
@@ -208,45 +521,56 @@ class ServerRoomScene:
             # Only open device menu if no cable is hovered
             if not self.cable_hover:
                 # Check for empty rack unit click to open menu (only if enough space for at least one device)
-                for rack in self.racks:
-                    if rack.rect.collidepoint(event.pos):
-                        rel_y = event.pos[1] - rack.y
-                        unit = rel_y // rack.unit_height
-                        if 0 <= unit < rack.units and rack.slots[unit] is None:
-                            # Only open menu if at least one device can fit
-                            for cls in RackMountable.registry:
-                                if rack.can_place_device(cls, unit):
-                                    self.menu_open = True
-                                    self.menu_pos = event.pos
-                                    self.menu_rack = rack
-                                    self.menu_unit = unit
-                                    return
-            # Check if a port was clicked
-            for rack in self.racks:
-                for device in rack.slots:
-                    if isinstance(device, RackMountable) and hasattr(device, 'ports'):
-                        for i, port_rect in enumerate(device.ports):
-                            if port_rect.collidepoint(event.pos):
-                                if self.selected_port is None:
-                                    self.selected_port = (device, i)
-                                    logging.info(f"Selected port {i+1} on device at rack unit {device.unit_index+1}.")
-                                else:
-                                    # Connect selected port to this port (if not same port)
-                                    sel_device, sel_index = self.selected_port
-                                    # Only connect if both ports are not already connected
-                                    if (sel_device, sel_index) != (device, i):
-                                        if sel_device.get_connections()[sel_index] is None and device.get_connections()[i] is None:
-                                            sel_device.set_connection(sel_index, device, i)
-                                            device.set_connection(i, sel_device, sel_index)
-                                            logging.info(f"Connected port {sel_index+1} on one device to port {i+1} on another device.")
-                                        else:
-                                            logging.warning(f"Cannot connect: one or both ports already connected.")
-                                    self.selected_port = None
+                for rack in self.rack_index.query_point(event.pos):
+                    rel_y = event.pos[1] - rack.y
+                    unit = rel_y // rack.unit_height
+                    if 0 <= unit < rack.units and rack.slots[unit] is None:
+                        # Only open menu if at least one device can fit
+                        for cls in RackMountable.registry:
+                            if rack.can_place_device(cls, unit):
+                                self.menu_open = True
+                                self.menu_pos = event.pos
+                                self.menu_rect = pygame.Rect(event.pos[0], event.pos[1], 220, len(RackMountable.registry) * 36)
+                                self.menu_rack = rack
+                                self.menu_unit = unit
                                 return
+            # Check if a port was clicked
+            ports = self.port_index.query_point(event.pos)
+            if ports:
+                device, i = ports[-1]
+                if self.selected_port is None:
+                    self.selected_port = (device, i)
+                    logger.info("Selected port %s on device at rack unit %s.", i+1, device.unit_index+1)
+                else:
+                    # Connect selected port to this port (if not same port)
+                    sel_device, sel_index = self.selected_port
+                    # Only connect if both ports are not already connected
+                    if (sel_device, sel_index) != (device, i):
+                        if self.network.is_port_free(sel_device, sel_index) and self.network.is_port_free(device, i):
+                            cable = self.network.connect(sel_device, sel_index, device, i)
+                            self.cable_index.insert(cable, self._cable_rect(cable))
+                            self._cable_changed(cable)
+                            self._network_changed()
+                            logger.info("Connected port %s on one device to port %s on another device.", sel_index+1, i+1)
+                        else:
+                            logger.warning("Cannot connect: one or both ports already connected.")
+                    self.selected_port = None
+                return
         return None
 
     def update(self, dt):
-        pass  # For future use 
+        if self.simulation is None:
+            return
+        snapshot = self.simulation.latest()
+        if snapshot.tick == self._snapshot_tick:
+            return
+        self._snapshot_tick = snapshot.tick
+        loads = snapshot.data.get('traffic')  # Published by a FlowModel registered as 'traffic'
+        if loads is not None:
+            self.set_cable_loads(loads)
+        failures = snapshot.data.get('failures')  # Published by a FailureEngine registered as 'failures'
+        if failures is not None and failures is not self.failures:
+            self.set_failures(failures)
 
     def _point_near_line(self, point, start, end, threshold):
         # Utility: check if point is within threshold pixels of the line segment start-end
@@ -1,4 +1,5 @@
 import pygame
+from assets import assets
 
 class TitleScreenScene:
     def __init__(self, screen):
@@ -9,19 +10,28 @@ class TitleScreenScene:
         self.button_color = (40, 44, 52)
         self.button_hover_color = (60, 64, 72)
         self.button_text_color = (220, 220, 220)
-        self.title_font = pygame.font.SysFont('Arial', 64, bold=True)
-        self.button_font = pygame.font.SysFont('Arial', 36)
+        self.title_font = assets.get_font('Arial', 64, bold=True)
+        self.button_font = assets.get_font('Arial', 36)
         self.title = 'Network Simulator'
         self.buttons = [
             {'label': 'Start Game', 'rect': pygame.Rect(self.WIDTH//2-120, self.HEIGHT//2, 240, 60)},
             {'label': 'Quit', 'rect': pygame.Rect(self.WIDTH//2-120, self.HEIGHT//2+80, 240, 60)}
         ]
         self.selected = None
+        self.hovered = None  # Index of the button under the mouse
+        self.dirty = True
+
+    def on_enter(self):
+        self.dirty = True
+
+    def needs_redraw(self):
+        return self.dirty
 
     def draw(self):
+        self.dirty = False
         self.screen.fill(self.bg_color)
         # Draw title
-        title_surf = self.title_font.render(self.title, True, self.title_color)
+        title_surf = assets.get_label(self.title, self.title_color, 'Arial', 64, bold=True)
         title_rect = title_surf.get_rect(center=(self.WIDTH//2, self.HEIGHT//2-120))
         self.screen.blit(title_surf, title_rect)
         # Draw buttons
@@ -32,12 +42,21 @@ class TitleScreenScene:
             color = self.button_hover_color if is_hovered else self.button_color
             pygame.draw.rect(self.screen, color, rect, border_radius=12)
             # Draw button text
-            text_surf = self.button_font.render(button['label'], True, self.button_text_color)
+            text_surf = assets.get_label(button['label'], self.button_text_color, 'Arial', 36)
             text_rect = text_surf.get_rect(center=rect.center)
             self.screen.blit(text_surf, text_rect)
         pygame.display.flip()
 
     def handle_event(self, event):
+        if event.type == pygame.MOUSEMOTION:
+            # Only a change of the hovered button changes the picture
+            hovered = None
+            for idx, button in enumerate(self.buttons):
+                if button['rect'].collidepoint(event.pos):
+                    hovered = idx
+            if hovered != self.hovered:
+                self.hovered = hovered
+                self.dirty = True
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             for idx, button in enumerate(self.buttons):
                 if button['rect'].collidepoint(event.pos):
@@ -0,0 +1,111 @@
+"""
+Module for the terminal scrollback buffer.
+A bounded ring of screen rows, so a terminal left running for days keeps a
+flat memory footprint, with O(1) access to any row for virtualized drawing.
+"""
+
+import sys
+
+def row_size(row):
+    """Approximate memory held by a row: its strings, or the names of an ls row."""
+    if isinstance(row, dict):
+        return sum(sys.getsizeof(name) for name, _ in row['ls'])
+    return sys.getsizeof(row)
+
+class Scrollback:
+    """
+    Ring buffer of terminal rows, oldest first.
+    A row is a string that fits the terminal width, or an ls row
+    {'ls': [(name, type), ...], 'width': column width in characters}.
+    Once more than max_rows rows or max_bytes of row memory are held, the
+    oldest rows are dropped. Rows are numbered from the first row ever
+    appended (see start and end), so a position stays valid while older rows
+    are evicted.
+    """
+
+    def __init__(self, max_rows=2000, max_bytes=1024 * 1024):
+        if max_rows < 1:
+            raise ValueError("Scrollback needs room for at least one row.")
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self._rows = []   # Grows to max_rows slots, then wraps around
+        self._sizes = []
+        self._head = 0   # Slot of the oldest row
+        self._count = 0
+        self.start = 0   # Number of the oldest row held
+        self.evicted = 0
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        """Row by index into the rows held; negative indexes count from the newest."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("scrollback index out of range")
+        return self._rows[(self._head + index) % len(self._rows)]
+
+    def __iter__(self):
+        return self.rows(0, self._count)
+
+    @property
+    def end(self):
+        """Number the next appended row will get."""
+        return self.start + self._count
+
+    def rows(self, first, last):
+        """Yield the rows with indexes first..last-1 (clamped), touching nothing else."""
+        for index in range(max(0, first), min(last, self._count)):
+            yield self._rows[(self._head + index) % len(self._rows)]
+
+    def append(self, row):
+        if self._count == self.max_rows:
+            self._drop_oldest()
+        size = row_size(row)
+        if self._count == len(self._rows):
+            # Every slot is used but there may be more: put the rows in order and add a slot
+            if self._head:
+                self._rows = self._rows[self._head:] + self._rows[:self._head]
+                self._sizes = self._sizes[self._head:] + self._sizes[:self._head]
+                self._head = 0
+            self._rows.append(row)
+            self._sizes.append(size)
+        else:
+            slot = (self._head + self._count) % len(self._rows)
+            self._rows[slot] = row
+            self._sizes[slot] = size
+        self._count += 1
+        self.bytes_used += size
+        # Keep at least the newest row, however large
+        while self.bytes_used > self.max_bytes and self._count > 1:
+            self._drop_oldest()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def _drop_oldest(self):
+        self.bytes_used -= self._sizes[self._head]
+        self._rows[self._head] = None
+        self._head = (self._head + 1) % len(self._rows)
+        self._count -= 1
+        self.start += 1
+        self.evicted += 1
+
+    def truncate(self, end):
+        """Remove the rows numbered end and later, e.g. the output of the last command."""
+        while self._count and self.end > end:
+            slot = (self._head + self._count - 1) % len(self._rows)
+            self.bytes_used -= self._sizes[slot]
+            self._rows[slot] = None
+            self._count -= 1
+
+    def clear(self):
+        self._rows = []
+        self._sizes = []
+        self.start = self.end
+        self._head = 0
+        self._count = 0
+        self.bytes_used = 0
@@ -0,0 +1,199 @@
+"""
+Module for the SoggyOS command registry and built-in commands.
+A command is a function command(os, args, stdin), usually a generator, that
+yields its output lazily: lines of text, (name, type) entries for ls
+listings, or an {'editor': ...} request; commands without output may just
+return. stdin is an iterator over the previous pipeline stage's lines, so a
+pipeline only runs as far as its last stage reads.
+Commands report errors by raising ValueError; the shell prints them.
+"""
+
+import itertools
+from collections import deque
+
+from vfs import normalize
+
+COMMANDS = {}  # Command name -> command function
+
+def command(name):
+    """Register a command function under name, replacing any built-in of that name."""
+    def register(func):
+        COMMANDS[name] = func
+        return func
+    return register
+
+def iter_lines(text):
+    """Yield the lines of text one at a time, without splitting the whole text up front."""
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end < 0:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+def parse_flags(args, allowed):
+    """Split leading -x style flags off the operands, e.g. ['-r', 'a'] -> ({'r'}, ['a'])."""
+    flags = set()
+    operands = []
+    for arg in args:
+        if arg.startswith('-') and len(arg) > 1 and not operands:
+            flags.update(arg[1:])
+        else:
+            operands.append(arg)
+    unknown = flags - set(allowed)
+    if unknown:
+        raise ValueError(f"invalid option -- '{min(unknown)}'")
+    return flags, operands
+
+def _count_option(args, default=10):
+    # head/tail line count from -n N or -N; returns (count, remaining args)
+    if args and args[0] == '-n':
+        if len(args) < 2:
+            raise ValueError("option requires an argument -- 'n'")
+        value, args = args[1], args[2:]
+    elif args and args[0].startswith('-') and args[0][1:].isdigit():
+        value, args = args[0][1:], args[1:]
+    else:
+        return default, args
+    if not value.isdigit():
+        raise ValueError(f"invalid number of lines: {value}")
+    return int(value), args
+
+def _input(os, paths, stdin):
+    # Lines of the named files, one after another, or of stdin if none are named
+    if not paths:
+        yield from stdin
+        return
+    for path in paths:
+        yield from iter_lines(os.fs.read(path, os.current_dir))
+
+# --- Built-ins ---
+
+@command('help')
+def help_command(os, args, stdin):
+    yield f"Available commands: {', '.join(sorted(COMMANDS))}"
+    yield "Pipe with |, redirect with > or >>."
+
+@command('echo')
+def echo(os, args, stdin):
+    yield ' '.join(args)
+
+@command('clear')
+def clear(os, args, stdin):
+    os.output.clear()
+
+@command('cd')
+def cd(os, args, stdin):
+    target = normalize(args[0], os.current_dir) if args else os.home
+    if not os.fs.is_dir(target):
+        raise ValueError(f"no such file or directory: {args[0]}")
+    os.current_dir = target
+
+@command('ls')
+def ls(os, args, stdin):
+    """List a directory, the current one by default, as (name, type) entries; type is 'dir' or 'file'."""
+    yield from os.fs.listdir(args[0] if args else '.', os.current_dir)
+
+@command('touch')
+def touch(os, args, stdin):
+    if not args:
+        raise ValueError("missing file operand")
+    created = []
+    for filename in args:
+        if os.fs.is_dir(filename, os.current_dir):
+            raise ValueError(f"invalid file name: {filename}")
+        if not os.fs.exists(filename, os.current_dir):
+            os.write_file(filename, '')
+            created.append(filename)
+    if created:
+        yield f"Created file(s): {' '.join(created)}"
+
+@command('mkdir')
+def mkdir(os, args, stdin):
+    flags, paths = parse_flags(args, 'p')
+    if not paths:
+        raise ValueError("missing operand")
+    for path in paths:
+        os.make_directory(path, parents='p' in flags)
+
+@command('rm')
+def rm(os, args, stdin):
+    flags, paths = parse_flags(args, 'rRf')
+    if not paths:
+        raise ValueError("missing operand")
+    for path in paths:
+        if 'f' in flags and not os.fs.exists(path, os.current_dir):
+            continue
+        os.remove(path, recursive=bool(flags & {'r', 'R'}))
+
+@command('mv')
+def mv(os, args, stdin):
+    if len(args) < 2:
+        raise ValueError("missing file operand")
+    for src in args[:-1]:
+        os.move(src, args[-1])
+
+@command('cp')
+def cp(os, args, stdin):
+    flags, paths = parse_flags(args, 'rR')
+    if len(paths) < 2:
+        raise ValueError("missing file operand")
+    for src in paths[:-1]:
+        os.copy(src, paths[-1], recursive=bool(flags))
+
+@command('cat')
+def cat(os, args, stdin):
+    yield from _input(os, args, stdin)
+
+@command('grep')
+def grep(os, args, stdin):
+    flags, operands = parse_flags(args, 'ivc')
+    if not operands:
+        raise ValueError("missing pattern")
+    pattern, paths = operands[0], operands[1:]
+    if 'i' in flags:
+        pattern = pattern.lower()
+    invert = 'v' in flags
+    matches = (line for line in _input(os, paths, stdin)
+               if (pattern in (line.lower() if 'i' in flags else line)) != invert)
+    if 'c' in flags:
+        yield str(sum(1 for _ in matches))
+    else:
+        yield from matches
+
+@command('wc')
+def wc(os, args, stdin):
+    flags, paths = parse_flags(args, 'lwc')
+    lines = words = chars = 0
+    for line in _input(os, paths, stdin):
+        lines += 1
+        words += len(line.split())
+        chars += len(line) + 1
+    chars = max(0, chars - 1)  # No newline after the last line
+    counts = [count for flag, count in (('l', lines), ('w', words), ('c', chars)) if not flags or flag in flags]
+    yield ' '.join(str(count) for count in counts)
+
+@command('head')
+def head(os, args, stdin):
+    count, paths = _count_option(args)
+    yield from itertools.islice(_input(os, paths, stdin), count)
+
+@command('tail')
+def tail(os, args, stdin):
+    count, paths = _count_option(args)
+    yield from deque(_input(os, paths, stdin), maxlen=count)
+
+@command('edit')
+def edit(os, args, stdin):
+    if not args:
+        raise ValueError("missing file operand")
+    filename = args[0]
+    path = normalize(filename, os.current_dir)
+    if os.fs.is_dir(path):
+        raise ValueError(f"invalid file name: {filename}")
+    if not os.fs.exists(path):
+        raise ValueError(f"file not found: {filename}")
+    # Signal to the UI to enter editor mode with this file
+    yield {'editor': {'path': path, 'content': os.fs.read(path)}}
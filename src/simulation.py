@@ -0,0 +1,160 @@
+"""
+Module for the simulation worker thread.
+Runs simulation systems at a fixed tick rate off the render loop, publishes
+immutable snapshots for the scenes and takes UI commands through a queue.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+# An immutable view of every system's state after one tick
+Snapshot = namedtuple('Snapshot', ['tick', 'sim_time', 'data'])
+
+class SimulationThread:
+    """
+    Fixed-rate simulation loop on a daemon thread.
+    Systems are objects with step(dt) and snapshot(); snapshot() must return
+    immutable data (tuples, frozensets, MappingProxyType...). A system that
+    also has set_network(network) receives its own copy of the topology
+    whenever update_network() is called, so it never shares a Network with
+    the render thread.
+
+    Everything that touches simulation state runs on the worker thread:
+    the UI posts commands with post(), and reads results with latest(). Two
+    snapshot buffers are swapped on publish, so readers never take a lock
+    and never see a half-written snapshot.
+    """
+
+    def __init__(self, tick_rate=20, max_catchup=5, on_publish=None):
+        """
+        :param tick_rate: Simulation ticks per second.
+        :param max_catchup: Ticks run back to back after a stall before the rest are skipped.
+        :param on_publish: Called on the worker thread when a snapshot with new data is published.
+        """
+        self.tick_period = 1.0 / tick_rate
+        self.max_catchup = max_catchup
+        self.on_publish = on_publish
+        self.systems = {}
+        self._commands = queue.SimpleQueue()
+        empty = Snapshot(0, 0.0, MappingProxyType({}))
+        self._buffers = [empty, empty]
+        self._front = 0
+        self._thread = None
+        self._stop = threading.Event()
+        self.stats = {
+            'ticks': 0,
+            'commands': 0,
+            'overruns': 0,  # Ticks that took longer than the tick period
+            'skipped': 0,   # Ticks dropped to catch up after a stall
+            'last_tick_ms': 0.0,
+            'max_tick_ms': 0.0,
+        }
+
+    # --- Render thread API ---
+
+    def add_system(self, name, system):
+        """Register a system; before start() directly, afterwards through the command queue."""
+        if self.running:
+            self.post(self.systems.__setitem__, name, system)
+        else:
+            self.systems[name] = system
+
+    def post(self, command, *args, **kwargs):
+        """Queue command(*args, **kwargs) to run on the worker thread before the next tick."""
+        self._commands.put((command, args, kwargs))
+
+    def update_network(self, network):
+        """Send a copy of the network, taken now, to every system that routes over it."""
+        self.post(self._set_network, network.copy())
+
+    def latest(self):
+        """The most recently published Snapshot. Never blocks."""
+        return self._buffers[self._front]
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='simulation', daemon=True)
+        self._thread.start()
+        logger.info("Simulation thread started at %.0f ticks/s.", 1.0 / self.tick_period)
+
+    def stop(self, timeout=1.0):
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        logger.info("Simulation thread stopped.", extra={'simulation': dict(self.stats)})
+
+    # --- Worker thread ---
+
+    def _set_network(self, network):
+        for system in self.systems.values():
+            if hasattr(system, 'set_network'):
+                system.set_network(network)
+
+    def _run_commands(self):
+        while True:
+            try:
+                command, args, kwargs = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                command(*args, **kwargs)
+            except Exception:
+                logger.exception("Simulation command %r failed.", command)
+            self.stats['commands'] += 1
+
+    def _tick(self):
+        start = time.perf_counter()
+        self._run_commands()
+        data = {}
+        for name, system in self.systems.items():
+            try:
+                system.step(self.tick_period)
+                data[name] = system.snapshot()
+            except Exception:
+                logger.exception("Simulation system %s failed.", name)
+        stats = self.stats
+        stats['ticks'] += 1
+        previous = self.latest()
+        snapshot = Snapshot(stats['ticks'], stats['ticks'] * self.tick_period, MappingProxyType(data))
+        # Fill the back buffer, then flip: readers only ever follow _front
+        back = 1 - self._front
+        self._buffers[back] = snapshot
+        self._front = back
+        if self.on_publish is not None and data != dict(previous.data):
+            self.on_publish(snapshot)
+        elapsed = (time.perf_counter() - start) * 1000.0
+        stats['last_tick_ms'] = elapsed
+        stats['max_tick_ms'] = max(stats['max_tick_ms'], elapsed)
+        if elapsed > self.tick_period * 1000.0:
+            stats['overruns'] += 1
+
+    def _run(self):
+        next_tick = time.perf_counter()
+        while not self._stop.is_set():
+            ran = 0
+            while time.perf_counter() >= next_tick and ran < self.max_catchup:
+                self._tick()
+                next_tick += self.tick_period
+                ran += 1
+            now = time.perf_counter()
+            if now >= next_tick:
+                # Still behind after max_catchup ticks: drop the backlog instead of spiralling
+                skipped = int((now - next_tick) / self.tick_period) + 1
+                self.stats['skipped'] += skipped
+                next_tick += skipped * self.tick_period
+                logger.warning("Simulation fell behind; skipped %d ticks.", skipped)
+            self._stop.wait(max(0.0, next_tick - time.perf_counter()))
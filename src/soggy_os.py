@@ -2,6 +2,27 @@
 Module for SoggyOS, a simple Linux-like command line OS for the game.
 """
 import re
+import shlex
+from collections import deque
+
+from scrollback import Scrollback
+from shell_commands import COMMANDS
+from vfs import FileSystem, normalize
+
+HOME = '/home/user'
+HISTORY_LIMIT = 1000  # Commands kept in history
+
+_default_image = None
+
+class ShellError(ValueError):
+    """A command's error, already prefixed with the command's name."""
+
+def default_image():
+    """The frozen base filesystem every SoggyOS starts from unless given another image."""
+    global _default_image
+    if _default_image is None:
+        _default_image = FileSystem([HOME, '/bin', '/etc/network', '/tmp']).freeze()
+    return _default_image
 
 class SoggyOS:
     """
@@ -10,117 +31,234 @@ class SoggyOS:
     """
     BLUE = (0, 128, 255)  # RGB for directories
     GREEN = (0, 255, 0)   # RGB for normal text
+    commands = COMMANDS   # Name -> command function; see shell_commands.command() to add more
 
-    def __init__(self):
-        self.directories = {
-            '/': ['home', 'bin', 'etc', 'tmp'],
-            '/home': ['user'],
-            '/home/user': [],
-            '/bin': [],
-            '/etc': ['network'],
-            '/etc/network': [],
-            '/tmp': []
-        }
-        self.files = {}  # Maps full file paths to file content (str)
-        self.current_dir = '/home/user'
+    def __init__(self, scrollback_rows=2000, scrollback_bytes=1024 * 1024, image=None):
+        """
+        :param scrollback_rows: Output rows kept for scrolling back.
+        :param scrollback_bytes: Approximate memory cap of the kept output rows.
+        :param image: Frozen FileSystem shared as the base of this machine's filesystem; default_image() if None.
+        """
+        self.fs = FileSystem(base=image or default_image())  # Copy-on-write overlay; see overlay_size()
+        self.home = HOME
+        self.current_dir = HOME
         self.username = 'soggy'
         self.hostname = 'computer'
-        self.history = []  # Stores command history
-        self.output = []   # Stores output lines (strings or special for ls)
+        self.history = deque(maxlen=HISTORY_LIMIT)  # Stores command history
+        self.columns = 80  # Terminal width in characters; output rows are wrapped to it
+        self.output = Scrollback(scrollback_rows, scrollback_bytes)  # Screen rows (strings or special for ls)
         self._update_prompt()
         self._last_ls = None  # Store last ls output for rendering
+        # Called as listener(event, *args) on 'command', 'cwd', 'file_written', 'mkdir', 'removed', 'moved' and 'copied'
+        self._listeners = []
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event, *args):
+        for listener in self._listeners:
+            listener(event, *args)
+
+    # Filesystem changes. Paths may be relative to the current directory; listeners get absolute paths.
+
+    def write_file(self, path, content):
+        """Create or overwrite a file."""
+        self.fs.write(path, content, self.current_dir)
+        self._notify('file_written', normalize(path, self.current_dir), content)
+
+    def make_directory(self, path, parents=False):
+        self.fs.mkdir(path, self.current_dir, parents=parents)
+        self._notify('mkdir', normalize(path, self.current_dir))
+
+    def remove(self, path, recursive=False):
+        self.fs.remove(path, self.current_dir, recursive=recursive)
+        path = normalize(path, self.current_dir)
+        self._notify('removed', path)
+        if self._inside(self.current_dir, path):
+            self.current_dir = path.rsplit('/', 1)[0] or '/'
+
+    def move(self, src, dst):
+        new_path = self.fs.move(src, dst, self.current_dir)
+        src = normalize(src, self.current_dir)
+        self._notify('moved', src, new_path)
+        if self._inside(self.current_dir, src):
+            self.current_dir = new_path + self.current_dir[len(src):]  # Follow the working directory
+
+    def copy(self, src, dst, recursive=False):
+        new_path = self.fs.copy(src, dst, self.current_dir, recursive=recursive)
+        self._notify('copied', normalize(src, self.current_dir), new_path)
+
+    def overlay_size(self):
+        """Directories, files and content bytes this machine holds on top of its base image."""
+        return self.fs.overlay_size()
+
+    @staticmethod
+    def _inside(path, directory):
+        return path == directory or path.startswith(directory.rstrip('/') + '/')
+
+    def _print(self, text):
+        # Append text to the output, one row per line and wrapped to the terminal width
+        width = max(1, self.columns)
+        for line in text.split('\n'):
+            self.output.append(line[:width])
+            for start in range(width, len(line), width):
+                self.output.append(line[start:start + width])
+
+    def _print_ls(self, names):
+        # Append an ls listing as rows of columns, each column as wide as the longest name
+        if not names:
+            self.output.append('')
+            return
+        col_width = max(len(name) for name, _ in names) + 2
+        per_row = max(1, self.columns // col_width)
+        for start in range(0, len(names), per_row):
+            self.output.append({'ls': names[start:start + per_row], 'width': col_width})
 
     def _update_prompt(self):
         self.prompt = f'{self.username}@{self.hostname}:{self.current_dir}$ '
 
     def run_command(self, command):
         """
-        Parse and execute a command string. Returns output as a string or dict (for editor mode).
+        Parse and execute a command line: commands separated by |, optionally
+        ending in > or >> FILE. Output streams into the scrollback as the last
+        stage produces it. Returns the editor request dict for edit, the
+        (name, type) entries printed by ls, or ''.
         """
         self.history.append(command)
-        tokens = command.strip().split()
-        if not tokens:
+        self._notify('command', command)
+        previous_dir = self.current_dir
+        if not command.strip():
             return ''
-        cmd = tokens[0]
-        args = tokens[1:]
-        result = ''
         self._last_ls = None
-        # Always add the prompt and command to output (except for clear)
-        if cmd != 'clear':
-            self.output.append(self.prompt + command)
-        if cmd == 'help':
-            result = 'Available commands: help, echo, clear, cd, ls, touch, edit'
-        elif cmd == 'echo':
-            result = ' '.join(args)
-        elif cmd == 'clear':
-            self.output.clear()
+        # Always add the prompt and command to output
+        self._print(self.prompt + command)
+        output_end = self.output.end
+        try:
+            result = self._run_pipeline(command)
+        except ValueError as error:
+            self._print(str(error))
             result = ''
-        elif cmd == 'cd':
-            result = self._cd(args)
-        elif cmd == 'ls':
-            result = self._ls(args)
-        elif cmd == 'touch':
-            result = self._touch(args)
-        elif cmd == 'edit':
-            result = self._edit(args)
-        else:
-            result = f"Command not found: {command}"
-        # Add whitespace before and after output
-        if cmd == 'ls' and isinstance(result, list):
-            self.output.append({'ls': result})
-            self.output.append('')
-            self._last_ls = result
-        elif isinstance(result, str) and result:
-            self.output.append(result)
+        # Add whitespace after output
+        if self.output.end != output_end:
             self.output.append('')
-        # Do NOT append dicts (like editor) to output
         self._update_prompt()
+        if self.current_dir != previous_dir:
+            self._notify('cwd', self.current_dir)
         return result
 
-    def _cd(self, args):
-        if not args:
-            self.current_dir = '/home/user'
-            return ''
-        path = args[0]
-        # Handle '..' to go up one directory
-        if path == '..':
-            if self.current_dir == '/':
-                return ''
-            parent = '/'.join(self.current_dir.rstrip('/').split('/')[:-1])
-            if not parent:
-                parent = '/'
-            self.current_dir = parent
-            return ''
-        # Handle absolute and relative paths
-        if path.startswith('/'):
-            target = path.rstrip('/') if path != '/' else '/'
-        else:
-            if self.current_dir == '/':
-                target = '/' + path
-            else:
-                target = self.current_dir + '/' + path
-        # Normalize path
-        target = target.replace('//', '/')
-        if target in self.directories:
-            self.current_dir = target
+    @staticmethod
+    def _split_operators(command):
+        # Cut the line at |, > and >> outside quotes: [segment, operator, segment, ...]
+        parts = []
+        start = 0
+        quote = None
+        index = 0
+        while index < len(command):
+            char = command[index]
+            if quote:
+                if char == quote:
+                    quote = None
+                elif char == '\\' and quote == '"':
+                    index += 1
+            elif char in '\'"':
+                quote = char
+            elif char == '\\':
+                index += 1
+            elif char in '|>':
+                operator = '>>' if command.startswith('>>', index) else char
+                parts.append(command[start:index])
+                parts.append(operator)
+                index += len(operator)
+                start = index
+                continue
+            index += 1
+        parts.append(command[start:])
+        return parts
+
+    def _parse(self, command):
+        # Split a command line into pipeline stages and an optional (mode, path) redirection
+        parts = self._split_operators(command)
+        try:
+            segments = [shlex.split(segment) for segment in parts[0::2]]
+        except ValueError as error:
+            raise ValueError(f"syntax error: {error}")
+        operators = parts[1::2]
+        redirect = None
+        if operators and operators[-1] != '|':
+            target = segments.pop()
+            if len(target) != 1:
+                raise ValueError(f"syntax error near unexpected token '{target[1] if target else 'newline'}'")
+            redirect = (operators.pop(), target[0])
+        if any(operator != '|' for operator in operators):
+            raise ValueError(f"syntax error near unexpected token '{next(op for op in operators if op != '|')}'")
+        if not all(segments):
+            raise ValueError("syntax error: empty command in pipeline")
+        return segments, redirect
+
+    def _run_pipeline(self, command):
+        stages, redirect = self._parse(command)
+        stream = iter(())
+        for index, (name, *args) in enumerate(stages):
+            func = self.commands.get(name)
+            if func is None:
+                raise ValueError(f"Command not found: {name}")
+            if index:
+                stream = self._text(stream)
+            try:
+                output = func(self, args, stream)
+            except ShellError:
+                raise
+            except ValueError as error:
+                raise ShellError(f"{name}: {error}") from None
+            stream = self._guard(name, output)
+        if redirect is not None:
+            mode, path = redirect
+            content = '\n'.join(self._text(stream))
+            if mode == '>>' and self.fs.exists(path, self.current_dir):
+                existing = self.fs.read(path, self.current_dir)
+                content = existing + '\n' + content if existing else content
+            self.write_file(path, content)
             return ''
-        else:
-            return f"cd: no such file or directory: {path}"
+        names = []
+        for item in stream:
+            if isinstance(item, dict):
+                return item  # Editor request; the UI takes over
+            if isinstance(item, tuple):
+                names.append(item)
+                continue
+            if names:
+                self._print_ls(names)
+                names = []
+            self._print(item)
+        if names or stages[-1][0] == 'ls':
+            self._print_ls(names)
+            self._last_ls = names
+            return names
+        return ''
 
-    def _ls(self, args):
-        """
-        List contents of the current directory. Returns a list of (name, type) tuples, where type is 'dir' or 'file'.
-        Files should be shown as white in the UI.
-        """
-        contents = self.directories.get(self.current_dir, [])
-        # Add files in the current directory
-        file_list = []
-        for path, content in self.files.items():
-            dir_path, file_name = path.rsplit('/', 1)
-            if dir_path == self.current_dir:
-                file_list.append((file_name, 'file'))
-        dir_list = [(name, 'dir') for name in contents]
-        return dir_list + file_list
+    @staticmethod
+    def _guard(name, output):
+        # Run a command's output, prefixing its own errors with its name; commands without output return None.
+        # Errors of upstream stages pass through here already prefixed.
+        try:
+            yield from output or ()
+        except ShellError:
+            raise
+        except ValueError as error:
+            raise ShellError(f"{name}: {error}") from None
+
+    @staticmethod
+    def _text(stream):
+        # Lines for the next pipeline stage or a file: ls entries become their names
+        for item in stream:
+            if isinstance(item, tuple):
+                yield item[0]
+            elif isinstance(item, str):
+                yield item
 
     def _strip_ansi(self, text):
         # Remove ANSI escape codes for pygame rendering
@@ -135,32 +273,4 @@ class SoggyOS:
 
     def get_last_ls(self):
         """Return the last ls output as a list of (name, type) tuples, or None."""
-        return self._last_ls 
-
-    def _touch(self, args):
-        if not args:
-            return 'touch: missing file operand'
-        created = []
-        for filename in args:
-            if '/' in filename or filename in self.directories.get(self.current_dir, []):
-                return f"touch: invalid file name: {filename}"
-            path = self.current_dir.rstrip('/') + '/' + filename
-            if path not in self.files:
-                self.files[path] = ''
-                created.append(filename)
-        if created:
-            return f"Created file(s): {' '.join(created)}"
-        else:
-            return ''
-
-    def _edit(self, args):
-        if not args:
-            return 'edit: missing file operand'
-        filename = args[0]
-        if '/' in filename or filename in self.directories.get(self.current_dir, []):
-            return f"edit: invalid file name: {filename}"
-        path = self.current_dir.rstrip('/') + '/' + filename
-        if path not in self.files:
-            return f"edit: file not found: {filename}"
-        # Signal to the UI to enter editor mode with this file
-        return {'editor': {'path': path, 'content': self.files[path]}} 
\ No newline at end of file
+        return self._last_ls
@@ -0,0 +1,276 @@
+"""
+Module for switching-loop detection and a simplified spanning tree protocol.
+Keeps a spanning tree of every cabled component up to date as cables are
+plugged, unplugged or go down, and blocks one port of every redundant cable
+so the switched network stays loop free.
+"""
+
+import heapq
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+class SpanningTree:
+    """
+    Simplified spanning tree protocol (STP) over a Network.
+    The root bridge of each component is the node with the lowest bridge ID;
+    every other node's root port is the cable towards the root with the
+    lowest path cost (one per cable), ties going to the lowest neighbor
+    bridge ID and then port. The tree's cables forward. On every other cable
+    the end farther from the root is blocked. On a loopback cable it is the
+    higher port. Pass-through ports (patch panels) never block, so the far
+    end of a redundant cable is only blocked if it is a switch port.
+
+    Loops are detected incrementally: a new cable whose ends already share
+    a root closes a loop, which is a dictionary lookup. Reconvergence only
+    touches what can change. A redundant cable updates the nodes it brings
+    closer to the root. A removed tree cable recomputes the subtree that
+    hung below it. Joining two components re-hangs the one with the higher
+    root. Only then are root ports re-picked and cables re-classified,
+    around the nodes whose path cost changed.
+
+    Devices are told about blocked ports through set_port_blocked(), when
+    they have it. Run one SpanningTree per set of devices: copies of a
+    network share their devices.
+    """
+
+    def __init__(self, network):
+        self.network = network
+        self.blocked = {}  # cable key -> (device, port_index) of its blocked end
+        self._root = {}    # node -> root node of its component
+        self._cost = {}    # node -> path cost to the root
+        self._parent = {}  # node -> cable key of its root port, None for a root
+        self.stats = {
+            'edits': 0,
+            'nodes_settled': 0,  # Nodes whose root port and cables were re-evaluated
+            'max_edit_ms': 0.0,
+        }
+        nodes = set()
+        for cable in network.cables():
+            nodes.add(network.node_for(cable[0], cable[1]))
+            nodes.add(network.node_for(cable[2], cable[3]))
+        self._rebuild(nodes)
+        network.add_listener(self._on_cable_changed)
+        network.add_link_listener(self._on_cable_changed)
+
+    def close(self):
+        """Stop listening to the network and unblock every port."""
+        self.network.remove_listener(self._on_cable_changed)
+        self.network.remove_link_listener(self._on_cable_changed)
+        for cable in list(self.blocked):
+            self._set_blocked(cable, None)
+
+    def root_of(self, node):
+        return self._root.get(node, node)
+
+    def is_blocked(self, device, port_index):
+        peer = self.network.get_peer(device, port_index)
+        if peer is None:
+            return False
+        return self.blocked.get(self.network.cable_key(device, port_index, *peer)) == (device, port_index)
+
+    # --- Helpers ---
+
+    def _bridge_key(self, node):
+        # Bridge ID: the device's ID in the network, then the port for pass-through nodes
+        if isinstance(node, tuple):
+            return (self.network.device_id(node[0]), node[1])
+        return (self.network.device_id(node), -1)
+
+    def _links(self, node):
+        # (cable key, this node's end, neighbor's end, neighbor node) for every cable of node that is up
+        network = self.network
+        ends = [node] if isinstance(node, tuple) else [(node, port_index) for port_index in range(node.NUM_PORTS)]
+        links = []
+        for device, port_index in ends:
+            peer = network.get_peer(device, port_index)
+            if peer is not None and network.is_link_up(device, port_index) and network.is_link_up(*peer):
+                links.append((network.cable_key(device, port_index, *peer), (device, port_index), peer, network.node_for(*peer)))
+        return links
+
+    def _set_blocked(self, cable, end):
+        # end None unblocks the cable
+        old = self.blocked.get(cable)
+        if old == end:
+            return
+        if old is not None:
+            del self.blocked[cable]
+            set_port_blocked = getattr(old[0], 'set_port_blocked', None)
+            if set_port_blocked is not None:
+                set_port_blocked(old[1], False)
+        if end is not None:
+            self.blocked[cable] = end
+            set_port_blocked = getattr(end[0], 'set_port_blocked', None)
+            if set_port_blocked is not None:
+                set_port_blocked(end[1], True)
+
+    def _redundant_end(self, end, other_end):
+        # The end of a non-tree cable to block: the one farther from the root, if it can block
+        node = self.network.node_for(*end)
+        other_node = self.network.node_for(*other_end)
+        if node == other_node:
+            return max(end, other_end, key=lambda e: e[1])
+        if (self._cost[node], self._bridge_key(node)) < (self._cost[other_node], self._bridge_key(other_node)):
+            end, other_end, node, other_node = other_end, end, other_node, node
+        if isinstance(node, tuple) and not isinstance(other_node, tuple):
+            return other_end
+        return end
+
+    # --- Convergence ---
+
+    def _settle(self, changed):
+        """
+        Re-pick root ports and re-classify cables after the path cost of the
+        changed nodes moved. Their neighbors may prefer a new root port too,
+        so cables of both are re-evaluated.
+        """
+        links = {node: self._links(node) for node in changed}
+        for node in changed:
+            for _, _, _, neighbor in links[node]:
+                if neighbor not in links:
+                    links[neighbor] = self._links(neighbor)
+        self.stats['nodes_settled'] += len(links)
+        for node, node_links in links.items():
+            cost = self._cost[node]
+            best = None
+            if cost:
+                for cable, _, peer, neighbor in node_links:
+                    if self._cost.get(neighbor) == cost - 1:
+                        key = (self._bridge_key(neighbor), peer[1])
+                        if best is None or key < best[0]:
+                            best = (key, cable)
+            self._parent[node] = best[1] if best is not None else None
+        for node, node_links in links.items():
+            for cable, end, peer, neighbor in node_links:
+                if cable == self._parent[node] or cable == self._parent.get(neighbor):
+                    self._set_blocked(cable, None)
+                else:
+                    self._set_blocked(cable, self._redundant_end(end, peer))
+
+    def _collect(self, start, skip=None):
+        # Nodes linked to start by up cables, optionally ignoring one cable
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            for cable, _, _, neighbor in self._links(queue.popleft()):
+                if cable != skip and neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+        return seen
+
+    def _grow(self, group, root, start, start_cost):
+        # Breadth-first path costs over group from start, all under root
+        cost = {start: start_cost}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            self._root[node] = root
+            self._cost[node] = cost[node]
+            for _, _, _, neighbor in self._links(node):
+                if neighbor not in cost and neighbor in group:
+                    cost[neighbor] = cost[node] + 1
+                    queue.append(neighbor)
+        self._settle(group)
+
+    def _rebuild(self, nodes):
+        # Recompute every component containing one of nodes from scratch
+        done = set()
+        for start in nodes:
+            if start in done:
+                continue
+            group = self._collect(start)
+            done |= group
+            root = min(group, key=self._bridge_key)
+            self._grow(group, root, root, 0)
+
+    def _on_cable_changed(self, connected, cable):
+        start = time.perf_counter()
+        self.stats['edits'] += 1
+        if connected:
+            self._cable_added(cable)
+        else:
+            self._cable_removed(cable)
+        elapsed = (time.perf_counter() - start) * 1000.0
+        self.stats['max_edit_ms'] = max(self.stats['max_edit_ms'], elapsed)
+
+    def _cable_added(self, cable):
+        network = self.network
+        end, other_end = cable[:2], cable[2:]
+        if not (network.is_link_up(*end) and network.is_link_up(*other_end)):
+            return  # Joins the topology once its link comes up
+        node, other_node = network.node_for(*end), network.node_for(*other_end)
+        for n in (node, other_node):
+            if n not in self._root:
+                self._root[n], self._cost[n], self._parent[n] = n, 0, None
+        if node == other_node:
+            logger.warning("Switching loop: a cable connects two ports of the same device; blocking one port.")
+            self._set_blocked(cable, self._redundant_end(end, other_end))
+            return
+        root, other_root = self._root[node], self._root[other_node]
+        if root != other_root:
+            # Two trees join: the one with the higher root is re-hung below the new cable
+            if self._bridge_key(root) > self._bridge_key(other_root):
+                node, other_node, root = other_node, node, other_root
+            group = self._collect(other_node, skip=cable)
+            self._grow(group, root, other_node, self._cost[node] + 1)
+            return
+        logger.warning("Switching loop detected; spanning tree is blocking a redundant link.")
+        # The new cable can only bring nodes closer to the root: relax outwards from its far end
+        cost = self._cost
+        if cost[node] > cost[other_node]:
+            node, other_node = other_node, node
+        changed = {node, other_node}
+        if cost[node] + 1 < cost[other_node]:
+            cost[other_node] = cost[node] + 1
+            queue = deque([other_node])
+            while queue:
+                current = queue.popleft()
+                for _, _, _, neighbor in self._links(current):
+                    if cost[current] + 1 < cost[neighbor]:
+                        cost[neighbor] = cost[current] + 1
+                        changed.add(neighbor)
+                        queue.append(neighbor)
+        self._settle(changed)
+
+    def _cable_removed(self, cable):
+        if cable in self.blocked:
+            # A redundant cable went away; the tree is unchanged
+            self._set_blocked(cable, None)
+            return
+        node, other_node = self.network.node_for(*cable[:2]), self.network.node_for(*cable[2:])
+        if self._parent.get(other_node) != cable:
+            node, other_node = other_node, node
+        if self._parent.get(other_node) != cable:
+            return  # Not part of the tree (it was down, or a loopback)
+        # Only the subtree that hung below the cable loses its path to the root
+        subtree = {other_node}
+        queue = deque([other_node])
+        while queue:
+            for link, _, _, neighbor in self._links(queue.popleft()):
+                if neighbor not in subtree and self._parent.get(neighbor) == link:
+                    subtree.add(neighbor)
+                    queue.append(neighbor)
+        # Re-route it through its cables to the rest of the component, cheapest entry first
+        heap = []
+        for member in subtree:
+            for _, _, _, neighbor in self._links(member):
+                if neighbor not in subtree:
+                    heapq.heappush(heap, (self._cost[neighbor] + 1, self._bridge_key(member), member))
+        cost = {}
+        while heap:
+            member_cost, _, member = heapq.heappop(heap)
+            if member in cost:
+                continue
+            cost[member] = self._cost[member] = member_cost
+            for _, _, _, neighbor in self._links(member):
+                if neighbor in subtree and neighbor not in cost:
+                    heapq.heappush(heap, (member_cost + 1, self._bridge_key(neighbor), neighbor))
+        if cost:
+            self._settle(set(cost) | {node})
+        else:
+            self._settle({node})
+        # Whatever could not be reached split off into components of its own
+        if len(cost) < len(subtree):
+            self._rebuild(subtree - cost.keys())
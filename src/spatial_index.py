@@ -0,0 +1,74 @@
+"""
+Module for spatial indexing of on-screen elements.
+Provides a uniform grid used for fast hit-testing of ports, cables and racks.
+"""
+
+import pygame
+
+class SpatialGrid:
+    """
+    Uniform grid over screen space.
+    Each item is stored under its rect in every cell that rect overlaps, so a
+    point lookup only examines the items of a single cell.
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self._cells = {}  # (cell_x, cell_y) -> {item: None}, a dict used as an insertion-ordered set
+        self._rects = {}  # item -> rect
+
+    def __len__(self):
+        return len(self._rects)
+
+    def __contains__(self, item):
+        return item in self._rects
+
+    def _cells_for(self, rect):
+        size = self.cell_size
+        for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield (cx, cy)
+
+    def insert(self, item, rect):
+        """Add item covering rect, replacing any rect it was stored under before."""
+        if item in self._rects:
+            self.remove(item)
+        rect = pygame.Rect(rect)
+        self._rects[item] = rect
+        for cell in self._cells_for(rect):
+            self._cells.setdefault(cell, {})[item] = None
+
+    def remove(self, item):
+        rect = self._rects.pop(item, None)
+        if rect is None:
+            return
+        for cell in self._cells_for(rect):
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.pop(item, None)
+                if not bucket:
+                    del self._cells[cell]
+
+    def get_rect(self, item):
+        return self._rects.get(item)
+
+    def query_point(self, pos):
+        """Return the items whose rect contains pos, in insertion order."""
+        bucket = self._cells.get((pos[0] // self.cell_size, pos[1] // self.cell_size))
+        if not bucket:
+            return []
+        return [item for item in bucket if self._rects[item].collidepoint(pos)]
+
+    def query_rect(self, rect):
+        """Return the items whose rect overlaps rect."""
+        rect = pygame.Rect(rect)
+        found = {}
+        for cell in self._cells_for(rect):
+            for item in self._cells.get(cell, ()):
+                if item not in found and self._rects[item].colliderect(rect):
+                    found[item] = None
+        return list(found)
+
+    def clear(self):
+        self._cells.clear()
+        self._rects.clear()
@@ -0,0 +1,49 @@
+"""
+Module for startup-time profiling.
+Times imports, scene construction and the first frame so startup cost stays
+visible as scenes and server rooms grow.
+"""
+
+import importlib
+import time
+from contextlib import contextmanager
+
+class StartupProfiler:
+    """
+    Records named sections (imports, scene inits) and milestones, all in
+    milliseconds relative to when the profiler was created.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sections = []    # (name, duration ms)
+        self.milestones = []  # (name, ms since start)
+
+    @contextmanager
+    def section(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections.append((name, (time.perf_counter() - begin) * 1000.0))
+
+    def import_module(self, name):
+        with self.section(f'import {name}'):
+            return importlib.import_module(name)
+
+    def mark(self, name):
+        self.milestones.append((name, (time.perf_counter() - self.start) * 1000.0))
+
+    def as_dict(self):
+        return {
+            'sections_ms': {name: round(ms, 2) for name, ms in self.sections},
+            'milestones_ms': {name: round(ms, 2) for name, ms in self.milestones},
+        }
+
+    def format_report(self):
+        lines = ['Startup profile:']
+        for name, ms in self.sections:
+            lines.append(f'  {name:<32} {ms:8.2f} ms')
+        for name, ms in self.milestones:
+            lines.append(f'  @ {name:<30} {ms:8.2f} ms')
+        return '\n'.join(lines)
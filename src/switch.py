@@ -7,16 +7,41 @@ import pygame
 import logging
 from rack import RackMountable
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
-
-class Switch(RackMountable):
+logger = logging.getLogger(__name__)
+
+class LearningBridge:
+    """
+    MAC learning and spanning tree port state shared by the switches.
+    A mixin rather than a RackMountable subclass, so it is not registered as a device;
+    the switch declares the mac_table and blocked_ports slots.
+    """
+    __slots__ = ()
+
+    def forget_port(self, port_index):
+        """Forget the addresses learned on a port, e.g. when its link goes down or its forwarding state changes."""
+        self.mac_table = {mac: port for mac, port in self.mac_table.items() if port != port_index}
+
+    def set_port_blocked(self, port_index, blocked):
+        if blocked == (port_index in self.blocked_ports):
+            return
+        if blocked:
+            self.blocked_ports.add(port_index)
+        else:
+            self.blocked_ports.discard(port_index)
+        # Addresses learned before the tree changed would send frames into a blocked port instead of flooding them
+        self.forget_port(port_index)
+        self.mark_dirty(self.ports[port_index].inflate(6, 6))
+
+class Switch(LearningBridge, RackMountable):
     display_name = "Network Switch"
     COLOR = (120, 255, 120)  # Light green
     PORT_COLOR = (0, 0, 0)   # Black
+    BLOCKED_COLOR = (255, 140, 0)  # Orange ring: port blocked by the spanning tree
     PORT_SIZE = 16
     PORT_SPACING = 12
     HEIGHT = 1  # Rack units
     NUM_PORTS = 8
+    __slots__ = ('mac_table', 'blocked_ports')
 
     def __init__(self, rack_x, rack_y, rack_width, unit_index, unit_height):
         super().__init__()
@@ -32,35 +57,21 @@ class Switch(RackMountable):
             unit_height
         )
         self.ports = []  # List of port rects
-        self.connections = [None for _ in range(self.NUM_PORTS)]  # (switch, port_index) or None
         self.selected_port = None  # (index) if this switch has a port selected
+        self.mac_table = {}  # MAC address -> port index, learned from traffic
+        self.blocked_ports = set()  # Ports the spanning tree keeps from forwarding
         self._update_ports()
-        logging.info(f"Switch created at rack unit {unit_index+1}.")
-
-    def _update_ports(self):
-        # Evenly space ports horizontally, always using self.rack_width
-        total_width = self.NUM_PORTS * self.PORT_SIZE + (self.NUM_PORTS - 1) * self.PORT_SPACING
-        start_x = self.rack_x + (self.rack_width - total_width) // 2
-        y = self.rack_y + self.unit_index * self.unit_height + self.unit_height // 2 - self.PORT_SIZE // 2
-        self.ports = []
-        for i in range(self.NUM_PORTS):
-            port_rect = pygame.Rect(
-                start_x + i * (self.PORT_SIZE + self.PORT_SPACING),
-                y,
-                self.PORT_SIZE,
-                self.PORT_SIZE
-            )
-            self.ports.append(port_rect)
+        logger.info("Switch created at rack unit %s.", unit_index+1)
 
     def draw(self, screen, highlight_port=None):
-        # Always update width to match rack
-        self.rect.width = self.rack_width
-        self._update_ports()
         # Draw switch body
         pygame.draw.rect(screen, self.COLOR, self.rect, border_radius=6)
         # Draw ports
         for i, port_rect in enumerate(self.ports):
             color = self.PORT_COLOR
+            if i in self.blocked_ports:
+                # Ring around the port, so it still shows with a cable end drawn over the port
+                pygame.draw.rect(screen, self.BLOCKED_COLOR, port_rect.inflate(6, 6), width=3)
             if highlight_port == i or self.selected_port == i:
                 pygame.draw.rect(screen, (255, 255, 0), port_rect, width=3)  # Highlight selected/hovered port
             pygame.draw.rect(screen, color, port_rect)
@@ -68,7 +79,7 @@ class Switch(RackMountable):
     def handle_mouse_click(self, pos):
         for i, port_rect in enumerate(self.ports):
             if port_rect.collidepoint(pos):
-                logging.info(f"Clicked port {i+1} on switch at rack unit {self.unit_index+1}.")
+                logger.info("Clicked port %s on switch at rack unit %s.", i+1, self.unit_index+1)
                 return i
         return None
 
@@ -77,24 +88,24 @@ class Switch(RackMountable):
         return (port_rect.centerx, port_rect.centery)
 
     def set_connection(self, port_index, other_switch, other_port_index):
-        self.connections[port_index] = (other_switch, other_port_index)
-        logging.info(f"Port {port_index+1} on switch at rack unit {self.unit_index+1} connected to port {other_port_index+1} on another switch.")
+        self.mark_dirty(self.ports[port_index])
+        logger.info("Port %s on switch at rack unit %s connected to port %s on another switch.", port_index+1, self.unit_index+1, other_port_index+1)
 
     def clear_connection(self, port_index):
-        self.connections[port_index] = None
-        logging.info(f"Connection cleared on port {port_index+1} of switch at rack unit {self.unit_index+1}.")
-
-    def get_connections(self):
-        return self.connections
+        self.mark_dirty(self.ports[port_index])
+        self.forget_port(port_index)  # Link down: forget addresses learned on this port
+        logger.info("Connection cleared on port %s of switch at rack unit %s.", port_index+1, self.unit_index+1)
 
-class Switch16(RackMountable):
+class Switch16(LearningBridge, RackMountable):
     display_name = "16-Port Switch"
     COLOR = (120, 255, 120)  # Light green
     PORT_COLOR = (0, 0, 0)   # Black
+    BLOCKED_COLOR = (255, 140, 0)  # Orange ring: port blocked by the spanning tree
     PORT_SIZE = 16
     PORT_SPACING = 12
     HEIGHT = 2  # Rack units
     NUM_PORTS = 16
+    __slots__ = ('mac_table', 'blocked_ports')
 
     def __init__(self, rack_x, rack_y, rack_width, unit_index, unit_height):
         super().__init__()
@@ -110,47 +121,20 @@ class Switch16(RackMountable):
             unit_height * self.HEIGHT
         )
         self.ports = []  # List of port rects
-        self.connections = [None for _ in range(self.NUM_PORTS)]
         self.selected_port = None
+        self.mac_table = {}  # MAC address -> port index, learned from traffic
+        self.blocked_ports = set()  # Ports the spanning tree keeps from forwarding
         self._update_ports()
-        logging.info(f"16-Port Switch created at rack unit {unit_index+1}.")
-
-    def _update_ports(self):
-        # 2 rows of 8 ports
-        ports_per_row = 8
-        total_width = ports_per_row * self.PORT_SIZE + (ports_per_row - 1) * self.PORT_SPACING
-        start_x = self.rack_x + (self.rack_width - total_width) // 2
-        y1 = self.rack_y + self.unit_index * self.unit_height + self.unit_height // 2 - self.PORT_SIZE // 2
-        y2 = y1 + self.unit_height
-        self.ports = []
-        for i in range(ports_per_row):
-            # Top row
-            port_rect = pygame.Rect(
-                start_x + i * (self.PORT_SIZE + self.PORT_SPACING),
-                y1,
-                self.PORT_SIZE,
-                self.PORT_SIZE
-            )
-            self.ports.append(port_rect)
-        for i in range(ports_per_row):
-            # Bottom row
-            port_rect = pygame.Rect(
-                start_x + i * (self.PORT_SIZE + self.PORT_SPACING),
-                y2,
-                self.PORT_SIZE,
-                self.PORT_SIZE
-            )
-            self.ports.append(port_rect)
+        logger.info("16-Port Switch created at rack unit %s.", unit_index+1)
 
     def draw(self, screen, highlight_port=None):
-        # Always update width to match rack
-        self.rect.width = self.rack_width
-        self._update_ports()
         # Draw switch body
         pygame.draw.rect(screen, self.COLOR, self.rect, border_radius=6)
         # Draw ports
         for i, port_rect in enumerate(self.ports):
             color = self.PORT_COLOR
+            if i in self.blocked_ports:
+                pygame.draw.rect(screen, self.BLOCKED_COLOR, port_rect.inflate(6, 6), width=3)
             if highlight_port == i or self.selected_port == i:
                 pygame.draw.rect(screen, (255, 255, 0), port_rect, width=3)
             pygame.draw.rect(screen, color, port_rect)
@@ -158,7 +142,7 @@ class Switch16(RackMountable):
     def handle_mouse_click(self, pos):
         for i, port_rect in enumerate(self.ports):
             if port_rect.collidepoint(pos):
-                logging.info(f"Clicked port {i+1} on switch at rack unit {self.unit_index+1}.")
+                logger.info("Clicked port %s on switch at rack unit %s.", i+1, self.unit_index+1)
                 return i
         return None
 
@@ -167,14 +151,12 @@ class Switch16(RackMountable):
         return (port_rect.centerx, port_rect.centery)
 
     def set_connection(self, port_index, other_switch, other_port_index):
-        self.connections[port_index] = (other_switch, other_port_index)
-        logging.info(f"Port {port_index+1} on switch at rack unit {self.unit_index+1} connected to port {other_port_index+1} on another switch.")
+        self.mark_dirty(self.ports[port_index])
+        logger.info("Port %s on switch at rack unit %s connected to port %s on another switch.", port_index+1, self.unit_index+1, other_port_index+1)
 
     def clear_connection(self, port_index):
-        self.connections[port_index] = None
-        logging.info(f"Connection cleared on port {port_index+1} of switch at rack unit {self.unit_index+1}.")
-
-    def get_connections(self):
-        return self.connections
+        self.mark_dirty(self.ports[port_index])
+        self.forget_port(port_index)  # Link down: forget addresses learned on this port
+        logger.info("Connection cleared on port %s of switch at rack unit %s.", port_index+1, self.unit_index+1)
 
 # Future: Define Switch class and related logic here. 
\ No newline at end of file
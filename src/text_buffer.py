@@ -0,0 +1,140 @@
+"""
+Module for the desk editor's text buffer.
+A gap buffer over lines: lines above the cursor, the cursor line split at
+the cursor, and lines below it. Typing, deleting and moving the cursor only
+touch the cursor line, however long the file is.
+"""
+
+class TextBuffer:
+    """
+    Editable text with a cursor.
+    Lines above the cursor row are kept in order in _before, lines below it in
+    reverse order in _after, so moving the cursor a line is one pop and one
+    append. The cursor line is held as the text left and right of the cursor.
+    Any line can be read by index in O(1) for drawing.
+    """
+
+    def __init__(self, text=''):
+        lines = text.split('\n')
+        self._before = []
+        self._after = lines[:0:-1]
+        self._left = ''
+        self._right = lines[0]
+        self._goal_col = None  # Column to return to when moving up or down through shorter lines
+
+    def __len__(self):
+        """Number of lines."""
+        return len(self._before) + 1 + len(self._after)
+
+    @property
+    def row(self):
+        return len(self._before)
+
+    @property
+    def col(self):
+        return len(self._left)
+
+    def line(self, index):
+        row = len(self._before)
+        if index < row:
+            return self._before[index]
+        if index == row:
+            return self._left + self._right
+        return self._after[row - index]
+
+    def lines(self, first, last):
+        """Yield lines first..last-1 (clamped)."""
+        for index in range(max(0, first), min(last, len(self))):
+            yield self.line(index)
+
+    def text(self):
+        return '\n'.join(self._before + [self._left + self._right] + self._after[::-1])
+
+    # --- Editing ---
+
+    def insert(self, text):
+        """Insert text at the cursor and move the cursor past it."""
+        if not text:
+            return
+        first, *rest = text.split('\n')
+        if rest:
+            self._before.append(self._left + first)
+            self._before.extend(rest[:-1])
+            self._left = rest[-1]
+        else:
+            self._left += first
+        self._goal_col = None
+
+    def delete_back(self):
+        """Delete the character before the cursor, joining lines at a line start (Backspace)."""
+        if self._left:
+            self._left = self._left[:-1]
+        elif self._before:
+            self._left = self._before.pop()
+        else:
+            return
+        self._goal_col = None
+
+    def delete_forward(self):
+        """Delete the character after the cursor, joining lines at a line end (Delete)."""
+        if self._right:
+            self._right = self._right[1:]
+        elif self._after:
+            self._right = self._after.pop()
+        else:
+            return
+        self._goal_col = None
+
+    # --- Cursor movement ---
+
+    def _set_col(self, col):
+        line = self._left + self._right
+        col = max(0, min(col, len(line)))
+        self._left, self._right = line[:col], line[col:]
+
+    def move_left(self):
+        if self._left:
+            self._set_col(len(self._left) - 1)
+        elif self._before:
+            # To the end of the previous line
+            self._after.append(self._right)
+            self._left, self._right = self._before.pop(), ''
+        self._goal_col = None
+
+    def move_right(self):
+        if self._right:
+            self._set_col(len(self._left) + 1)
+        elif self._after:
+            # To the start of the next line
+            self._before.append(self._left)
+            self._left, self._right = '', self._after.pop()
+        self._goal_col = None
+
+    def move_to_row(self, row):
+        """Move the cursor to another line, keeping its column where the line allows."""
+        row = max(0, min(row, len(self) - 1))
+        if self._goal_col is None:
+            self._goal_col = len(self._left)
+        current = self._left + self._right
+        while len(self._before) > row:
+            self._after.append(current)
+            current = self._before.pop()
+        while len(self._before) < row:
+            self._before.append(current)
+            current = self._after.pop()
+        col = min(self._goal_col, len(current))
+        self._left, self._right = current[:col], current[col:]
+
+    def move_up(self, count=1):
+        self.move_to_row(self.row - count)
+
+    def move_down(self, count=1):
+        self.move_to_row(self.row + count)
+
+    def move_home(self):
+        self._set_col(0)
+        self._goal_col = None
+
+    def move_end(self):
+        self._set_col(len(self._left) + len(self._right))
+        self._goal_col = None
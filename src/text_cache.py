@@ -0,0 +1,75 @@
+"""
+Module for caching rendered text surfaces.
+Keeps rasterized lines around so static text is not re-rendered every frame.
+"""
+
+import pygame
+from collections import OrderedDict
+
+class TextSurfaceCache:
+    """
+    LRU cache of rendered text surfaces for a single font.
+    Entries are keyed by (text, color) and evicted least-recently-used first
+    once the cached surfaces exceed max_bytes.
+    """
+
+    def __init__(self, font, max_bytes=8 * 1024 * 1024):
+        self.font = font
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()  # key -> (surface, size in bytes)
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def _get(self, key):
+        entry = self._surfaces.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._surfaces.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def _put(self, key, surface):
+        size = surface.get_width() * surface.get_height() * surface.get_bytesize()
+        self._surfaces[key] = (surface, size)
+        self.bytes_used += size
+        # Evict oldest entries, but always keep the one just added
+        while self.bytes_used > self.max_bytes and len(self._surfaces) > 1:
+            _, (_, old_size) = self._surfaces.popitem(last=False)
+            self.bytes_used -= old_size
+        return surface
+
+    def render(self, text, color):
+        """Return a surface for a single line of text, rendering it only on a cache miss."""
+        key = (text, color)
+        surface = self._get(key)
+        if surface is None:
+            surface = self._put(key, self.font.render(text, True, color))
+        return surface
+
+    def render_ls_grid(self, names, colors, default_color, col_width, cols, line_height):
+        """
+        Return one composited surface for a whole ls listing.
+        :param names: List of (name, type) tuples as produced by SoggyOS._ls.
+        :param colors: Dict mapping an entry type to its text color.
+        """
+        key = ('ls', tuple(names), tuple(sorted(colors.items())), default_color, col_width, cols, line_height)
+        surface = self._get(key)
+        if surface is None:
+            rows = (len(names) + cols - 1) // cols
+            surface = pygame.Surface((col_width * cols, rows * line_height), pygame.SRCALPHA)
+            for idx, (name, typ) in enumerate(names):
+                row, col = divmod(idx, cols)
+                name_surf = self.font.render(name, True, colors.get(typ, default_color))
+                # Copy glyph pixels as-is onto the transparent grid instead of alpha-blending them
+                surface.blit(name_surf, (col * col_width, row * line_height), special_flags=pygame.BLEND_RGBA_MAX)
+            surface = self._put(key, surface)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+        self.bytes_used = 0
@@ -0,0 +1,256 @@
+"""
+Module for the SoggyOS virtual filesystem.
+An inode-style tree of directory and file nodes: resolving a path walks one
+child map per component and listing a directory only touches its children.
+Filesystems can share a frozen base image and copy nodes on write, so many
+machines with the same base only pay for what each of them changed.
+"""
+
+class File:
+    __slots__ = ('owner', 'content')
+
+    def __init__(self, owner, content=''):
+        self.owner = owner  # FileSystem allowed to change the node in place
+        self.content = content
+
+class Directory:
+    __slots__ = ('owner', 'children')
+
+    def __init__(self, owner, children=None):
+        self.owner = owner
+        self.children = {} if children is None else children  # name -> File or Directory, in creation order
+
+def split_path(path, cwd='/'):
+    """
+    Normalize path against cwd into its list of components.
+    Handles absolute and relative paths, '.', '..' (stopping at the root) and repeated slashes.
+    """
+    parts = [] if path.startswith('/') else [part for part in cwd.split('/') if part]
+    for part in path.split('/'):
+        if part == '..':
+            if parts:
+                parts.pop()
+        elif part and part != '.':
+            parts.append(part)
+    return parts
+
+def normalize(path, cwd='/'):
+    """Absolute, normalized form of path."""
+    return '/' + '/'.join(split_path(path, cwd))
+
+class FileSystem:
+    """
+    Tree-structured filesystem. Every path argument may be absolute or
+    relative to cwd. Errors raise ValueError with a shell-style message,
+    e.g. "no such file or directory: docs/a.txt".
+
+    Nodes are only changed in place by the FileSystem that owns them. A
+    filesystem created on a frozen base image starts out sharing the image's
+    whole tree; the first change below a directory copies that directory and
+    its ancestors (their child maps, not their contents) and a written file
+    gets a node of its own. Copying a subtree shares the parts this
+    filesystem does not own. Nodes are never linked to their parents, so one
+    node can appear in many trees.
+    """
+
+    def __init__(self, directories=(), base=None):
+        """
+        :param directories: Absolute paths of directories to create, parents included.
+        :param base: Frozen FileSystem to start from; see freeze().
+        """
+        if base is not None and not base.frozen:
+            raise ValueError("A base image must be frozen first.")
+        self.frozen = False
+        self.root = base.root if base is not None else Directory(self)
+        for path in directories:
+            self.mkdir(path, parents=True)
+
+    def freeze(self):
+        """Make this filesystem read-only so it can serve as the base image of others. Returns self."""
+        self.frozen = True
+        return self
+
+    # --- Lookup ---
+
+    def _walk(self, parts, path):
+        node = self.root
+        for part in parts:
+            if not isinstance(node, Directory):
+                raise ValueError(f"not a directory: {path}")
+            node = node.children.get(part)
+            if node is None:
+                raise ValueError(f"no such file or directory: {path}")
+        return node
+
+    def lookup(self, path, cwd='/'):
+        """The File or Directory at path. Raises ValueError if there is none."""
+        return self._walk(split_path(path, cwd), path)
+
+    def exists(self, path, cwd='/'):
+        try:
+            self.lookup(path, cwd)
+        except ValueError:
+            return False
+        return True
+
+    def is_dir(self, path, cwd='/'):
+        try:
+            return isinstance(self.lookup(path, cwd), Directory)
+        except ValueError:
+            return False
+
+    def _parent_of(self, path, cwd):
+        # (components of the parent directory, name) of the entry path names; the root has no parent
+        parts = split_path(path, cwd)
+        if not parts:
+            raise ValueError(f"invalid path: {path}")
+        if not isinstance(self._walk(parts[:-1], path), Directory):
+            raise ValueError(f"not a directory: {path}")
+        return parts[:-1], parts[-1]
+
+    def _writable(self, parts):
+        # The existing directory at parts, copying it and its ancestors first where this filesystem does not own them
+        if self.frozen:
+            raise ValueError("read-only file system")
+        if self.root.owner is not self:
+            self.root = Directory(self, dict(self.root.children))
+        node = self.root
+        for part in parts:
+            child = node.children[part]
+            if child.owner is not self:
+                child = node.children[part] = Directory(self, dict(child.children))
+            node = child
+        return node
+
+    # --- Reading ---
+
+    def listdir(self, path='.', cwd='/'):
+        """(name, 'dir' or 'file') of every entry, directories first. A file lists itself."""
+        node = self.lookup(path, cwd)
+        if isinstance(node, File):
+            return [(split_path(path, cwd)[-1], 'file')]
+        children = node.children.items()
+        return ([(name, 'dir') for name, child in children if isinstance(child, Directory)]
+                + [(name, 'file') for name, child in children if isinstance(child, File)])
+
+    def read(self, path, cwd='/'):
+        node = self.lookup(path, cwd)
+        if isinstance(node, Directory):
+            raise ValueError(f"is a directory: {path}")
+        return node.content
+
+    def walk(self, path='/'):
+        """Yield (absolute path, node) for path and everything below it, parents before children."""
+        stack = [(normalize(path), self.lookup(path))]
+        while stack:
+            node_path, node = stack.pop()
+            yield node_path, node
+            if isinstance(node, Directory):
+                prefix = node_path.rstrip('/') + '/'
+                stack.extend((prefix + name, child) for name, child in reversed(list(node.children.items())))
+
+    def overlay_size(self):
+        """What this filesystem holds on top of its base image: directory and file nodes it owns and their content size."""
+        size = {'directories': 0, 'files': 0, 'bytes': 0}
+        stack = [self.root] if self.root.owner is self else []
+        while stack:
+            directory = stack.pop()
+            size['directories'] += 1
+            for child in directory.children.values():
+                if child.owner is not self:
+                    continue
+                if isinstance(child, Directory):
+                    stack.append(child)
+                else:
+                    size['files'] += 1
+                    size['bytes'] += len(child.content)
+        return size
+
+    # --- Writing ---
+
+    def mkdir(self, path, cwd='/', parents=False):
+        """Create a directory. With parents, missing parents are created and an existing directory is fine."""
+        parts = split_path(path, cwd)
+        node = self.root
+        for index, part in enumerate(parts):
+            child = node.children.get(part)
+            if child is None:
+                if not parents and index < len(parts) - 1:
+                    raise ValueError(f"no such file or directory: {path}")
+                node = self._writable(parts[:index])
+                for name in parts[index:]:
+                    child = Directory(self)
+                    node.children[name] = child
+                    node = child
+                return
+            if isinstance(child, File):
+                raise ValueError(f"file exists: {path}")
+            node = child
+        if not parents:
+            raise ValueError(f"file exists: {path}")
+
+    def write(self, path, content, cwd='/'):
+        """Create or overwrite a file."""
+        parent_parts, name = self._parent_of(path, cwd)
+        node = self._walk(parent_parts, path).children.get(name)
+        if isinstance(node, Directory):
+            raise ValueError(f"is a directory: {path}")
+        if node is not None and node.content == content:
+            return  # Unchanged; keeps sharing the base image's file
+        if node is not None and node.owner is self and not self.frozen:
+            node.content = content
+        else:
+            self._writable(parent_parts).children[name] = File(self, content)
+
+    def remove(self, path, cwd='/', recursive=False):
+        parent_parts, name = self._parent_of(path, cwd)
+        node = self._walk(parent_parts, path).children.get(name)
+        if node is None:
+            raise ValueError(f"no such file or directory: {path}")
+        if isinstance(node, Directory) and not recursive:
+            raise ValueError(f"is a directory: {path}")
+        del self._writable(parent_parts).children[name]
+
+    def _target(self, src, dst, cwd):
+        # Where src ends up for mv/cp: inside dst if it is a directory, else at dst
+        src_parts = split_path(src, cwd)
+        if not src_parts:
+            raise ValueError(f"cannot move or copy the root directory: {src}")
+        node = self._walk(src_parts, src)
+        if self.is_dir(dst, cwd):
+            target_parts, name = split_path(dst, cwd), src_parts[-1]
+        else:
+            target_parts, name = self._parent_of(dst, cwd)
+        existing = self._walk(target_parts, dst).children.get(name)
+        if target_parts + [name] == src_parts:
+            raise ValueError(f"'{src}' and '{dst}' are the same file")
+        if isinstance(existing, Directory):
+            raise ValueError(f"cannot overwrite directory: {dst}")
+        if isinstance(node, Directory) and existing is not None:
+            raise ValueError(f"cannot overwrite non-directory with directory: {dst}")
+        if isinstance(node, Directory) and target_parts[:len(src_parts)] == src_parts:
+            raise ValueError(f"cannot move or copy a directory into itself: {dst}")
+        return src_parts, node, target_parts, name
+
+    def move(self, src, dst, cwd='/'):
+        """Rename or move src; into dst if dst is a directory. Returns the new absolute path."""
+        src_parts, node, target_parts, name = self._target(src, dst, cwd)
+        del self._writable(src_parts[:-1]).children[src_parts[-1]]
+        self._writable(target_parts).children[name] = node
+        return '/' + '/'.join(target_parts + [name])
+
+    def copy(self, src, dst, cwd='/', recursive=False):
+        """Copy src; into dst if dst is a directory. Returns the new absolute path."""
+        _, node, target_parts, name = self._target(src, dst, cwd)
+        if isinstance(node, Directory) and not recursive:
+            raise ValueError(f"-r not specified; omitting directory: {src}")
+        self._writable(target_parts).children[name] = self._clone(node)
+        return '/' + '/'.join(target_parts + [name])
+
+    def _clone(self, node):
+        # Nodes this filesystem does not own never change under it, so they are shared instead of copied
+        if node.owner is not self:
+            return node
+        if isinstance(node, File):
+            return File(self, node.content)
+        return Directory(self, {name: self._clone(child) for name, child in node.children.items()})